@@ -0,0 +1,363 @@
+"""ベンチマークモジュール
+
+ランダムウォークで生成したローソク足を使ってジグザグ、インジケータ、抵抗帯判定、
+ファイルの読み書きの処理時間を計測し、スループット(本/秒)と計測対象の処理中の最大RSSをjsonに出力する。
+コミットごとの結果を比較できるように、出力にはコミットのハッシュ値を含める。
+--startupを指定した場合はfxtester.pyの起動時間も計測し、予算を超えた場合は終了コード1で終了する。
+
+    $ python -m bench.run --sizes 1000 100000 --cases zigzag sma
+    $ python -m bench.run --compare bench/results/<base>.json
+    $ python -m bench.run --cases --startup
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+from common.zigzag import mark_zigzag2
+from common.sma import mark_moving_averages, mark_sma
+from common.ichimoku import mark_ichimoku
+from common.resistance import calc_resistance_areas, detect_resistance_points
+from common.writer import write_dataframe
+from cmds.detect.detector import read_result
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# 既定の計測本数
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# 計測結果の出力先フォルダ
+RESULTS_DIR = Path(__file__).parent / "results"
+# 抵抗帯判定に使用するSMAの数値
+SMA = [20, 25, 50, 75, 100]
+# 抵抗帯判定に使用するウインドウの幅と閾値
+WINDOW_SIZE = 1
+THRESHOLD = 0.8
+# 最大RSSとRSSを取得するファイル (Linuxのみ)
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+# 起動時間の計測に使用するfxtester.pyと入力ファイル
+FXTESTER = Path(__file__).parent.parent / "fxtester.py"
+STARTUP_INPUT = Path(__file__).parent.parent / "common" / "test" / "USDJPYDaily.csv"
+# 起動時間の予算 (秒)
+# MEMO: cronから短い処理を繰り返し実行するため、グラフを表示しない実行ではmatplotlibを読み込まないこと
+STARTUP_BUDGETS = {
+    "startup_help": 0.3,
+    "startup_analyze": 1.0,
+}
+
+
+def generate_candles(size: int, seed: int = 0) -> pd.DataFrame:
+    """ランダムウォークでローソク足を生成する
+
+    Args:
+        size (int): ローソク足の本数
+        seed (int): 乱数のシード値
+
+    Returns:
+        DataFrame: ローソク足の情報が格納されたデータフレーム (1分足)
+    """
+    rng = np.random.default_rng(seed)
+    close = 100.0 + np.cumsum(rng.normal(0.0, 0.05, size))
+    open = np.concatenate([[100.0], close[:-1]]) + rng.normal(0.0, 0.005, size)
+    high = np.maximum(open, close) + rng.exponential(0.02, size)
+    low = np.minimum(open, close) - rng.exponential(0.02, size)
+    return pd.DataFrame({
+        "datetime": pd.date_range("2000-01-03", periods=size, freq="min"),
+        "open": open,
+        "high": high,
+        "low": low,
+        "close": close,
+        "tick": rng.integers(1, 1000, size),
+        "volume": np.zeros(size, dtype=np.int64),
+    })
+
+
+def analyzed_candles(size: int) -> pd.DataFrame:
+    """インジケータを計算済みのローソク足を生成する
+
+    Args:
+        size (int): ローソク足の本数
+
+    Returns:
+        DataFrame: インジケータが書き込まれたデータフレーム
+    """
+    df = generate_candles(size)
+    mark_zigzag2(df)
+    mark_sma(df, SMA)
+    mark_ichimoku(df)
+    return df
+
+
+def setup_detect(size: int) -> dict[str, Any]:
+    """抵抗帯判定の入力を準備する"""
+    df = analyzed_candles(size)
+    band_names = [f"sma-{average}" for average in SMA] + ["ichimoku_senkou_span_1", "ichimoku_senkou_span_2"]
+    indices = df.index[df['zigzag']].tolist()
+    return {"df": df, "band_names": band_names, "indices": indices, "kinds": df['zigzag-kind'].to_numpy(dtype=object)[indices]}
+
+
+def run_detect(data: dict[str, Any]):
+    """抵抗帯判定 (detectの面積の計算と判定)"""
+    areas = calc_resistance_areas(data["df"], data["band_names"], data["indices"], WINDOW_SIZE)
+    detect_resistance_points(areas, data["kinds"], THRESHOLD)
+
+
+def setup_write(size: int) -> dict[str, Any]:
+    """書き込みの入力と出力先の一時フォルダを準備する"""
+    temporary = tempfile.TemporaryDirectory()
+    return {"df": analyzed_candles(size), "temporary": temporary, "dir": temporary.name}
+
+
+def teardown_files(data: dict[str, Any]):
+    """出力先の一時フォルダを削除する"""
+    data["temporary"].cleanup()
+
+
+def setup_read(ext: str) -> Callable[[int], dict[str, Any]]:
+    """読み込むファイルを準備する処理を生成する"""
+    def setup(size: int) -> dict[str, Any]:
+        data = setup_write(size)
+        data["file"] = write_dataframe(data["df"], data["dir"], "bench", ext)
+        return data
+    return setup
+
+
+# 計測する処理 (準備処理, 計測対象の処理, 後始末の処理)
+CASES: dict[str, tuple[Callable[[int], Any], Callable[[Any], Any], Callable[[Any], Any] | None]] = {
+    "zigzag": (generate_candles, mark_zigzag2, None),
+    "sma": (generate_candles, lambda df: mark_sma(df, SMA), None),
+    "ema": (generate_candles, lambda df: mark_moving_averages(df, SMA, "ema"), None),
+    "wma": (generate_candles, lambda df: mark_moving_averages(df, SMA, "wma"), None),
+    "ichimoku": (generate_candles, mark_ichimoku, None),
+    "detect": (setup_detect, run_detect, None),
+    "write_json": (setup_write, lambda data: write_dataframe(data["df"], data["dir"], "bench", "json"), teardown_files),
+    "write_csv": (setup_write, lambda data: write_dataframe(data["df"], data["dir"], "bench", "csv"), teardown_files),
+    "read_json": (setup_read("json"), lambda data: read_result(data["file"]), teardown_files),
+    "read_csv": (setup_read("csv"), lambda data: read_result(data["file"]), teardown_files),
+}
+
+
+def read_status_mb(key: str) -> float | None:
+    """/proc/self/statusのメモリ使用量を取得する
+
+    Args:
+        key (str): 項目名 (VmRSS: 現在のRSS、VmHWM: 最大RSS)
+
+    Returns:
+        float | None: メモリ使用量 (MB、取得できない場合はNone)
+    """
+    if not PROC_STATUS.is_file():
+        return None
+    for line in PROC_STATUS.read_text().splitlines():
+        if line.startswith(f"{key}:"):
+            return int(line.split()[1]) / 1024
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """現在のプロセスの最大RSSを現在のRSSに戻す (Linuxのみ)
+
+    Returns:
+        bool: 戻せた場合はTrue
+    """
+    try:
+        PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """現在のプロセスの最大RSSを取得する
+
+    Returns:
+        float: 最大RSS (MB)
+    """
+    peak = read_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # MEMO: macOSはバイト単位、Linuxはキロバイト単位
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def measure(name: str, size: int, repeat: int) -> dict[str, Any]:
+    """1つの処理を計測する (準備処理は計測しない)
+
+    最大RSSは準備処理の後に現在のRSSに戻してから計測するため、計測対象の処理中の最大RSSになる。
+    MEMO: 最大RSSを戻せない環境(Linux以外)では準備処理を含めたプロセス全体の最大RSSになり、増加量は記録しない
+
+    Args:
+        name (str): 処理名 (CASESのキー)
+        size (int): ローソク足の本数
+        repeat (int): 繰り返し回数 (最短の時間を採用する)
+
+    Returns:
+        dict[str, Any]: 計測結果
+            - peak_rss_mb: 計測対象の処理中の最大RSS (MB、繰り返しの中の最大値)
+            - rss_increase_mb: 準備処理の後のRSSから増加した量 (MB、繰り返しの中の最大値)
+    """
+    setup, run, teardown = CASES[name]
+    seconds = []
+    peaks = []
+    increases = []
+    for _ in range(repeat):
+        # MEMO: 処理がデータフレームに列を追加するため毎回準備し直す
+        data = setup(size)
+        try:
+            reset = reset_peak_rss()
+            base = read_status_mb("VmRSS") if reset else None
+            started = time.perf_counter()
+            run(data)
+            seconds.append(time.perf_counter() - started)
+            peaks.append(peak_rss_mb())
+            if base is not None:
+                increases.append(peaks[-1] - base)
+        finally:
+            if teardown is not None:
+                teardown(data)
+    best = min(seconds)
+    return {
+        "name": name,
+        "bars": size,
+        "seconds": best,
+        "bars_per_sec": size / best if 0 < best else None,
+        "peak_rss_mb": max(peaks),
+        "rss_increase_mb": max(increases) if 0 < len(increases) else None,
+    }
+
+
+def measure_in_process(name: str, size: int, repeat: int) -> dict[str, Any]:
+    """処理ごとに新しいプロセスで計測する (最大RSSを処理ごとに分けるため)
+
+    Args:
+        name (str): 処理名 (CASESのキー)
+        size (int): ローソク足の本数
+        repeat (int): 繰り返し回数
+
+    Returns:
+        dict[str, Any]: 計測結果
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(measure, (name, size, repeat))
+
+
+def measure_startup(name: str, repeat: int) -> dict[str, Any]:
+    """fxtester.pyの起動から終了までの時間を計測する
+
+    startup_helpはanalyzeのヘルプ表示、startup_analyzeはグラフを表示しない日足の抽出処理を計測する
+
+    Args:
+        name (str): 計測名 (STARTUP_BUDGETSのキー)
+        repeat (int): 繰り返し回数 (最短の時間を採用する)
+
+    Returns:
+        dict[str, Any]: 計測結果
+    """
+    seconds = []
+    with tempfile.TemporaryDirectory() as output:
+        if name == "startup_help":
+            args = ["analyze", "--help"]
+        else:
+            args = ["analyze", "-i", str(STARTUP_INPUT), "-o", output, "-s", "20", "-z"]
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, str(FXTESTER), *args], cwd=FXTESTER.parent, capture_output=True, check=True)
+            seconds.append(time.perf_counter() - started)
+    best = min(seconds)
+    return {
+        "name": name,
+        "seconds": best,
+        "budget": STARTUP_BUDGETS[name],
+        "within_budget": best <= STARTUP_BUDGETS[name],
+    }
+
+
+def git_commit() -> str | None:
+    """現在のコミットのハッシュ値を取得する
+
+    Returns:
+        str | None: コミットのハッシュ値 (取得できない場合はNone)
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict[str, Any]], base_path: Path):
+    """比較元の計測結果とのスループットの比率を表示する
+
+    Args:
+        results (list[dict[str, Any]]): 計測結果
+        base_path (Path): 比較元の計測結果のファイルパス
+    """
+    with open(base_path) as f:
+        base = {(result["name"], result["bars"]): result for result in json.load(f)["results"]}
+    for result in results:
+        before = base.get((result["name"], result["bars"]))
+        if before is None or not before["bars_per_sec"] or not result["bars_per_sec"]:
+            continue
+        print(f"  {result['name']:<12}{result['bars']:>10} bars  x{result['bars_per_sec'] / before['bars_per_sec']:.2f}")
+
+
+def main():
+    """ベンチマークのエントリーポイント"""
+    parser = argparse.ArgumentParser(description="ホットパスのベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs='+', default=DEFAULT_SIZES, help="ローソク足の本数")
+    parser.add_argument("--cases", choices=list(CASES), nargs='*', default=list(CASES), help="計測する処理")
+    parser.add_argument("--startup", action="store_true", help="fxtester.pyの起動時間を計測する")
+    parser.add_argument("--repeat", type=int, default=3, help="繰り返し回数 (最短の時間を採用する)")
+    parser.add_argument("-o", "--output", type=str, help="計測結果の出力先 (未指定の場合はbench/results/<コミット>.json)")
+    parser.add_argument("--compare", type=str, help="比較元の計測結果のファイルパス")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.cases:
+        for size in args.sizes:
+            result = measure_in_process(name, size, args.repeat)
+            results.append(result)
+            increase = f"  +{result['rss_increase_mb']:.1f}MB" if result["rss_increase_mb"] is not None else ""
+            print(f"{name:<12}{size:>10} bars  {result['seconds']:10.4f}s  {result['bars_per_sec'] or 0:14,.0f} bars/s  {result['peak_rss_mb']:8.1f}MB{increase}")
+
+    startups = []
+    if args.startup:
+        for name in STARTUP_BUDGETS:
+            result = measure_startup(name, args.repeat)
+            startups.append(result)
+            print(f"{name:<22}{result['seconds']:10.4f}s  (budget {result['budget']:.1f}s{'' if result['within_budget'] else ', OVER'})")
+
+    commit = git_commit()
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{commit or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, mode='w') as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "results": results,
+            "startup": startups,
+        }, f, indent=4)
+    print(f"saved: {output}")
+
+    if args.compare:
+        compare(results, Path(args.compare))
+
+    if not all(result["within_budget"] for result in startups):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,25 @@
 """
 
 from pathlib import Path
-from common.zigzag import mark_zigzag2
-from common.sma import mark_sma
-from common.ichimoku import mark_ichimoku
+from functools import partial
+from common.batch import run_files, print_summary
+from common.indicator import evaluate, plan
+from common.loader import load_candles
+from common.timeframe import resample_timeframes, validate_timeframes
+from common.writer import write_dataframe
+from common.profiler import Profiler, collect_records, print_profile, profile_hottest, write_profile
+from common.schema import PIVOT_INDEX_EXT, PIVOT_INDEX_SUFFIX, PIVOT_SUFFIX, compact_frame, pivot_index
+from cmds.analyze.chunked import analyze_chunked
+from cmds.analyze.incremental import analyze_incremental
+from cmds.analyze.indicators import build_selections
 import common.graph as g
 import pandas as pd
+import logging
+
+logger = logging.getLogger("analyzer")
+
+# 差分計算の途中状態を保存するフォルダ名 (出力フォルダ内)
+STATE_DIR_NAME = ".incremental"
 
 
 class Analyzer:
@@ -34,10 +48,14 @@ class Analyzer:
 
         # 入力ファイルパスの取得
         input_path = Path(args.input) if args.input != None else Path(self.config["analyze"]["input"])
+        # 入力ファイルのキャッシュフォルダの取得 (未指定の場合はキャッシュしない)
+        cache_dir = args.cache if args.cache != None else (self.config["analyze"].get("cache") or None)
         # 出力ファイルパスの取得
         output_path = args.output if args.output != None else self.config["analyze"]["output"]
         # 出力ファイルの拡張子取得
         output_ext = args.ext if args.ext != None else self.config["analyze"]["ext"]
+        # 出力ファイルのgzip圧縮の可否取得
+        output_compress = args.gzip if args.gzip else bool(self.config["analyze"].get("gzip", False))
         # グラフ表示の可否取得
         show_graph = args.show_graph if args.show_graph else bool(self.config["analyze"]["show_graph"])
         # SMAの数値取得
@@ -46,8 +64,80 @@ class Analyzer:
         enable_ichimoku = args.ichimoku if args.ichimoku else bool(self.config["analyze"]["ichimoku"])
         # ジグザグの可否取得
         enable_zigzag = args.zigzag if args.zigzag else bool(self.config["analyze"]["zigzag"])
-        # 入力CSVファイルのエンコーディング
-        csv_encoding = "utf-16le"
+        # 差分計算の可否取得
+        incremental = args.incremental if args.incremental else bool(self.config["analyze"].get("incremental", False))
+        # 並列実行するプロセス数の取得
+        jobs = args.jobs if args.jobs != None else int(self.config["analyze"].get("jobs", 1))
+        # 入力ファイルの時間足の取得
+        base_timeframe = args.base_timeframe if args.base_timeframe != None else self.config["analyze"].get("base_timeframe", "M1")
+        # 変換先の時間足の取得 (未指定の場合は変換しない)
+        timeframes = args.timeframes if args.timeframes != None else list(self.config["analyze"].get("timeframes", []))
+        # 追加のインジケータの取得 (設定ファイルのみ)
+        indicators = list(self.config["analyze"].get("indicators", []))
+        # コンパクト形式で出力するかの取得
+        compact = args.compact if args.compact else bool(self.config["analyze"].get("compact", False))
+        # 分割して計算する本数の取得 (0の場合は一括で計算する)
+        chunk_rows = args.chunk_rows if args.chunk_rows != None else int(self.config["analyze"].get("chunk_rows", 0))
+        # ピボットインデックスを出力するかの取得
+        write_pivot_index = args.pivot_index if args.pivot_index else bool(self.config["analyze"].get("pivot_index", False))
+        # 段階ごとの計測の可否取得
+        profile = args.profile
+        # メモリ使用量の計測の可否取得
+        profile_memory = args.profile_memory
+        # cProfileの結果の出力先の取得
+        profile_stats = args.profile_stats
+
+        if jobs < 1:
+            logger.error(f"invalid jobs: {jobs}")
+            return
+        try:
+            plan(build_selections(sma, enable_ichimoku, enable_zigzag, indicators))
+        except ValueError as e:
+            logger.error(f"invalid indicator: {e}")
+            return
+        if chunk_rows < 0:
+            logger.error(f"invalid chunk rows: {chunk_rows}")
+            return
+        if 0 < chunk_rows:
+            # MEMO: 分割して計算する場合は読み込んだ範囲を順に出力するため、出力全体を扱う機能とは併用できない
+            if incremental or 0 < len(timeframes) or compact:
+                logger.error("chunked mode cannot be combined with incremental, timeframes or compact")
+                return
+            if not output_path:
+                logger.error("chunked mode requires output path")
+                return
+            if plan(build_selections(sma, enable_ichimoku, False, indicators)).lookback() is None:
+                logger.error("chunked mode does not support indicators that need all candles")
+                return
+            if show_graph:
+                logger.warning("graph display is disabled in chunked mode")
+                show_graph = False
+        if incremental and profile_stats:
+            # MEMO: 差分抽出は2回目の実行で計算するローソク足がないため、計測し直すcProfileは使用できない
+            logger.warning("profile stats are disabled in incremental mode")
+            profile_stats = None
+        if write_pivot_index and not enable_zigzag:
+            logger.warning("pivot index requires zigzag")
+            write_pivot_index = False
+        if 0 < len(timeframes) and validate_timeframes(base_timeframe, timeframes) is not None:
+            logger.error(f"invalid timeframe: {validate_timeframes(base_timeframe, timeframes)}")
+            return
+        if incremental and not output_path:
+            # 途中状態は出力フォルダに保存するため出力先が必要
+            logger.error("incremental mode requires output path")
+            return
+        if incremental and compact:
+            # MEMO: 差分抽出は出力ファイルに追記するため、出力全体からピボット表を作るコンパクト形式とは併用できない
+            logger.error("incremental mode cannot be combined with compact")
+            return
+        if incremental and show_graph:
+            # 差分抽出は計算し直した末尾の行しか保持しないためグラフを表示できない
+            logger.warning("graph display is disabled in incremental mode")
+            show_graph = False
+        if 1 < jobs and show_graph:
+            # グラフはプロセスごとに表示できないため並列実行時は表示しない
+            logger.warning("graph display is disabled in parallel mode")
+            show_graph = False
 
         # ファイル直接指定かフォルダ指定かチェックする
         if input_path.is_file():
@@ -55,34 +145,116 @@ class Analyzer:
             file_list = [input_path]
         else:
             # フォルダが指定された場合
-            file_list = [file for file in input_path.glob("*.csv") if file.is_file()]
+            file_list = sorted([file for file in input_path.glob("*.csv") if file.is_file()])
 
         # 入力ファイル(.csv)の読み込み
-        for file in file_list:
-            df = pd.read_csv(file, parse_dates=["datetime"], dayfirst=False, encoding=csv_encoding, names=[
-                             "datetime", "open", "high", "low", "close", "tick", "volume"])
-            # ジグザグを計算する
-            if enable_zigzag:
-                mark_zigzag2(df)
-            # 単純移動平均線を計算する
-            mark_sma(df, sma)
-            # 一目均衡表を計算する
-            if enable_ichimoku:
-                mark_ichimoku(df)
+        analyze = partial(self.analyze_file, cache_dir=cache_dir, output_path=output_path, output_ext=output_ext,
+                          output_compress=output_compress, show_graph=show_graph,
+                          sma=sma, enable_ichimoku=enable_ichimoku, enable_zigzag=enable_zigzag, indicators=indicators,
+                          incremental=incremental, base_timeframe=base_timeframe, timeframes=timeframes, compact=compact,
+                          chunk_rows=chunk_rows, write_pivot_index=write_pivot_index, profile=profile, profile_memory=profile_memory, profile_stats=profile_stats)
+        results = run_files(partial(profile_hottest, analyze, profile_stats, output_path) if profile else analyze, file_list, jobs)
+        if not input_path.is_file():
+            print_summary("analyze", results)
+
+        if profile:
+            records = collect_records(results)
+            print_profile("analyze", records)
+            if args.profile_output:
+                write_profile(args.profile_output, "analyze", records)
+
+    def analyze_file(self, file, cache_dir, output_path, output_ext, output_compress, show_graph, sma, enable_ichimoku, enable_zigzag, indicators, incremental,
+                     base_timeframe, timeframes, compact, chunk_rows, write_pivot_index, profile, profile_memory, profile_stats, profile_target=None):
+        """1ファイルの抽出処理
+
+        時間足が指定された場合は読み込んだローソク足をメモリ上で時間足ごとに変換し、
+        時間足ごとに出力する (出力ファイル名は"入力ファイル名_時間足")
+
+        Args:
+            file (Path): 入力ファイルのパス
+            cache_dir (str | None): 入力ファイルのキャッシュフォルダのパス
+            output_path (str): 出力ファイルのパス
+            output_ext (str): 出力ファイルの拡張子
+            output_compress (bool): 出力ファイルのgzip圧縮の可否
+            show_graph (bool): グラフ表示の可否
+            sma (list[int]): SMAの数値
+            enable_ichimoku (bool): 一目均衡表の可否
+            enable_zigzag (bool): ジグザグの可否
+            indicators (list[dict[str, Any]]): 追加のインジケータ
+            incremental (bool): 差分計算の可否
+            base_timeframe (str): 入力ファイルの時間足
+            timeframes (list[str]): 変換先の時間足 (空の場合は変換しない)
+            compact (bool): コンパクト形式(float32のインジケータとジグザグのピボット表)で出力するかの可否
+            chunk_rows (int): 分割して計算する本数 (0の場合は一括で計算する)
+            write_pivot_index (bool): ピボットインデックス("出力ファイル名.pivotindex.arrow")を出力するかの可否
+            profile (bool): 段階ごとの計測の可否
+            profile_memory (bool): 段階ごとのメモリ使用量の計測の可否
+            profile_stats (str | None): cProfileの結果を出力するフォルダのパス
+            profile_target (tuple[str, str] | None): cProfileで計測する段階 (計測対象の名前, 段階の名前)
+
+        Returns:
+            list[dict[str, Any]] | None: 段階ごとの計測結果 (計測しない場合はNone)
+        """
+        profiler = Profiler(profile, file.name, profile_stats, profile_memory, profile_target)
+        if 0 < chunk_rows:
+            # ファイル全体を読み込まずにchunk_rows本ずつ計算して出力する
+            with profiler.stage("chunked"):
+                analyze_chunked(file, output_path, file.stem, output_ext, output_compress, chunk_rows,
+                                sma, enable_ichimoku, enable_zigzag, indicators, write_pivot_index)
+            return profiler.finish()
+
+        with profiler.stage("load"):
+            candles = load_candles(file, cache_dir)
+        with profiler.stage("resample"):
+            frames = resample_timeframes(candles, base_timeframe, timeframes) if 0 < len(timeframes) else {None: candles}
+
+        for timeframe, df in frames.items():
+            stem = file.stem if timeframe is None else f"{file.stem}_{timeframe}"
+            # 時間足ごとの計測結果は出力ファイル名で区別する
+            profiler.label = file.name if timeframe is None else stem
+            if incremental:
+                # 前回の出力ファイルに追加されたローソク足の行だけを計算して追記する
+                with profiler.stage("incremental"):
+                    analyze_incremental(df, Path(output_path) / STATE_DIR_NAME, output_path, stem, output_ext, output_compress,
+                                        sma, enable_ichimoku, enable_zigzag, indicators, write_pivot_index)
+                continue
+
+            analyze(df, sma, enable_ichimoku, enable_zigzag, profiler, indicators)
 
             if show_graph:
-                g.show(df, title=file.name)
+                g.show(df, title=file.name if timeframe is None else f"{file.name} ({timeframe})")
 
             if output_path:
-                data = []
-                if output_ext == "json":
-                    data = df.to_json(orient="records",
-                                      date_format="iso", date_unit="s", indent=4)
-                elif output_ext == "csv":
-                    data = df.to_csv(index=True, index_label="index")
-                output_full_path = output_path / \
-                    Path(file.stem + f".{output_ext}")
-                output_full_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(output_full_path, mode='w') as f:
-                    # 抽出結果の出力
-                    f.write(data)
+                with profiler.stage("write"):
+                    if write_pivot_index:
+                        # MEMO: ストアからジグザグの前後だけを読み込めるように形式によらずarrowで出力する
+                        write_dataframe(pivot_index(df), output_path, f"{stem}{PIVOT_INDEX_SUFFIX}", PIVOT_INDEX_EXT)
+                    if compact:
+                        # ジグザグの列はピボット表として"出力ファイル名.pivots"に出力する
+                        df, pivots = compact_frame(df)
+                        if pivots is not None:
+                            write_dataframe(pivots, output_path, f"{stem}{PIVOT_SUFFIX}", output_ext, output_compress)
+                    write_dataframe(df, output_path, stem, output_ext, output_compress)
+
+        return profiler.finish()
+
+
+def analyze(df: pd.DataFrame, sma, enable_ichimoku, enable_zigzag, profiler: Profiler | None = None, indicators=None) -> pd.DataFrame:
+    """インジケータを計算してデータフレームに書き込む
+
+    ジグザグ、単純移動平均線、一目均衡表、追加のインジケータの順に計算する。
+    インジケータ間で共通の中間値(同じ期間のローリング最大値など)は1度だけ計算する。
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        sma (list[int]): SMAの数値
+        enable_ichimoku (bool): 一目均衡表の可否
+        enable_zigzag (bool): ジグザグの可否
+        profiler (Profiler | None): 段階ごとの計測クラス (Noneの場合は計測しない)
+        indicators (list[dict[str, Any]] | None): 追加のインジケータ ("name"にインジケータ名、それ以外は引数)
+
+    Returns:
+        DataFrame: インジケータが書き込まれたデータフレーム
+    """
+    profiler = profiler if profiler is not None else Profiler()
+    return evaluate(df, plan(build_selections(sma, enable_ichimoku, enable_zigzag, indicators)), profiler.stage)
@@ -0,0 +1,108 @@
+"""分割抽出モジュール
+
+メモリに載らない大きなCSVをchunk_rows行ずつ読み込んで計算し、値が確定した行から順に出力する。
+分割した境界では差分抽出(incremental)と同じように、計算に必要な過去のローソク足と
+ジグザグの探索の途中状態を次の分割に引き継ぐため、一括で計算した場合と同じ結果になる。
+"""
+
+from pathlib import Path
+from common.loader import iter_mt_csv
+from common.schema import PIVOT_INDEX_EXT, PIVOT_INDEX_SUFFIX, pivot_index
+from common.writer import ChunkedWriter
+from cmds.analyze.incremental import CANDLE_COLUMNS, analyze_all, analyze_appended, indicator_plan, shift_resume, to_output
+from contextlib import nullcontext
+import pandas as pd
+
+
+def analyze_chunked(file: Path, output_path: str, stem: str, ext: str, compress: bool, chunk_rows: int,
+                    sma, enable_ichimoku, enable_zigzag, indicators=None, write_pivot_index=False) -> Path:
+    """CSVを分割して読み込み、インジケータを計算して出力する
+
+    Args:
+        file (Path): 入力ファイルのパス
+        output_path (str): 出力先フォルダのパス
+        stem (str): 出力ファイル名 (拡張子なし)
+        ext (str): 出力ファイルの拡張子
+        compress (bool): 出力ファイルのgzip圧縮の可否
+        chunk_rows (int): 1回に読み込むローソク足の本数
+        sma (list[int]): SMAの数値
+        enable_ichimoku (bool): 一目均衡表の可否
+        enable_zigzag (bool): ジグザグの可否
+        indicators (list[dict[str, Any]] | None): 追加のインジケータ
+        write_pivot_index (bool): ピボットインデックス("出力ファイル名.pivotindex.arrow")を出力するかの可否
+
+    Returns:
+        Path: 出力したファイルのパス
+
+    Raises:
+        ValueError: 全てのローソク足が必要なインジケータ(指数平滑移動平均線など)が選択された場合
+    """
+    settings = {
+        "sma": [int(average) for average in (sma if sma is not None else [])],
+        "ichimoku": bool(enable_ichimoku),
+        "zigzag": bool(enable_zigzag),
+        "indicators": list(indicators if indicators is not None else []),
+    }
+    evaluation = indicator_plan(settings)
+    lookback = evaluation.lookback()
+    if lookback is None:
+        raise ValueError("chunked mode does not support indicators that need all candles")
+    lookahead = evaluation.lookahead()
+
+    write_pivot_index = write_pivot_index and settings["zigzag"]
+    index_writer = ChunkedWriter(output_path, f"{stem}{PIVOT_INDEX_SUFFIX}", PIVOT_INDEX_EXT) if write_pivot_index else None
+    with ChunkedWriter(output_path, stem, ext, compress) as writer, index_writer or nullcontext():
+        # 保持している先頭のローソク足の行番号と、保持している範囲で出力済みの本数
+        base = 0
+        written = 0
+        frame = None
+        resume = None
+        for chunk in iter_mt_csv(file, chunk_rows):
+            if frame is None or (settings["zigzag"] and resume is None):
+                # ジグザグの探索を再開できない間は保持している全てのローソク足を計算し直す
+                candles = chunk if frame is None else pd.concat([frame[CANDLE_COLUMNS], chunk], ignore_index=True)
+                frame, resume = analyze_all(candles, settings)
+            else:
+                candles = pd.concat([frame[CANDLE_COLUMNS], chunk], ignore_index=True)
+                frame, resume = analyze_appended(candles, settings, frame, resume)
+
+            # 後続のローソク足で変わらない行(未来のローソク足を使う値と確定していないジグザグより前)を出力する
+            final = max(0, len(frame) - lookahead)
+            if settings["zigzag"]:
+                final = 0 if resume is None else min(final, resume["row_index"])
+            if written < final:
+                write_rows(writer, index_writer, to_output(frame.iloc[written:final], base))
+                written = final
+
+            # 出力した行のうち計算に必要な本数だけを残す
+            keep = max(0, written - lookback)
+            if 0 < keep:
+                frame = frame.iloc[keep:].reset_index(drop=True)
+                if 'zigzag-from' in frame.columns:
+                    frame['zigzag-from'] = frame['zigzag-from'] - keep
+                resume = shift_resume(resume, -keep)
+                base += keep
+                written -= keep
+
+        if frame is not None and written < len(frame):
+            write_rows(writer, index_writer, to_output(frame.iloc[written:], base))
+        if index_writer is not None and index_writer.rows == 0 and frame is not None:
+            # ジグザグがない場合も空のピボットインデックスを出力する
+            index_writer.write(pivot_index(frame.iloc[:0]))
+    return writer.path
+
+
+def write_rows(writer: ChunkedWriter, index_writer: ChunkedWriter | None, frame: pd.DataFrame):
+    """出力する行とピボットインデックスを追記する
+
+    Args:
+        writer (ChunkedWriter): 抽出結果の出力クラス
+        index_writer (ChunkedWriter | None): ピボットインデックスの出力クラス (Noneの場合は出力しない)
+        frame (DataFrame): 出力する行 (インデックスはファイル全体の行番号)
+    """
+    writer.write(frame)
+    if index_writer is not None:
+        index = pivot_index(frame)
+        if 0 < len(index):
+            # MEMO: 空のレコードバッチを書き込まないようにジグザグがある場合だけ追記する
+            index_writer.write(index)
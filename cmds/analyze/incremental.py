@@ -0,0 +1,386 @@
+"""差分抽出モジュール
+
+前回の出力ファイルに追加されたローソク足の行だけを追記する。
+次回の計算に必要な末尾の行(計算に必要な過去のローソク足と、結果が変わり得る行)と
+ジグザグの探索の途中状態だけを保存しておき、出力ファイルは値が変わり得る行の先頭から書き直す。
+"""
+
+from pathlib import Path
+from typing import Any
+from common.zigzag import ZigzagEngine, calc_zigzag2
+from common.indicator import Plan, evaluate, plan
+from common.schema import PIVOT_BAR_COLUMN, PIVOT_INDEX_EXT, PIVOT_INDEX_SUFFIX, pivot_index
+from common.store import read_store
+from common.writer import ChunkedWriter, write_dataframe
+from cmds.analyze.indicators import build_selections
+from pandas import DataFrame
+import json
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("analyzer")
+
+# ローソク足の列名
+CANDLE_COLUMNS = ["datetime", "open", "high", "low", "close", "tick", "volume"]
+# 次回に書き換えられても差分を計算できる末尾のローソク足の本数 (確定前の足や変換した上位足は最後の1本が変わる)
+REWRITE_MARGIN = 1
+# 途中で切り詰めて追記できる出力形式 (それ以外は前回の出力ファイルを読み込んで書き直す)
+APPENDABLE_EXTS = ["json", "jsonl", "csv"]
+# 末尾の行を保存するファイル名の接尾辞 ("出力ファイル名.tail.feather")
+TAIL_SUFFIX = ".tail"
+
+
+def analyze_incremental(candles: DataFrame, state_dir: str | Path, output_path: str | Path, stem: str, ext: str, compress: bool,
+                        sma, enable_ichimoku, enable_zigzag, indicators=None, write_pivot_index=False) -> Path:
+    """前回の出力ファイルに追加されたローソク足の行を追記する
+
+    前回の計算結果のうち次回の計算に必要な末尾の行と探索の途中状態をstate_dirに保存しておき、
+    次回は追加されたローソク足と結果が変わり得る末尾(遅行スパン、確定していないジグザグ)だけを計算し直して、
+    出力ファイルの値が変わり得る行から後ろを書き直す。
+    前回から設定が変わった場合や保存した範囲より前のローソク足が書き換えられた場合は全て計算し直す。
+
+    MEMO: 全てのローソク足が必要なインジケータ(指数平滑移動平均線など)を選択した場合は全ての行を保存する。
+    また、parquet, feather, arrowは途中から追記できないため前回の出力ファイルを読み込んで書き直す。
+
+    Args:
+        candles (DataFrame): ローソク足の情報が格納されたデータフレーム
+        state_dir (str | Path): 途中状態を保存するフォルダのパス
+        output_path (str | Path): 出力先フォルダのパス
+        stem (str): 出力ファイル名 (拡張子なし、途中状態のファイル名にも使用する)
+        ext (str): 出力ファイルの拡張子
+        compress (bool): 出力ファイルのgzip圧縮の可否 (json, jsonl, csvのみ)
+        sma (list[int]): SMAの数値
+        enable_ichimoku (bool): 一目均衡表の可否
+        enable_zigzag (bool): ジグザグの可否
+        indicators (list[dict[str, Any]] | None): 追加のインジケータ
+        write_pivot_index (bool): ピボットインデックス("出力ファイル名.pivotindex.arrow")を出力するかの可否
+
+    Returns:
+        Path: 出力したファイルのパス
+    """
+    state_dir = Path(state_dir)
+    settings = {
+        "sma": [int(average) for average in (sma if sma is not None else [])],
+        "ichimoku": bool(enable_ichimoku),
+        "zigzag": bool(enable_zigzag),
+        "indicators": list(indicators if indicators is not None else []),
+    }
+    output = {
+        "ext": ext,
+        "compress": bool(compress) and ext in APPENDABLE_EXTS,
+        "pivot_index": bool(write_pivot_index) and settings["zigzag"],
+    }
+
+    state = load_state(state_dir, stem, settings, output, Path(output_path), candles)
+    if state is None:
+        base, pending, offset = 0, 0, None
+        df, resume = analyze_all(candles, settings)
+    else:
+        frame, state = state
+        base, pending, offset = state["tail_start"], state["pending"], state["output"]["offset"]
+        # 保存した末尾の行を先頭にして計算する
+        df, resume = analyze_appended(candles.iloc[base:].reset_index(drop=True), settings, frame, shift_resume(state["zigzag"], -base))
+        resume = shift_resume(resume, base)
+
+    # 次回に値が変わり得る行の先頭と、次回の計算に必要な行の先頭 (いずれもファイル全体の行番号)
+    evaluation = indicator_plan(settings)
+    lookback = evaluation.lookback()
+    total = base + len(df)
+    next_pending = max(0, total - REWRITE_MARGIN - evaluation.lookahead())
+    if settings["zigzag"]:
+        next_pending = 0 if resume is None else min(next_pending, resume["row_index"])
+    next_pending = max(pending, next_pending)
+    tail_start = 0 if lookback is None else max(0, next_pending - lookback)
+    if resume is not None:
+        tail_start = min(tail_start, resume["row_index"])
+    tail_start = max(base, tail_start)
+
+    rows = to_output(df.iloc[pending - base:], base)
+    path, next_offset = write_output(rows, next_pending - pending, Path(output_path), stem, output, pending, offset)
+
+    output.update({"file": path.name, "size": path.stat().st_size, "offset": next_offset})
+    save_state(state_dir, stem, settings, output, to_output(df.iloc[tail_start - base:], base), tail_start, next_pending, resume)
+    return path
+
+
+def write_output(rows: DataFrame, final: int, output_path: Path, stem: str, output: dict[str, Any], pending: int, offset: int | None) -> tuple[Path, int | None]:
+    """出力ファイルの値が変わり得る行から後ろを書き直す
+
+    Args:
+        rows (DataFrame): 書き直す行 (インデックスはファイル全体の行番号)
+        final (int): rowsのうち次回に値が変わらない行の本数
+        output_path (Path): 出力先フォルダのパス
+        stem (str): 出力ファイル名 (拡張子なし)
+        output (dict[str, Any]): 出力の設定
+        pending (int): 書き直す先頭の行のファイル全体の行番号 (0の場合は新しく書き込む)
+        offset (int | None): 書き直す先頭の行のバイト位置 (json, jsonl, csvのみ)
+
+    Returns:
+        tuple[Path, int | None]: 出力したファイルのパスと、次回に書き直す先頭の行のバイト位置
+    """
+    next_offset = None
+    index = pivot_index(rows) if output["pivot_index"] else None
+    if output["ext"] in APPENDABLE_EXTS:
+        with ChunkedWriter(output_path, stem, output["ext"], output["compress"], offset=offset if 0 < pending else None, rows=pending) as writer:
+            writer.write(rows.iloc[:final])
+            next_offset = writer.mark()
+            writer.write(rows.iloc[final:])
+        path = writer.path
+    else:
+        if 0 < pending:
+            # MEMO: 列指向の形式は途中から追記できないため、前回の出力ファイルの確定した行に連結して書き直す
+            previous = read_output(output_path / f"{stem}.{output['ext']}", output["ext"]).iloc[:pending]
+            rows = pd.concat([previous, rows.reset_index(drop=True)], ignore_index=True)
+        path = write_dataframe(rows, output_path, stem, output["ext"])
+
+    if index is not None:
+        if 0 < pending:
+            # ピボットインデックスは確定した行のジグザグを残して連結する
+            previous, _ = read_store(output_path / f"{stem}{PIVOT_INDEX_SUFFIX}.{PIVOT_INDEX_EXT}")
+            index = pd.concat([previous[previous[PIVOT_BAR_COLUMN] < pending], index], ignore_index=True)
+        write_dataframe(index, output_path, f"{stem}{PIVOT_INDEX_SUFFIX}", PIVOT_INDEX_EXT)
+    return path, next_offset
+
+
+def read_output(file: Path, ext: str) -> DataFrame:
+    """前回の出力ファイルを読み込む (parquet, feather, arrowのみ)
+
+    Args:
+        file (Path): 出力ファイルのパス
+        ext (str): 出力ファイルの拡張子
+
+    Returns:
+        DataFrame: 読み込んだデータフレーム
+    """
+    if ext == "parquet":
+        return pd.read_parquet(file)
+    if ext == "feather":
+        return pd.read_feather(file)
+    df, _ = read_store(file)
+    return df
+
+
+def to_output(frame: DataFrame, base: int) -> DataFrame:
+    """保持している行を出力する行番号に変換する
+
+    Args:
+        frame (DataFrame): 出力する行
+        base (int): 保持している先頭のローソク足の行番号
+
+    Returns:
+        DataFrame: インデックスとジグザグの起点をファイル全体の行番号にしたデータフレーム
+    """
+    frame = frame.set_axis(frame.index + base, axis=0)
+    if 'zigzag-from' in frame.columns:
+        frame = frame.assign(**{'zigzag-from': frame['zigzag-from'] + base})
+    return frame
+
+
+def analyze_all(candles: DataFrame, settings: dict[str, Any]) -> tuple[DataFrame, dict[str, Any] | None]:
+    """全てのローソク足を計算する
+
+    Args:
+        candles (DataFrame): ローソク足の情報が格納されたデータフレーム
+        settings (dict[str, Any]): インジケータの設定
+
+    Returns:
+        tuple[DataFrame, dict[str, Any] | None]: 計算結果とジグザグの再開位置
+    """
+    df = candles.copy()
+    resume = None
+    # ジグザグを計算する
+    if settings["zigzag"]:
+        df['zigzag'] = False
+        marks, resume = calc_zigzag2(ZigzagEngine.from_dataframe(df))
+        marks.apply(df)
+    # ジグザグ以外のインジケータを計算する
+    evaluate(df, indicator_plan(settings))
+    return df, resume
+
+
+def analyze_appended(candles: DataFrame, settings: dict[str, Any], frame: DataFrame, resume: dict[str, Any] | None) -> tuple[DataFrame, dict[str, Any] | None]:
+    """前回の計算結果に追加されたローソク足を計算する
+
+    Args:
+        candles (DataFrame): ローソク足の情報が格納されたデータフレーム
+        settings (dict[str, Any]): インジケータの設定
+        frame (DataFrame): 前回の計算結果
+        resume (dict[str, Any] | None): 前回のジグザグの再開位置
+
+    Returns:
+        tuple[DataFrame, dict[str, Any] | None]: 計算結果とジグザグの再開位置
+    """
+    size = len(frame)
+    indicators = indicator_plan(settings)
+
+    # インジケータを計算し直す先頭の位置 (未来のローソク足を使う値はローソク足の追加で変わる)
+    cut = max(0, size - indicators.lookahead())
+    # ジグザグを探索し直す先頭の位置
+    row_index = resume["row_index"] if settings["zigzag"] else size
+    # 計算に必要な過去のローソク足を含めた先頭の位置 (全て必要なインジケータがある場合は先頭から)
+    lookback = indicators.lookback()
+    start = 0 if lookback is None else max(0, min(cut - lookback, row_index))
+
+    # 必要な範囲だけを計算する
+    work = candles.iloc[start:][CANDLE_COLUMNS].reset_index(drop=True)
+    evaluate(work, indicators)
+
+    # 前回の計算結果に追加されたローソク足を連結する
+    df = pd.concat([frame, candles.iloc[size:]], ignore_index=True)
+
+    # インジケータの値を書き換える
+    for column in work.columns.difference(CANDLE_COLUMNS):
+        values = df[column].to_numpy(dtype=float, copy=True)
+        values[cut:] = work[column].to_numpy()[cut - start:]
+        df[column] = values
+
+    next_resume = None
+    if settings["zigzag"]:
+        # 確定していないジグザグを消去してから探索し直す
+        zigzag = df['zigzag'].to_numpy(dtype=bool, na_value=False)
+        zigzag[row_index:] = False
+        df['zigzag'] = zigzag
+        for column in [column for column in df.columns if column.startswith('zigzag-')]:
+            df.loc[row_index:, column] = np.nan
+
+        marks, next_resume = calc_zigzag2(ZigzagEngine.from_dataframe(work), shift_resume(resume, -start))
+        marks.apply(df, offset=start)
+        next_resume = shift_resume(next_resume, start)
+
+    return df, next_resume
+
+
+def indicator_plan(settings: dict[str, Any]) -> Plan:
+    """ジグザグ以外のインジケータの評価計画を作成する
+
+    MEMO: ジグザグは探索の途中状態から再開するため評価計画に含めない
+
+    Args:
+        settings (dict[str, Any]): インジケータの設定
+
+    Returns:
+        Plan: 評価計画
+    """
+    return plan(build_selections(settings["sma"], settings["ichimoku"], False, settings["indicators"]))
+
+
+def shift_resume(resume: dict[str, Any] | None, offset: int) -> dict[str, Any] | None:
+    """ジグザグの再開位置のインデックス番号をずらす
+
+    Args:
+        resume (dict[str, Any] | None): ジグザグの再開位置
+        offset (int): インデックス番号に加算する値
+
+    Returns:
+        dict[str, Any] | None: インデックス番号をずらした再開位置
+    """
+    if resume is None:
+        return None
+    last_bottom = dict(resume["last_bottom"])
+    last_bottom["index"] += offset
+    last_bottom["start"] += offset
+    return {"row_index": resume["row_index"] + offset, "last_bottom": last_bottom}
+
+
+def load_state(state_dir: Path, name: str, settings: dict[str, Any], output: dict[str, Any], output_path: Path,
+               candles: DataFrame) -> tuple[DataFrame, dict[str, Any]] | None:
+    """保存した末尾の行と途中状態を読み込む
+
+    Args:
+        state_dir (Path): 途中状態を保存するフォルダのパス
+        name (str): 途中状態のファイル名 (拡張子なし)
+        settings (dict[str, Any]): インジケータの設定
+        output (dict[str, Any]): 出力の設定
+        output_path (Path): 出力先フォルダのパス
+        candles (DataFrame): ローソク足の情報が格納されたデータフレーム
+
+    Returns:
+        tuple[DataFrame, dict[str, Any]] | None: 書き換えられていない末尾の行(インデックスとジグザグの起点は末尾の先頭から)と途中状態
+            (差分を計算できない場合はNone)
+    """
+    state_path = state_dir / f"{name}.json"
+    tail_path = state_dir / f"{name}{TAIL_SUFFIX}.feather"
+    if not state_path.is_file() or not tail_path.is_file():
+        return None
+
+    with open(state_path) as f:
+        state = json.load(f)
+
+    if "tail_start" not in state:
+        # MEMO: 全ての計算結果を保存していた形式の途中状態は使用しない
+        return None
+    if state["settings"] != settings:
+        logger.info(f"settings changed, recalculating all candles: {name}")
+        return None
+    if any(state["output"][key] != value for key, value in output.items()):
+        logger.info(f"output format changed, recalculating all candles: {name}")
+        return None
+    file = output_path / state["output"]["file"]
+    if not file.is_file() or file.stat().st_size != state["output"]["size"]:
+        logger.info(f"output file changed, recalculating all candles: {name}")
+        return None
+    if output["pivot_index"] and not (output_path / f"{name}{PIVOT_INDEX_SUFFIX}.{PIVOT_INDEX_EXT}").is_file():
+        return None
+    resume = state["zigzag"]
+    if settings["zigzag"] and resume is None:
+        # ジグザグの探索を再開できない場合
+        return None
+
+    frame = pd.read_feather(tail_path)
+    base = state["tail_start"]
+    size = base + len(frame)
+    if size != state["rows"] or len(candles) < base:
+        return None
+
+    # 保存した末尾の行のうちローソク足が書き換えられていない本数を数える
+    end = min(size, len(candles))
+    same = np.ones(end - base, dtype=bool)
+    for column in CANDLE_COLUMNS:
+        same &= frame[column].to_numpy()[:end - base] == candles[column].to_numpy()[base:end]
+    changed = base + (len(same) if same.all() else int(np.argmin(same)))
+
+    # 書き換えられたローソク足の影響が出力済みの行または保存した範囲に及ぶ場合は全て計算し直す
+    # MEMO: ジグザグの再開位置は再開位置のローソク足で確定したボトムを保持するため、再開位置の足も書き換えられていないこと
+    evaluation = indicator_plan(settings)
+    lookback = evaluation.lookback()
+    cut = changed - evaluation.lookahead()
+    if cut < state["pending"] or (lookback is not None and cut - lookback < base) or \
+            (resume is not None and not state["pending"] <= resume["row_index"] < changed):
+        logger.info(f"candles rewritten, recalculating all candles: {name}")
+        return None
+
+    frame = frame.iloc[:changed - base]
+    if 'zigzag-from' in frame.columns:
+        frame = frame.assign(**{'zigzag-from': frame['zigzag-from'] - base})
+    return frame, state
+
+
+def save_state(state_dir: Path, name: str, settings: dict[str, Any], output: dict[str, Any], tail: DataFrame, tail_start: int, pending: int,
+               resume: dict[str, Any] | None):
+    """次回の計算に必要な末尾の行と途中状態を保存する
+
+    Args:
+        state_dir (Path): 途中状態を保存するフォルダのパス
+        name (str): 途中状態のファイル名 (拡張子なし)
+        settings (dict[str, Any]): インジケータの設定
+        output (dict[str, Any]): 出力の設定と出力したファイルの情報
+        tail (DataFrame): 次回の計算に必要な末尾の行 (ジグザグの起点はファイル全体の行番号)
+        tail_start (int): 末尾の先頭の行のファイル全体の行番号
+        pending (int): 次回に書き直す先頭の行のファイル全体の行番号
+        resume (dict[str, Any] | None): ジグザグの再開位置
+    """
+    state_dir.mkdir(parents=True, exist_ok=True)
+    tail.reset_index(drop=True).to_feather(state_dir / f"{name}{TAIL_SUFFIX}.feather")
+
+    state = {
+        "settings": settings,
+        "output": output,
+        "rows": tail_start + len(tail),
+        "datetime": tail["datetime"].iloc[-1].isoformat() if 0 < len(tail) else None,
+        "tail_start": tail_start,
+        "pending": pending,
+        "zigzag": resume,
+    }
+    with open(state_dir / f"{name}.json", mode='w') as f:
+        json.dump(state, f, indent=4)
@@ -0,0 +1,146 @@
+"""組み込みインジケータモジュール
+
+ジグザグ、単純移動平均線、一目均衡表と追加のインジケータ(指数平滑・加重移動平均線、ボリンジャーバンド、ATR)を登録する。
+インジケータを追加する場合はregisterで定義を登録し、設定ファイルの[analyze]のindicatorsで選択する。
+"""
+
+from typing import Any
+from common.indicator import Indicator, register
+from common.ichimoku import ICHIMOKU_INPUTS, KIJUN_PERIOD, SENKOU_SHIFT, SENKOU_SPAN_2_PERIOD, calc_ichimoku
+from common.sma import calc_moving_averages
+from common.zigzag import mark_zigzag2
+
+
+def compute_zigzag(df, intermediates, params) -> dict:
+    """ジグザグを計算する (データフレームに直接書き込む)"""
+    mark_zigzag2(df)
+    return {}
+
+
+def compute_sma(df, intermediates, params) -> dict:
+    """単純移動平均線を計算する (全ての本数をまとめて計算する)"""
+    return dict(calc_moving_averages(df['close'], params["averages"], "sma").items())
+
+
+def compute_ema(df, intermediates, params) -> dict:
+    """指数平滑移動平均線を計算する"""
+    return dict(calc_moving_averages(df['close'], params["averages"], "ema").items())
+
+
+def compute_wma(df, intermediates, params) -> dict:
+    """加重移動平均線を計算する"""
+    return dict(calc_moving_averages(df['close'], params["averages"], "wma").items())
+
+
+def compute_ichimoku(df, intermediates, params) -> dict:
+    """一目均衡表を計算する"""
+    return calc_ichimoku(intermediates.get, df['close'])
+
+
+def compute_bollinger(df, intermediates, params) -> dict:
+    """ボリンジャーバンドを計算する (中心線は同じ期間の単純移動平均線を共有する)"""
+    period, deviation = params["period"], params["deviation"]
+    middle = intermediates.get("rolling_mean", "close", period)
+    std = intermediates.get("rolling_std", "close", period)
+    return {
+        f'bollinger-{period}-upper': middle + std * deviation,
+        f'bollinger-{period}-lower': middle - std * deviation,
+    }
+
+
+def compute_atr(df, intermediates, params) -> dict:
+    """ATR(真の値幅の単純移動平均)を計算する"""
+    return {f'atr-{params["period"]}': intermediates.get("rolling_mean", "true_range", params["period"])}
+
+
+# ジグザグ
+# MEMO: 確定したジグザグは後続のローソク足で変わり得るため、差分計算は探索の再開位置で行う (incremental)
+ZIGZAG = register(Indicator(
+    name="zigzag",
+    inputs=lambda params: [],
+    compute=compute_zigzag,
+    lookback=lambda params: None,
+))
+
+# 単純移動平均線 (averages: 平均する本数)
+# MEMO: 1回の累積和から全ての本数を計算するため、ローリング平均の中間値は使わない
+SMA = register(Indicator(
+    name="sma",
+    inputs=lambda params: [],
+    compute=compute_sma,
+    lookback=lambda params: max([average - 1 for average in params["averages"]], default=0),
+))
+
+# 指数平滑移動平均線 (averages: 平均する本数)
+# MEMO: 過去の全ての終値の影響が残るため、差分計算でも先頭から計算する
+EMA = register(Indicator(
+    name="ema",
+    inputs=lambda params: [],
+    compute=compute_ema,
+    lookback=lambda params: None,
+))
+
+# 加重移動平均線 (averages: 平均する本数)
+WMA = register(Indicator(
+    name="wma",
+    inputs=lambda params: [],
+    compute=compute_wma,
+    lookback=lambda params: max([average - 1 for average in params["averages"]], default=0),
+))
+
+# 一目均衡表 (遅行スパンは未来の終値を使う)
+ICHIMOKU = register(Indicator(
+    name="ichimoku",
+    inputs=lambda params: ICHIMOKU_INPUTS,
+    compute=compute_ichimoku,
+    lookback=lambda params: max(KIJUN_PERIOD, SENKOU_SPAN_2_PERIOD) + SENKOU_SHIFT - 1,
+    lookahead=lambda params: SENKOU_SHIFT,
+))
+
+# ボリンジャーバンド (period: 期間、deviation: 標準偏差の倍率)
+BOLLINGER = register(Indicator(
+    name="bollinger",
+    inputs=lambda params: [("rolling_mean", "close", params["period"]), ("rolling_std", "close", params["period"])],
+    compute=compute_bollinger,
+    lookback=lambda params: params["period"] - 1,
+))
+
+# ATR (period: 期間)
+ATR = register(Indicator(
+    name="atr",
+    inputs=lambda params: [("rolling_mean", "true_range", params["period"])],
+    compute=compute_atr,
+    # MEMO: 真の値幅は前日の終値を使うため1本多く必要
+    lookback=lambda params: params["period"],
+))
+
+# 追加のインジケータの引数の既定値
+DEFAULT_PARAMS = {
+    "ema": {"averages": [12, 26]},
+    "wma": {"averages": [20]},
+    "bollinger": {"period": 20, "deviation": 2.0},
+    "atr": {"period": 14},
+}
+
+
+def build_selections(sma, enable_ichimoku, enable_zigzag, indicators=None) -> list[dict[str, Any]]:
+    """コマンドの引数と設定値から評価するインジケータを選択する
+
+    Args:
+        sma (list[int]): SMAの数値
+        enable_ichimoku (bool): 一目均衡表の可否
+        enable_zigzag (bool): ジグザグの可否
+        indicators (list[dict[str, Any]] | None): 追加のインジケータ ("name"にインジケータ名、それ以外は引数)
+
+    Returns:
+        list[dict[str, Any]]: 評価するインジケータ (評価順)
+    """
+    selections = []
+    if enable_zigzag:
+        selections.append({"name": "zigzag"})
+    selections.append({"name": "sma", "averages": [int(average) for average in (sma if sma is not None else [])]})
+    if enable_ichimoku:
+        selections.append({"name": "ichimoku"})
+    for indicator in (indicators if indicators is not None else []):
+        selections.append({**DEFAULT_PARAMS.get(indicator.get("name"), {}), **indicator})
+    return selections
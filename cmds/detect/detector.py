@@ -2,7 +2,17 @@
 """
 
 from pathlib import Path
+from functools import partial
+from common.batch import run_files, print_summary
+from common.origin import ORIGIN_DOWN_COLUMNS, ORIGIN_UP_COLUMNS, mark_origins
+from common.resistance import calc_resistance_areas, detect_resistance_points
+from common.timeframe import TIMEFRAMES, TIMEFRAME_LENGTHS, merge_higher_timeframe
+from common.writer import write_dataframe
+from common.profiler import Profiler, collect_records, print_profile, profile_hottest, write_profile
+from common.schema import PIVOT_BAR_COLUMN, PIVOT_INDEX_SUFFIX, PIVOT_SUFFIX, expand_frame, is_pivot_file, pivot_index_path, pivot_path
+from common.store import STORE_EXT, locate_store, read_store, read_store_rows
 import common.graph as g
+import numpy as np
 import pandas as pd
 import re
 import logging
@@ -10,6 +20,9 @@ from itertools import chain
 
 logger = logging.getLogger("detector")
 
+# 入力ファイルの検索パターン (フォルダ指定時)
+INPUT_PATTERNS = ["*.json", "*.jsonl", "*.csv", "*.json.gz", "*.jsonl.gz", "*.csv.gz", "*.parquet", "*.feather", "*.arrow"]
+
 
 class Detector:
     """検出クラス
@@ -31,12 +44,27 @@ class Detector:
         output_path = args.output if args.output != None else self.config["detect"]["output"]
         # 出力ファイルの拡張子取得
         output_ext = args.ext if args.ext != None else self.config["detect"]["ext"]
+        # 出力ファイルのgzip圧縮の可否取得
+        output_compress = args.gzip if args.gzip else bool(self.config["detect"].get("gzip", False))
         # グラフ表示の可否取得
         show_graph = args.show_graph if args.show_graph else bool(self.config["detect"]["show_graph"])
         # 抵抗帯判定用ウインドウサイズの取得
         window_size = args.window if args.window != None else self.config["detect"]["window"]
         # 抵抗帯判定用の閾値取得
         threshold = args.threshold if args.threshold != None else self.config["detect"]["threshold"]
+        # 並列実行するプロセス数の取得
+        jobs = args.jobs if args.jobs != None else int(self.config["detect"].get("jobs", 1))
+        # 抵抗帯を結合する上位足の取得 (未指定の場合は結合しない)
+        confluence = args.confluence if args.confluence != None else list(self.config["detect"].get("confluence", []))
+        # 検出する範囲の取得 (未指定の場合は全て検出する)
+        start = args.start if args.start != None else (self.config["detect"].get("start") or None)
+        end = args.end if args.end != None else (self.config["detect"].get("end") or None)
+        # ピボットインデックスを使用してジグザグの前後だけを読み込むかの取得
+        use_pivot_index = args.pivot_index if args.pivot_index else bool(self.config["detect"].get("pivot_index", False))
+        # 段階ごとの計測の可否取得
+        profile = args.profile
+        # メモリ使用量の計測の可否取得
+        profile_memory = args.profile_memory
 
         if window_size < 0:
             logger.error(f"invalid window size: {window_size}")
@@ -44,157 +72,413 @@ class Detector:
         if threshold <= 0.0 or 1.0 < threshold:
             logger.error(f"invalid threshold: {threshold}")
             return
+        if jobs < 1:
+            logger.error(f"invalid jobs: {jobs}")
+            return
+        for timeframe in confluence:
+            if timeframe not in TIMEFRAMES:
+                logger.error(f"invalid timeframe: {timeframe}")
+                return
+        if use_pivot_index:
+            # MEMO: ジグザグの前後のローソク足だけを読み込むため、全てのローソク足を使う処理とは併用できない
+            if 0 < len(confluence):
+                logger.error("pivot index mode cannot be combined with confluence")
+                return
+            if show_graph:
+                logger.warning("graph display is disabled in pivot index mode")
+                show_graph = False
+        if 1 < jobs and show_graph:
+            # グラフはプロセスごとに表示できないため並列実行時は表示しない
+            logger.warning("graph display is disabled in parallel mode")
+            show_graph = False
 
-        # ファイル直接指定かフォルダ指定かチェックする
-        if input_path.is_file():
-            # ファイルが直接指定された場合
-            file_list = [input_path]
-        else:
-            # フォルダが指定された場合
-            file_list_json = [file for file in input_path.glob(
-                "*.json") if file.is_file()]
-            file_list_csv = [file for file in input_path.glob(
-                "*.csv") if file.is_file()]
-            file_list = chain(file_list_json, file_list_csv)
+        # 入力ファイルの一覧
+        file_list = find_results(input_path)
 
         # 抵抗帯名の一覧
         candidate_resistance_band_names = self.config["detect"]["candidate_resistance_band_names"]
 
-        # 入力ファイル(.csv.json)の読み込み
-        for file in file_list:
-            df = pd.DataFrame()
-            if file.suffix == ".json":
-                df = pd.read_json(file)
-            elif file.suffix == ".csv":
-                df = pd.read_csv(file)
-
-            # 抵抗帯名を収集する
-            target_resistance_band_names = []
-            for column in df.columns:
-                for candidate_resistance_band_name in candidate_resistance_band_names:
-                    if re.match(candidate_resistance_band_name, column):
-                        target_resistance_band_names.append(column)
-
-            # ジグザグのマーク化された箇所を収集する
-            zigzag_indices = df.index[df['zigzag']].tolist() if 'zigzag' in df.columns else []
-
-            # 抵抗帯ポイント列の初期化
-            df['resistance-point'] = False
-
-            # 抵抗帯として認識されたインジケータを検出する
-            # ジグザグマークの箇所をループ
-            for zigzag_idx in zigzag_indices:
-
-                # 抵抗帯ごとにループ
-                for target_resistance_band_name in target_resistance_band_names:
-
-                    found = False
-
-                    over_area = 0   # 抵抗帯より上の実体面積
-                    under_area = 0  # 抵抗帯より下の実体面積
-                    over_count = 0  # 抵抗帯より実体が上にある数
-                    under_count = 0  # 抵抗帯より実体が下にある数
-                    count_overlap = 0  # 高値から安値の間で抵抗帯が存在しているローソク足の数
-
-                    inspect_start = max(0, zigzag_idx - window_size)
-                    inspect_end = min(len(df), zigzag_idx + window_size + 1)
-                    inspect_rows = df.iloc[inspect_start:inspect_end]
-
-                    for _, inspect_row in inspect_rows.iterrows():
-                        resistant_band_price = inspect_row[target_resistance_band_name]
-                        if pd.isna(resistant_band_price):
-                            continue
-
-                        high_price = inspect_row['high']
-                        low_price = inspect_row['low']
-                        if low_price <= resistant_band_price and resistant_band_price <= high_price:
-                            # 高値から安値の間で抵抗帯が含まれている場合
-                            count_overlap += 1
-
-                        open_price = inspect_row['open']
-                        close_price = inspect_row['close']
-                        max_body = max(open_price, close_price)
-                        min_body = min(open_price, close_price)
-
-                        if min_body <= resistant_band_price and resistant_band_price <= max_body:
-                            # 実体の中に抵抗帯が存在している場合 (実体の一部を合算)
-                            over_area += (max_body - resistant_band_price)
-                            under_area += (resistant_band_price - min_body)
-                        elif max_body < resistant_band_price:
-                            # 抵抗帯より下に実体がある (実体を全て合算)
-                            under_area += (max_body - min_body)
-                            under_count += 1
-                        elif resistant_band_price < min_body:
-                            # 抵抗帯より上に実体がある (実体を全て合算)
-                            over_area += (max_body - min_body)
-                            over_count += 1
-
-                    all_area = over_area + under_area
-                    if all_area == 0.0:
-                        # 面積がない場合 (クロスの場合)
-                        continue
-
-                    zigzag_kind = df.loc[zigzag_idx, "zigzag-kind"]
-                    if zigzag_kind == "peak" and threshold <= (under_area / all_area) and 1 <= count_overlap and 0 == over_count:
-                        # 上に抵抗帯があり、抵抗帯より下に実体が多く存在している場合
-                        found = True
-                    elif zigzag_kind == "bottom" and threshold <= (over_area / all_area) and 1 <= count_overlap and 0 == under_count:
-                        # 下に抵抗帯があり、抵抗帯より上に実体が多く存在している場合
-                        found = True
-
-                    if found:
-                        # dataframeに抵抗帯をマーク
-                        df.loc[zigzag_idx, 'resistance-point'] = True
-                        df.loc[zigzag_idx, f'resistance-point-{target_resistance_band_name}'] = df.loc[zigzag_idx, target_resistance_band_name]
-
-            lastPeak = None
-            lastBottom = None
-            # 高値・安値更新が行われたジグザグの起点を検出する
-            for zigzag_idx in zigzag_indices:
-                row = df.iloc[zigzag_idx]
-                kind = row['zigzag-kind']
-                if kind == "peak":
-                    bodyMax = max(row['open'], row['close'])
-                    if lastPeak is not None:
-                        lastPeakBodyMax = max(df.loc[lastPeak, 'open'], df.loc[lastPeak, 'close'])
-                        if lastPeakBodyMax < bodyMax and lastBottom is not None:
-                            df.loc[lastBottom, "origin-up"] = min(df.loc[lastBottom, "open"], df.loc[lastBottom, "close"])
-                            # 前回高値と今の高値の比率を求める
-                            origin = min(df.loc[lastBottom, 'open'], df.loc[lastBottom, 'close'])
-                            pre = max(df.loc[lastPeak, 'open'], df.loc[lastPeak, 'close'])
-                            dist = (bodyMax - origin)
-                            update_rate = dist / (pre - origin)
-                            df.loc[lastBottom, "origin-up-rate"] = update_rate
-                            df.loc[lastBottom, "origin-up-dist"] = dist
-
-                    lastPeak = zigzag_idx
-                elif kind == "bottom":
-                    bodyMin = min(row['open'], row['close'])
-                    if lastBottom is not None:
-                        lastBottomBodyMin = min(df.loc[lastBottom, 'open'], df.loc[lastBottom, 'close'])
-                        if bodyMin < lastBottomBodyMin and lastPeak is not None:
-                            df.loc[lastPeak, "origin-down"] = max(df.loc[lastPeak, "open"], df.loc[lastPeak, "close"])
-                            # 前回高値と今の高値の比率を求める
-                            origin = max(df.loc[lastPeak, 'open'], df.loc[lastPeak, 'close'])
-                            pre = min(df.loc[lastBottom, 'open'], df.loc[lastBottom, 'close'])
-                            dist = origin - bodyMin
-                            update_rate = dist / (origin - pre)
-                            df.loc[lastPeak, "origin-down-rate"] = update_rate
-                            df.loc[lastPeak, "origin-down-dist"] = dist
-                    lastBottom = zigzag_idx
+        # 入力ファイル(.json.jsonl.csv.parquet.feather.arrow)の読み込み
+        detect = partial(self.detect_file, output_path=output_path, output_ext=output_ext,
+                         output_compress=output_compress, show_graph=show_graph,
+                         window_size=window_size, threshold=threshold,
+                         candidate_resistance_band_names=candidate_resistance_band_names, confluence=confluence,
+                         start=start, end=end, use_pivot_index=use_pivot_index, profile=profile, profile_memory=profile_memory, profile_stats=args.profile_stats)
+        results = run_files(partial(profile_hottest, detect, args.profile_stats, output_path) if profile else detect, file_list, jobs)
+        if not input_path.is_file():
+            print_summary("detect", results)
+
+        if profile:
+            records = collect_records(results)
+            print_profile("detect", records)
+            if args.profile_output:
+                write_profile(args.profile_output, "detect", records)
+
+    def detect_file(self, file, output_path, output_ext, output_compress, show_graph, window_size, threshold, candidate_resistance_band_names,
+                    confluence, start, end, use_pivot_index, profile, profile_memory, profile_stats, profile_target=None):
+        """1ファイルの検出処理
+
+        Args:
+            file (Path): 入力ファイルのパス
+            output_path (str): 出力ファイルのパス
+            output_ext (str): 出力ファイルの拡張子
+            output_compress (bool): 出力ファイルのgzip圧縮の可否
+            show_graph (bool): グラフ表示の可否
+            window_size (int): 抵抗帯判定に使用するウインドウの幅
+            threshold (float): 抵抗帯面積率の閾値
+            candidate_resistance_band_names (list[str]): 抵抗帯名の候補 (正規表現)
+            confluence (list[str]): 抵抗帯を結合する上位足の時間足
+            start (str | None): 検出する範囲の開始日時 (Noneの場合は先頭から)
+            end (str | None): 検出する範囲の終了日時 (Noneの場合は末尾まで)
+            use_pivot_index (bool): ピボットインデックスを使用してジグザグの前後だけを読み込むかの可否
+                (ジグザグの点ごとの検出結果を"入力ファイル名.pivotindex"に出力する)
+            profile (bool): 段階ごとの計測の可否
+            profile_memory (bool): 段階ごとのメモリ使用量の計測の可否
+            profile_stats (str | None): cProfileの結果を出力するフォルダのパス
+            profile_target (tuple[str, str] | None): cProfileで計測する段階 (計測対象の名前, 段階の名前)
+
+        Returns:
+            list[dict[str, Any]] | None: 段階ごとの計測結果 (計測しない場合はNone)
+        """
+        profiler = Profiler(profile, file.name, profile_stats, profile_memory, profile_target)
+        # gzip圧縮されたファイルは圧縮前の拡張子で出力ファイル名を決める
+        stem = Path(file.stem) if file.suffix == ".gz" else file
+
+        if use_pivot_index:
+            points = detect_pivot_index(file, window_size, threshold, candidate_resistance_band_names, start, end, profiler)
+            if output_path:
+                with profiler.stage("write"):
+                    write_dataframe(points, output_path, f"{stem.stem}{PIVOT_INDEX_SUFFIX}", output_ext, output_compress)
+            return profiler.finish()
 
-            if show_graph:
-                g.show(df, title=file.name)
+        with profiler.stage("read"):
+            # MEMO: コンパクト形式の場合はピボット表を展開せずに判定する
+            df, pivots = read_compact_result(file, start, end)
+        if 0 < len(confluence):
+            # 上位足の抵抗帯を結合して同じ判定を行う
+            with profiler.stage("confluence"):
+                join_higher_timeframes(df, file, confluence, candidate_resistance_band_names)
+        detect(df, window_size, threshold, candidate_resistance_band_names, profiler, pivots)
 
-            if output_path:
-                data = []
-                if output_ext == "json":
-                    data = df.to_json(orient="records",
-                                      date_format="iso", date_unit="s", indent=4)
-                elif output_ext == "csv":
-                    data = df.to_csv(index=True, index_label="index")
-                output_full_path = Path(output_path) / Path(file.stem + f".{output_ext}")
-                output_full_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(output_full_path, mode='w') as f:
-                    # 抽出結果の出力
-                    f.write(data)
+        if show_graph:
+            g.show(df if pivots is None else expand_frame(df, pivots), title=file.name)
+
+        if output_path:
+            with profiler.stage("write"):
+                write_dataframe(df, output_path, stem.stem, output_ext, output_compress)
+                if pivots is not None:
+                    # 入力と同じコンパクト形式で出力する
+                    write_dataframe(pivots, output_path, f"{stem.stem}{PIVOT_SUFFIX}", output_ext, output_compress)
+
+        return profiler.finish()
+
+
+def find_results(input_path: Path) -> list[Path]:
+    """抽出・検出結果のファイルの一覧を取得する
+
+    フォルダが指定された場合はINPUT_PATTERNSの順に検索する (コンパクト形式のピボット表は含めない)
+
+    Args:
+        input_path (Path): 入力ファイルのパス (ファイルまたはフォルダ)
+
+    Returns:
+        list[Path]: 入力ファイルのパス
+    """
+    # ファイル直接指定かフォルダ指定かチェックする
+    if input_path.is_file():
+        # ファイルが直接指定された場合
+        return [input_path]
+    # フォルダが指定された場合
+    return list(chain.from_iterable(
+        sorted([file for file in input_path.glob(pattern) if file.is_file() and not is_pivot_file(file)]) for pattern in INPUT_PATTERNS))
+
+
+def read_result(file: Path, start=None, end=None) -> pd.DataFrame:
+    """抽出処理の出力ファイルを読み込む
+
+    コンパクト形式で出力されたファイル(ピボット表のファイルがある場合)は通常形式に展開する
+
+    Args:
+        file (Path): 入力ファイルのパス (json,jsonl,csv,parquet,feather,arrowとそれらのgzip圧縮)
+        start (str | datetime | None): 読み込む範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 読み込む範囲の終了日時 (Noneの場合は末尾まで)
+
+    Returns:
+        DataFrame: インジケータが書き込まれたデータフレーム
+    """
+    df, pivots = read_compact_result(file, start, end)
+    return df if pivots is None else expand_frame(df, pivots)
+
+
+def read_compact_result(file: Path, start=None, end=None) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    """抽出処理の出力ファイルを形式を変えずに読み込む
+
+    範囲を指定した場合、行番号(ジグザグの起点とピボット表のローソク足の位置)は読み込んだ範囲の先頭を0とした行番号に変換する
+    (起点が範囲より前の場合は負の値になる)
+
+    Args:
+        file (Path): 入力ファイルのパス (json,jsonl,csv,parquet,feather,arrowとそれらのgzip圧縮)
+        start (str | datetime | None): 読み込む範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 読み込む範囲の終了日時 (Noneの場合は末尾まで)
+
+    Returns:
+        tuple[DataFrame, DataFrame | None]: インジケータが書き込まれたデータフレームとピボット表
+            (通常形式の場合はNone)
+    """
+    df, first = read_frame_range(file, start, end)
+    if 0 < first and 'zigzag-from' in df.columns:
+        df['zigzag-from'] = df['zigzag-from'] - first
+    pivots_file = pivot_path(file)
+    if not pivots_file.is_file():
+        return df, None
+    # MEMO: csvは行番号の列が出力されるため取り除く
+    pivots = read_frame(pivots_file).drop(columns=["index"], errors="ignore").sort_values(PIVOT_BAR_COLUMN, ignore_index=True)
+    if start is not None or end is not None:
+        bars = pivots[PIVOT_BAR_COLUMN]
+        pivots = pivots[(first <= bars) & (bars < first + len(df))].reset_index(drop=True)
+        for column in [PIVOT_BAR_COLUMN, 'zigzag-from']:
+            if column in pivots.columns:
+                pivots[column] = pivots[column] - first
+    return df, pivots
+
+
+def read_frame_range(file: Path, start=None, end=None) -> tuple[pd.DataFrame, int]:
+    """日時の範囲を指定してデータフレームを読み込む
+
+    ストア(arrow)はメモリマップで範囲を含むレコードバッチだけを読み込む。
+    それ以外の形式は全て読み込んでから範囲を切り出す。
+
+    Args:
+        file (Path): 入力ファイルのパス (json,jsonl,csv,parquet,feather,arrowとそれらのgzip圧縮)
+        start (str | datetime | None): 読み込む範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 読み込む範囲の終了日時 (Noneの場合は末尾まで、終了日時を含む)
+
+    Returns:
+        tuple[DataFrame, int]: 範囲内のデータフレーム(インデックスは0から)と先頭の行のファイル内の行番号
+    """
+    if start is None and end is None:
+        return read_frame(file), 0
+    if file.suffix == f".{STORE_EXT}":
+        return read_store(file, start, end)
+
+    df = read_frame(file)
+    # 日時は昇順に並んでいるため二分探索で範囲を切り出す
+    index = pd.DatetimeIndex(pd.to_datetime(df['datetime']))
+    first = 0 if start is None else int(index.searchsorted(pd.Timestamp(start), side="left"))
+    last = len(index) if end is None else int(index.searchsorted(pd.Timestamp(end), side="right"))
+    return df.iloc[first:max(first, last)].reset_index(drop=True), first
+
+
+def read_frame(file: Path) -> pd.DataFrame:
+    """ファイルの拡張子から形式を判定してデータフレームを読み込む
+
+    Args:
+        file (Path): 入力ファイルのパス (json,jsonl,csv,parquet,feather,arrowとそれらのgzip圧縮)
+
+    Returns:
+        DataFrame: 読み込んだデータフレーム
+    """
+    # gzip圧縮されたファイルは圧縮前の拡張子で形式を判定する (展開はpandasが行う)
+    suffix = Path(file.stem).suffix if file.suffix == ".gz" else file.suffix
+
+    df = pd.DataFrame()
+    if suffix == ".json":
+        df = pd.read_json(file)
+    elif suffix == ".jsonl":
+        df = pd.read_json(file, lines=True)
+    elif suffix == ".csv":
+        df = pd.read_csv(file)
+    elif suffix == ".parquet":
+        df = pd.read_parquet(file)
+    elif suffix == ".feather":
+        df = pd.read_feather(file)
+    elif suffix == f".{STORE_EXT}":
+        df, _ = read_store(file)
+    return df
+
+
+def detect_pivot_index(file: Path, window_size, threshold, candidate_resistance_band_names, start=None, end=None,
+                       profiler: Profiler | None = None) -> pd.DataFrame:
+    """ピボットインデックスを使用してジグザグの点ごとに抵抗帯の情報を検出する
+
+    ストア(arrow)からジグザグの前後window_size本のローソク足だけを読み込んで判定するため、
+    ジグザグがまばらな長いローソク足でもファイル全体を読み込まない。
+    判定結果は全て読み込んで検出した場合(detect)のジグザグの行と一致する。
+
+    Args:
+        file (Path): 入力ファイルのパス (arrow、同じフォルダに"入力ファイル名.pivotindex.arrow"があること)
+        window_size (int): 抵抗帯判定に使用するウインドウの幅
+        threshold (float): 抵抗帯面積率の閾値
+        candidate_resistance_band_names (list[str]): 抵抗帯名の候補 (正規表現)
+        start (str | datetime | None): 検出する範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 検出する範囲の終了日時 (Noneの場合は末尾まで)
+        profiler (Profiler | None): 段階ごとの計測クラス (Noneの場合は計測しない)
+
+    Returns:
+        DataFrame: ピボットインデックスに抵抗帯と起点の列を追加したデータフレーム
+            (ローソク足のインデックス番号はストア全体の行番号)
+
+    Raises:
+        ValueError: 入力ファイルがストアでない場合、またはピボットインデックスがない場合
+    """
+    profiler = profiler if profiler is not None else Profiler()
+    index_file = pivot_index_path(file)
+    if file.suffix != f".{STORE_EXT}" or not index_file.is_file():
+        raise ValueError(f"pivot index not found: {file.name}")
+
+    with profiler.stage("read"):
+        index, _ = read_store(index_file)
+        first, last = locate_store(file, start, end)
+        bars = index[PIVOT_BAR_COLUMN].to_numpy(dtype=np.int64)
+        index = index[(first <= bars) & (bars < last)].reset_index(drop=True)
+        bars = index[PIVOT_BAR_COLUMN].to_numpy(dtype=np.int64)
+        # ジグザグの前後のローソク足の行番号 (範囲外は読み込まない)
+        rows = (bars[:, np.newaxis] + np.arange(-window_size, window_size + 1)).ravel()
+        rows = np.unique(rows[(first <= rows) & (rows < last)])
+        df = read_store_rows(file, rows)
+
+    # MEMO: 各ジグザグのウインドウの行は連続して読み込まれ、範囲外は寄与なしで埋められるため、
+    #       読み込んだ行の中の位置で判定しても全て読み込んだ場合と同じ結果になる
+    positions = np.searchsorted(rows, bars)
+    pivots = pd.DataFrame({PIVOT_BAR_COLUMN: positions, 'zigzag-kind': index['zigzag-kind']})
+    detect(df, window_size, threshold, candidate_resistance_band_names, profiler, pivots)
+
+    columns = [column for column in df.columns if column.startswith("resistance-point") or column in ORIGIN_UP_COLUMNS + ORIGIN_DOWN_COLUMNS]
+    points = df[columns].iloc[positions].reset_index(drop=True)
+    return pd.concat([index, points], axis=1)
+
+
+def join_higher_timeframes(df: pd.DataFrame, file: Path, timeframes: list[str], candidate_resistance_band_names) -> pd.DataFrame:
+    """上位足の抵抗帯をデータフレームに結合する
+
+    上位足のファイルは入力ファイルと同じフォルダの"銘柄名_時間足"のファイル
+    (analyzeの時間足変換の出力)を使用する。入力ファイル以下の時間足は結合しない。
+
+    Args:
+        df (DataFrame): インジケータが書き込まれたデータフレーム
+        file (Path): 入力ファイルのパス ("銘柄名_時間足"の形式)
+        timeframes (list[str]): 結合する上位足の時間足
+        candidate_resistance_band_names (list[str]): 抵抗帯名の候補 (正規表現)
+
+    Returns:
+        DataFrame: 上位足の抵抗帯("抵抗帯名@時間足")が結合されたデータフレーム
+    """
+    stem = Path(Path(file.stem).stem if file.suffix == ".gz" else file.stem)
+    symbol, _, own_timeframe = stem.name.rpartition("_")
+    if own_timeframe not in TIMEFRAMES:
+        raise ValueError(f"timeframe not found in file name: {file.name}")
+
+    for timeframe in timeframes:
+        if TIMEFRAME_LENGTHS[timeframe] <= TIMEFRAME_LENGTHS[own_timeframe]:
+            continue
+        # 対応する上位足のファイルを探す
+        candidates = [file.parent / f"{symbol}_{timeframe}{pattern[1:]}" for pattern in INPUT_PATTERNS]
+        higher_files = [candidate for candidate in candidates if candidate.is_file()]
+        if len(higher_files) == 0:
+            logger.warning(f"higher timeframe file not found: {symbol}_{timeframe} ({file.name})")
+            continue
+
+        higher = read_result(higher_files[0])
+        # MEMO: 上位足に結合済みの抵抗帯は結合しない
+        band_names = [name for name in dict.fromkeys(collect_band_names(higher, candidate_resistance_band_names)) if "@" not in name]
+        merge_higher_timeframe(df, higher, timeframe, band_names)
+    return df
+
+
+def collect_band_names(df: pd.DataFrame, candidate_resistance_band_names) -> list[str]:
+    """候補に一致する抵抗帯名を収集する
+
+    Args:
+        df (DataFrame): インジケータが書き込まれたデータフレーム
+        candidate_resistance_band_names (list[str]): 抵抗帯名の候補 (正規表現)
+
+    Returns:
+        list[str]: 抵抗帯名 (候補に一致した順、重複あり)
+    """
+    target_resistance_band_names = []
+    for column in df.columns:
+        # 上位足の抵抗帯("抵抗帯名@時間足")は抵抗帯名で判定する
+        band_name = column.split("@")[0]
+        for candidate_resistance_band_name in candidate_resistance_band_names:
+            if re.match(candidate_resistance_band_name, band_name):
+                target_resistance_band_names.append(column)
+    return target_resistance_band_names
+
+
+def detect(df: pd.DataFrame, window_size, threshold, candidate_resistance_band_names, profiler: Profiler | None = None,
+           pivots: pd.DataFrame | None = None) -> pd.DataFrame:
+    """抵抗帯の情報を検出してデータフレームに書き込む
+
+    Args:
+        df (DataFrame): インジケータが書き込まれたデータフレーム
+        window_size (int): 抵抗帯判定に使用するウインドウの幅
+        threshold (float): 抵抗帯面積率の閾値
+        candidate_resistance_band_names (list[str]): 抵抗帯名の候補 (正規表現)
+        profiler (Profiler | None): 段階ごとの計測クラス (Noneの場合は計測しない)
+        pivots (DataFrame | None): コンパクト形式のピボット表 (Noneの場合はデータフレームのジグザグの列を使用する)
+
+    Returns:
+        DataFrame: 抵抗帯の情報が書き込まれたデータフレーム
+    """
+    profiler = profiler if profiler is not None else Profiler()
+    # 抵抗帯名を収集する
+    target_resistance_band_names = collect_band_names(df, candidate_resistance_band_names)
+
+    # ジグザグのマーク化された箇所を収集する
+    if pivots is None:
+        zigzag_indices = df.index[df['zigzag']].tolist() if 'zigzag' in df.columns else []
+        zigzag_kinds = df['zigzag-kind'].to_numpy(dtype=object)[zigzag_indices] if 0 < len(zigzag_indices) else np.empty(0, dtype=object)
+    else:
+        zigzag_indices = pivots[PIVOT_BAR_COLUMN].tolist()
+        zigzag_kinds = pivots['zigzag-kind'].to_numpy(dtype=object)
+
+    # 抵抗帯ポイント列の初期化
+    df['resistance-point'] = False
+
+    # 抵抗帯として認識されたインジケータを検出する
+    # MEMO: 複数の候補に一致した抵抗帯は1度だけ判定する
+    band_names = list(dict.fromkeys(target_resistance_band_names))
+    if 0 < len(zigzag_indices) and 0 < len(band_names):
+        with profiler.stage("bands"):
+            mark_resistance_points(df, band_names, zigzag_indices, zigzag_kinds, window_size, threshold)
+
+    # 高値・安値更新が行われたジグザグの起点を検出する
+    with profiler.stage("origins"):
+        mark_origins(df, zigzag_indices, zigzag_kinds)
+
+    return df
+
+
+def mark_resistance_points(df: pd.DataFrame, band_names: list[str], zigzag_indices: list[int], zigzag_kinds: np.ndarray, window_size, threshold) -> pd.DataFrame:
+    """抵抗帯で反発したジグザグをデータフレームに書き込む
+
+    Args:
+        df (DataFrame): インジケータが書き込まれたデータフレーム
+        band_names (list[str]): 抵抗帯名
+        zigzag_indices (list[int]): ジグザグのインデックス番号
+        zigzag_kinds (ndarray): ジグザグの種類 (peak, bottom)
+        window_size (int): 抵抗帯判定に使用するウインドウの幅
+        threshold (float): 抵抗帯面積率の閾値
+
+    Returns:
+        DataFrame: 抵抗帯の情報が書き込まれたデータフレーム
+    """
+    # 全てのジグザグと抵抗帯の組み合わせの面積を一括で計算する
+    areas = calc_resistance_areas(df, band_names, zigzag_indices, window_size)
+    found = detect_resistance_points(areas, zigzag_kinds, threshold)
+
+    # dataframeに抵抗帯をマーク
+    indices = np.asarray(zigzag_indices)
+    df.loc[indices[found.any(axis=1)], 'resistance-point'] = True
+    # 抵抗帯ポイント列は検出された順に生成する
+    columns = {}
+    for band in dict.fromkeys(np.nonzero(found)[1].tolist()):
+        band_name = band_names[band]
+        prices = df[band_name].to_numpy(dtype=float)
+        column = np.full(len(df), np.nan)
+        hit = indices[found[:, band]]
+        column[hit] = prices[hit]
+        columns[f'resistance-point-{band_name}'] = column
+    if 0 < len(columns):
+        df[list(columns)] = pd.DataFrame(columns, index=df.index)
+    return df
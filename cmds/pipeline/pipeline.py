@@ -0,0 +1,160 @@
+"""パイプラインモジュール
+"""
+
+from pathlib import Path
+from functools import partial
+from common.batch import run_files, print_summary
+from common.writer import write_dataframe
+from common.loader import load_candles
+from common.profiler import Profiler, collect_records, print_profile, profile_hottest, write_profile
+from common.indicator import plan
+from cmds.analyze.analyzer import analyze
+from cmds.analyze.indicators import build_selections
+from cmds.detect.detector import detect
+import common.graph as g
+import logging
+
+logger = logging.getLogger("pipeline")
+
+
+class Pipeline:
+    """パイプラインクラス
+
+    抽出処理と検出処理を中間ファイルを介さずに1プロセス内で連続して実行する
+
+    Attributes:
+        config (dict[str,Any]): 設定情報が格納された辞書データ
+    """
+
+    def __init__(self, config):
+        """コンストラクタ
+
+        Args:
+            config (dict[str,Any]): 設定情報が格納された辞書データ
+        """
+        self.config = config
+
+    def main(self, args):
+        """メイン処理
+
+        抽出処理と検出処理を実行して最終結果のみを出力する
+        インジケータの設定はanalyze、抵抗帯の設定はdetectの設定値を使用する
+        """
+
+        # 入力ファイルパスの取得
+        input_path = Path(args.input) if args.input != None else Path(self.config["pipeline"]["input"])
+        # 入力ファイルのキャッシュフォルダの取得 (未指定の場合はキャッシュしない)
+        cache_dir = args.cache if args.cache != None else (self.config["pipeline"].get("cache") or None)
+        # 出力ファイルパスの取得
+        output_path = args.output if args.output != None else self.config["pipeline"]["output"]
+        # 出力ファイルの拡張子取得
+        output_ext = args.ext if args.ext != None else self.config["pipeline"]["ext"]
+        # 出力ファイルのgzip圧縮の可否取得
+        output_compress = args.gzip if args.gzip else bool(self.config["pipeline"].get("gzip", False))
+        # グラフ表示の可否取得
+        show_graph = args.show_graph if args.show_graph else bool(self.config["pipeline"]["show_graph"])
+        # 並列実行するプロセス数の取得
+        jobs = args.jobs if args.jobs != None else int(self.config["pipeline"].get("jobs", 1))
+        # SMAの数値取得
+        sma = args.sma if args.sma != None else self.config["analyze"]["sma"]
+        # 一目均衡表の可否取得
+        enable_ichimoku = args.ichimoku if args.ichimoku else bool(self.config["analyze"]["ichimoku"])
+        # ジグザグの可否取得
+        enable_zigzag = args.zigzag if args.zigzag else bool(self.config["analyze"]["zigzag"])
+        # 抵抗帯判定用ウインドウサイズの取得
+        window_size = args.window if args.window != None else self.config["detect"]["window"]
+        # 抵抗帯判定用の閾値取得
+        threshold = args.threshold if args.threshold != None else self.config["detect"]["threshold"]
+        # 抵抗帯名の一覧
+        candidate_resistance_band_names = self.config["detect"]["candidate_resistance_band_names"]
+        # 追加のインジケータの取得 (設定ファイルのみ)
+        indicators = list(self.config["analyze"].get("indicators", []))
+        # 段階ごとの計測の可否取得
+        profile = args.profile
+        # メモリ使用量の計測の可否取得
+        profile_memory = args.profile_memory
+
+        if window_size < 0:
+            logger.error(f"invalid window size: {window_size}")
+            return
+        if threshold <= 0.0 or 1.0 < threshold:
+            logger.error(f"invalid threshold: {threshold}")
+            return
+        if jobs < 1:
+            logger.error(f"invalid jobs: {jobs}")
+            return
+        try:
+            plan(build_selections(sma, enable_ichimoku, enable_zigzag, indicators))
+        except ValueError as e:
+            logger.error(f"invalid indicator: {e}")
+            return
+        if 1 < jobs and show_graph:
+            # グラフはプロセスごとに表示できないため並列実行時は表示しない
+            logger.warning("graph display is disabled in parallel mode")
+            show_graph = False
+
+        # ファイル直接指定かフォルダ指定かチェックする
+        if input_path.is_file():
+            # ファイルが直接指定された場合
+            file_list = [input_path]
+        else:
+            # フォルダが指定された場合
+            file_list = sorted([file for file in input_path.glob("*.csv") if file.is_file()])
+
+        # 入力ファイル(.csv)の読み込み
+        run = partial(self.run_file, cache_dir=cache_dir, output_path=output_path, output_ext=output_ext,
+                      output_compress=output_compress, show_graph=show_graph,
+                      sma=sma, enable_ichimoku=enable_ichimoku, enable_zigzag=enable_zigzag, indicators=indicators,
+                      window_size=window_size, threshold=threshold,
+                      candidate_resistance_band_names=candidate_resistance_band_names,
+                      profile=profile, profile_memory=profile_memory, profile_stats=args.profile_stats)
+        results = run_files(partial(profile_hottest, run, args.profile_stats, output_path) if profile else run, file_list, jobs)
+        if not input_path.is_file():
+            print_summary("pipeline", results)
+
+        if profile:
+            records = collect_records(results)
+            print_profile("pipeline", records)
+            if args.profile_output:
+                write_profile(args.profile_output, "pipeline", records)
+
+    def run_file(self, file, cache_dir, output_path, output_ext, output_compress, show_graph, sma, enable_ichimoku, enable_zigzag, indicators,
+                 window_size, threshold, candidate_resistance_band_names, profile, profile_memory, profile_stats, profile_target=None):
+        """1ファイルのパイプライン処理
+
+        Args:
+            file (Path): 入力ファイルのパス
+            cache_dir (str | None): 入力ファイルのキャッシュフォルダのパス
+            output_path (str): 出力ファイルのパス
+            output_ext (str): 出力ファイルの拡張子
+            output_compress (bool): 出力ファイルのgzip圧縮の可否
+            show_graph (bool): グラフ表示の可否
+            sma (list[int]): SMAの数値
+            enable_ichimoku (bool): 一目均衡表の可否
+            enable_zigzag (bool): ジグザグの可否
+            indicators (list[dict[str, Any]]): 追加のインジケータ
+            window_size (int): 抵抗帯判定に使用するウインドウの幅
+            threshold (float): 抵抗帯面積率の閾値
+            candidate_resistance_band_names (list[str]): 抵抗帯名の候補 (正規表現)
+            profile (bool): 段階ごとの計測の可否
+            profile_memory (bool): 段階ごとのメモリ使用量の計測の可否
+            profile_stats (str | None): cProfileの結果を出力するフォルダのパス
+            profile_target (tuple[str, str] | None): cProfileで計測する段階 (計測対象の名前, 段階の名前)
+
+        Returns:
+            list[dict[str, Any]] | None: 段階ごとの計測結果 (計測しない場合はNone)
+        """
+        profiler = Profiler(profile, file.name, profile_stats, profile_memory, profile_target)
+        with profiler.stage("load"):
+            df = load_candles(file, cache_dir)
+        analyze(df, sma, enable_ichimoku, enable_zigzag, profiler, indicators)
+        detect(df, window_size, threshold, candidate_resistance_band_names, profiler)
+
+        if show_graph:
+            g.show(df, title=file.name)
+
+        if output_path:
+            with profiler.stage("write"):
+                write_dataframe(df, output_path, file.stem, output_ext, output_compress)
+
+        return profiler.finish()
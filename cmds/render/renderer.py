@@ -0,0 +1,103 @@
+"""描画モジュール
+"""
+
+from pathlib import Path
+from functools import partial
+from common.batch import run_files, print_summary
+from common.graph import DEFAULT_MAX_BARS, IMAGE_FORMATS, render
+from cmds.detect.detector import find_results, read_result
+import logging
+
+logger = logging.getLogger("renderer")
+
+
+class Renderer:
+    """描画クラス
+
+    抽出・検出結果のグラフをウインドウを開かずに画像ファイルに出力する
+
+    Attributes:
+        config (dict[str,Any]): 設定情報が格納された辞書データ
+    """
+
+    def __init__(self, config):
+        """コンストラクタ
+
+        Args:
+            config (dict[str,Any]): 設定情報が格納された辞書データ
+        """
+        self.config = config
+
+    def main(self, args):
+        """メイン処理
+
+        入力ファイルごとに画像を出力する (出力ファイル名は"入力ファイル名.形式"、分割時は"入力ファイル名_連番.形式")
+        """
+
+        # 入力ファイルパスの取得
+        input_path = Path(args.input) if args.input != None else Path(self.config["render"]["input"])
+        # 出力ファイルパスの取得
+        output_path = args.output if args.output != None else self.config["render"]["output"]
+        # 画像の形式取得
+        image_format = args.format if args.format != None else self.config["render"].get("format", "png")
+        # 1枚の画像に描画するローソク足の本数の取得 (0の場合は分割しない)
+        chunk = args.chunk if args.chunk != None else int(self.config["render"].get("chunk", 0))
+        # 画像の解像度の取得
+        dpi = args.dpi if args.dpi != None else int(self.config["render"].get("dpi", 100))
+        # 1枚の画像に描画するローソク足の最大本数の取得 (超える場合は間引く、0の場合は間引かない)
+        max_bars = args.max_bars if args.max_bars != None else int(self.config["render"].get("max_bars", DEFAULT_MAX_BARS))
+        # 描画する範囲の取得 (未指定の場合は全て描画する)
+        start = args.start if args.start != None else (self.config["render"].get("start") or None)
+        end = args.end if args.end != None else (self.config["render"].get("end") or None)
+        # 並列実行するプロセス数の取得
+        jobs = args.jobs if args.jobs != None else int(self.config["render"].get("jobs", 1))
+
+        if not output_path:
+            logger.error("output path is required")
+            return
+        if image_format not in IMAGE_FORMATS:
+            logger.error(f"invalid format: {image_format}")
+            return
+        if chunk < 0:
+            logger.error(f"invalid chunk: {chunk}")
+            return
+        if max_bars < 0:
+            logger.error(f"invalid max bars: {max_bars}")
+            return
+        if dpi < 1:
+            logger.error(f"invalid dpi: {dpi}")
+            return
+        if jobs < 1:
+            logger.error(f"invalid jobs: {jobs}")
+            return
+
+        # 入力ファイルの一覧
+        file_list = find_results(input_path)
+
+        run = partial(render_file, output_path=output_path, image_format=image_format, chunk=chunk, dpi=dpi,
+                      max_bars=max_bars, start=start, end=end)
+        results = run_files(run, file_list, jobs)
+        print_summary("render", results)
+
+
+def render_file(file: Path, output_path: str, image_format: str, chunk: int, dpi: int, max_bars: int, start, end) -> list[Path]:
+    """1ファイルの描画処理
+
+    Args:
+        file (Path): 入力ファイルのパス
+        output_path (str): 出力フォルダのパス
+        image_format (str): 画像の形式 (png, svg)
+        chunk (int): 1枚の画像に描画するローソク足の本数 (0の場合は分割しない)
+        dpi (int): 画像の解像度
+        max_bars (int): 1枚の画像に描画するローソク足の最大本数 (超える場合は間引く、0の場合は間引かない)
+        start (str | None): 描画する範囲の開始日時 (Noneの場合は先頭から)
+        end (str | None): 描画する範囲の終了日時 (Noneの場合は末尾まで)
+
+    Returns:
+        list[Path]: 出力した画像ファイルのパス
+    """
+    # gzip圧縮されたファイルは圧縮前の拡張子で出力ファイル名を決める
+    stem = Path(file.stem).stem if file.suffix == ".gz" else file.stem
+    # MEMO: ストア(arrow)は描画する範囲だけを読み込む
+    df = read_result(file, start, end)
+    return render(df, output_path, stem, image_format, chunk, dpi, max_bars)
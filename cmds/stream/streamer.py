@@ -0,0 +1,211 @@
+"""ストリーミングモジュール
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Iterable, Iterator
+from common.loader import CANDLE_COLUMNS, DATETIME_FORMATS
+from common.sma import StreamingSma
+from common.ichimoku import StreamingIchimoku
+from common.zigzag import StreamingZigzag
+import json
+import logging
+import math
+import socket
+import sys
+import time
+
+logger = logging.getLogger("streamer")
+
+
+class Streamer:
+    """ストリーミングクラス
+
+    標準入力、名前付きパイプまたはローカルのソケットからローソク足を1行ずつ受け取り、
+    バッチ処理をやり直さずにインジケータを1本ずつ計算して出力する
+
+    Attributes:
+        config (dict[str,Any]): 設定情報が格納された辞書データ
+    """
+
+    def __init__(self, config):
+        """コンストラクタ
+
+        Args:
+            config (dict[str,Any]): 設定情報が格納された辞書データ
+        """
+        self.config = config
+
+    def main(self, args):
+        """メイン処理
+
+        インジケータの設定はanalyzeの設定値を使用する
+        """
+
+        # 入力ファイルパスの取得 ("-"の場合は標準入力)
+        input_path = args.input if args.input != None else self.config["stream"].get("input", "-")
+        # 待ち受けるポート番号の取得 (0の場合はソケットを使用しない)
+        port = args.port if args.port != None else int(self.config["stream"].get("port", 0))
+        # 出力ファイルパスの取得 (未指定の場合は標準出力)
+        output_path = args.output if args.output != None else (self.config["stream"].get("output") or None)
+        # SMAの数値取得
+        sma = args.sma if args.sma != None else self.config["analyze"]["sma"]
+        # 一目均衡表の可否取得
+        enable_ichimoku = args.ichimoku if args.ichimoku else bool(self.config["analyze"]["ichimoku"])
+        # ジグザグの可否取得
+        enable_zigzag = args.zigzag if args.zigzag else bool(self.config["analyze"]["zigzag"])
+
+        if port < 0 or 65535 < port:
+            logger.error(f"invalid port: {port}")
+            return
+
+        with open_input(input_path, port) as lines, open_output(output_path) as f:
+            latencies = []
+            for record in stream(lines, sma, enable_ichimoku, enable_zigzag):
+                latencies.append(record["latency_us"])
+                f.write(json.dumps(record) + "\n")
+                # MEMO: 受信したローソク足ごとに結果を受け取れるように逐次フラッシュする
+                f.flush()
+
+        print_latency("stream", latencies)
+
+
+@contextmanager
+def open_input(input_path: str, port: int) -> Iterator[Iterable[str]]:
+    """ローソク足の入力元を開く
+
+    Args:
+        input_path (str): 入力ファイルのパス ("-"の場合は標準入力)
+        port (int): 待ち受けるポート番号 (0より大きい場合はローカルのソケットから入力する)
+
+    Yields:
+        Iterable[str]: 1行ずつのローソク足
+    """
+    if 0 < port:
+        # ローカルからの接続を1つだけ受け付ける
+        with socket.create_server(("127.0.0.1", port)) as server:
+            logger.info(f"waiting for connection: 127.0.0.1:{port}")
+            conn, _ = server.accept()
+            with conn, conn.makefile(mode='r', encoding='utf-8') as f:
+                yield f
+    elif input_path == "-":
+        yield sys.stdin
+    else:
+        # 名前付きパイプも通常のファイルと同様に読み込める
+        with open(input_path, mode='r', encoding='utf-8') as f:
+            yield f
+
+
+@contextmanager
+def open_output(output_path: str | None):
+    """計算結果の出力先を開く
+
+    Args:
+        output_path (str | None): 出力ファイルのパス (Noneの場合は標準出力)
+
+    Yields:
+        TextIO: 出力先
+    """
+    if output_path is None:
+        yield sys.stdout
+    else:
+        with open(output_path, mode='w') as f:
+            yield f
+
+
+def stream(lines: Iterable[str], sma, enable_ichimoku, enable_zigzag) -> Iterator[dict[str, Any]]:
+    """ローソク足を1本ずつ受け取ってインジケータを計算する
+
+    Args:
+        lines (Iterable[str]): MT4,5が出力するCSVと同じ形式の1行ずつのローソク足
+        sma (list[int]): SMAの数値
+        enable_ichimoku (bool): 一目均衡表の可否
+        enable_zigzag (bool): ジグザグの可否
+
+    Yields:
+        dict[str, Any]: ローソク足とインジケータの値、確定したジグザグ、1本あたりの処理時間(マイクロ秒)
+    """
+    indicators = [StreamingSma(average) for average in (sma if sma is not None else [])]
+    if enable_ichimoku:
+        indicators.append(StreamingIchimoku())
+    zigzag = StreamingZigzag() if enable_zigzag else None
+
+    index = 0
+    for line in lines:
+        started = time.perf_counter_ns()
+        try:
+            bar = parse_bar(line)
+        except ValueError as e:
+            logger.warning(f"invalid candle: {line.strip()!r} ({e})")
+            continue
+        if bar is None:
+            continue
+
+        record = {"index": index}
+        record.update(bar)
+        for indicator in indicators:
+            for name, value in indicator.update(bar).items():
+                # MEMO: jsonにNaNは出力できないためnullにする
+                record[name] = None if math.isnan(value) else value
+        if zigzag is not None:
+            record["zigzag"] = zigzag.update(bar)
+        record["datetime"] = bar["datetime"].isoformat()
+        record["latency_us"] = (time.perf_counter_ns() - started) / 1000
+        index += 1
+        yield record
+
+
+def parse_bar(line: str) -> dict[str, Any] | None:
+    """MT4,5が出力するCSVの1行をローソク足に変換する
+
+    Args:
+        line (str): CSVの1行 (日時,始値,高値,安値,終値,ティック数,出来高)
+
+    Returns:
+        dict[str, Any] | None: ローソク足の情報 (空行の場合はNone)
+    """
+    values = line.strip().lstrip("\ufeff").split(",")
+    if values == [""]:
+        return None
+    if len(values) != len(CANDLE_COLUMNS):
+        raise ValueError(f"expected {len(CANDLE_COLUMNS)} columns, got {len(values)}")
+
+    bar = {"datetime": parse_datetime(values[0])}
+    for name, value in zip(CANDLE_COLUMNS[1:5], values[1:5]):
+        bar[name] = float(value)
+    for name, value in zip(CANDLE_COLUMNS[5:], values[5:]):
+        bar[name] = int(value)
+    return bar
+
+
+def parse_datetime(value: str) -> datetime:
+    """MT4,5が出力する日時を変換する
+
+    Args:
+        value (str): 日時の文字列
+
+    Returns:
+        datetime: 日時
+    """
+    for format in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, format)
+        except ValueError:
+            pass
+    raise ValueError(f"invalid datetime: {value}")
+
+
+def print_latency(title: str, latencies: list[float]):
+    """1本あたりの処理時間の統計を表示する
+
+    Args:
+        title (str): 処理名
+        latencies (list[float]): 1本あたりの処理時間(マイクロ秒)
+    """
+    if len(latencies) == 0:
+        print(f"[{title}] 0 bars", file=sys.stderr)
+        return
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"[{title}] {len(latencies)} bars, latency mean {sum(latencies) / len(latencies):.1f}us, "
+          f"p99 {p99:.1f}us, max {ordered[-1]:.1f}us", file=sys.stderr)
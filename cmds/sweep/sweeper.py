@@ -0,0 +1,173 @@
+"""パラメータ探索モジュール
+"""
+
+from pathlib import Path
+from functools import partial
+from common.batch import run_files, print_summary
+from common.resistance import count_resistance_points, sweep_resistance_areas
+from common.writer import write_dataframe
+from cmds.detect.detector import collect_band_names, find_results, read_result
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("sweeper")
+
+# 探索結果の出力ファイル名 (拡張子なし)
+OUTPUT_STEM = "sweep"
+# いずれかの抵抗帯で反発したジグザグの集計行の抵抗帯名
+ALL_BANDS = "resistance-point"
+
+
+class Sweeper:
+    """パラメータ探索クラス
+
+    抵抗帯判定用のウインドウサイズと閾値の組み合わせごとの反発数を一括で集計する
+
+    Attributes:
+        config (dict[str,Any]): 設定情報が格納された辞書データ
+    """
+
+    def __init__(self, config):
+        """コンストラクタ
+
+        Args:
+            config (dict[str,Any]): 設定情報が格納された辞書データ
+        """
+        self.config = config
+
+    def main(self, args):
+        """メイン処理
+
+        抵抗帯名の候補はdetectの設定値を使用する
+        """
+
+        # 入力ファイルパスの取得
+        input_path = Path(args.input) if args.input != None else Path(self.config["sweep"]["input"])
+        # 出力ファイルパスの取得 (未指定の場合は標準出力に表示する)
+        output_path = args.output if args.output != None else (self.config["sweep"].get("output") or None)
+        # 出力ファイルの拡張子取得
+        output_ext = args.ext if args.ext != None else self.config["sweep"].get("ext", "csv")
+        # 並列実行するプロセス数の取得
+        jobs = args.jobs if args.jobs != None else int(self.config["sweep"].get("jobs", 1))
+        try:
+            # 抵抗帯判定用ウインドウサイズの候補取得
+            window_sizes = parse_values(args.window if args.window != None else self.config["sweep"]["window"], int)
+            # 抵抗帯判定用の閾値の候補取得
+            thresholds = parse_values(args.threshold if args.threshold != None else self.config["sweep"]["threshold"], float)
+        except ValueError as e:
+            logger.error(f"invalid parameter: {e}")
+            return
+        # 抵抗帯名の一覧
+        candidate_resistance_band_names = self.config["detect"]["candidate_resistance_band_names"]
+
+        if len(window_sizes) == 0 or min(window_sizes) < 0:
+            logger.error(f"invalid window size: {window_sizes}")
+            return
+        if len(thresholds) == 0 or min(thresholds) <= 0.0 or 1.0 < max(thresholds):
+            logger.error(f"invalid threshold: {thresholds}")
+            return
+        if jobs < 1:
+            logger.error(f"invalid jobs: {jobs}")
+            return
+
+        # 入力ファイルの一覧
+        file_list = find_results(input_path)
+
+        run = partial(sweep_file, window_sizes=window_sizes, thresholds=thresholds,
+                      candidate_resistance_band_names=candidate_resistance_band_names)
+        results = run_files(run, file_list, jobs)
+        if not input_path.is_file():
+            print_summary("sweep", results)
+
+        # 全てのファイルの反発数を合算する
+        tables = [result["result"] for result in results if result["error"] is None]
+        if len(tables) == 0:
+            return
+        table = pd.concat(tables, ignore_index=True).groupby(
+            ["window", "threshold", "band"], sort=False, as_index=False)[["hits", "pivots"]].sum()
+        table = table.sort_values(["window", "threshold"], kind="stable", ignore_index=True)
+
+        if output_path:
+            write_dataframe(table, output_path, OUTPUT_STEM, output_ext)
+        else:
+            print(table.to_string(index=False))
+
+
+def parse_values(values, type) -> list:
+    """パラメータの候補を展開する
+
+    "開始:終了[:間隔]"の形式は終了を含む範囲として展開する (間隔の既定値は1)
+
+    Args:
+        values (list[str | int | float]): パラメータの候補
+        type (type): パラメータの型 (intまたはfloat)
+
+    Returns:
+        list: 重複を除いて昇順に並べたパラメータの候補
+    """
+    results = []
+    for value in values:
+        if isinstance(value, str) and ":" in value:
+            parts = [type(part) for part in value.split(":")]
+            if len(parts) not in [2, 3]:
+                raise ValueError(value)
+            start, stop = parts[0], parts[1]
+            step = parts[2] if len(parts) == 3 else type(1)
+            if step <= 0:
+                raise ValueError(value)
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            # MEMO: 小数の間隔は誤差が蓄積しないように開始値からの倍数で求めて丸める
+            results.extend(type(round(start + step * i, 10)) for i in range(max(0, count)))
+        else:
+            results.append(type(value))
+    return sorted(set(results))
+
+
+def sweep_file(file: Path, window_sizes: list[int], thresholds: list[float], candidate_resistance_band_names) -> pd.DataFrame:
+    """1ファイルのパラメータ探索処理
+
+    Args:
+        file (Path): 入力ファイルのパス
+        window_sizes (list[int]): 抵抗帯判定に使用するウインドウの幅の候補
+        thresholds (list[float]): 抵抗帯面積率の閾値の候補
+        candidate_resistance_band_names (list[str]): 抵抗帯名の候補 (正規表現)
+
+    Returns:
+        DataFrame: パラメータの組み合わせと抵抗帯ごとの反発数
+    """
+    return sweep(read_result(file), window_sizes, thresholds, candidate_resistance_band_names)
+
+
+def sweep(df: pd.DataFrame, window_sizes: list[int], thresholds: list[float], candidate_resistance_band_names) -> pd.DataFrame:
+    """ウインドウサイズと閾値の組み合わせごとに抵抗帯で反発したジグザグの数を数える
+
+    面積と数はウインドウサイズごとに1回だけ計算し、閾値ごとの判定は計算結果を使い回す
+
+    Args:
+        df (DataFrame): インジケータが書き込まれたデータフレーム
+        window_sizes (list[int]): 抵抗帯判定に使用するウインドウの幅の候補
+        thresholds (list[float]): 抵抗帯面積率の閾値の候補
+        candidate_resistance_band_names (list[str]): 抵抗帯名の候補 (正規表現)
+
+    Returns:
+        DataFrame: パラメータの組み合わせと抵抗帯ごとの反発数
+            - window: ウインドウの幅
+            - threshold: 抵抗帯面積率の閾値
+            - band: 抵抗帯名 (resistance-pointはいずれかの抵抗帯で反発したジグザグ)
+            - hits: 反発したジグザグの数
+            - pivots: ジグザグの数
+    """
+    # MEMO: 複数の候補に一致した抵抗帯は1度だけ判定する
+    band_names = list(dict.fromkeys(collect_band_names(df, candidate_resistance_band_names)))
+    zigzag_indices = df.index[df['zigzag']].tolist() if 'zigzag' in df.columns else []
+    zigzag_kinds = df['zigzag-kind'].to_numpy(dtype=object)[zigzag_indices] if 0 < len(zigzag_indices) else np.empty(0, dtype=object)
+
+    rows = []
+    for window_size, areas in sweep_resistance_areas(df, band_names, zigzag_indices, window_sizes):
+        per_band, total = count_resistance_points(areas, zigzag_kinds, thresholds)
+        for i, threshold in enumerate(thresholds):
+            for band, band_name in enumerate(band_names):
+                rows.append((window_size, threshold, band_name, int(per_band[i, band]), len(zigzag_indices)))
+            rows.append((window_size, threshold, ALL_BANDS, int(total[i]), len(zigzag_indices)))
+    return pd.DataFrame(rows, columns=["window", "threshold", "band", "hits", "pivots"])
@@ -0,0 +1,75 @@
+"""一括処理モジュール
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+import logging
+
+logger = logging.getLogger("batch")
+
+
+def run_files(func: Callable[[Path], Any], file_list: list[Path], jobs: int = 1) -> list[dict[str, Any]]:
+    """ファイルごとの処理を実行する
+
+    jobsが2以上の場合はプロセスプールで並列に実行する。
+    1ファイルの処理に失敗しても残りのファイルの処理は継続する。
+
+    Args:
+        func (Callable[[Path], Any]): ファイルごとの処理 (並列実行時はpickle可能であること)
+        file_list (list[Path]): 処理対象のファイルパス
+        jobs (int): 並列に実行するプロセス数
+
+    Returns:
+        list[dict[str, Any]]: file_listと同じ順序に並んだ処理結果
+            - file: ファイルパス
+            - result: 処理の戻り値
+            - error: 処理に失敗した場合のエラーメッセージ (成功した場合はNone)
+    """
+    if jobs <= 1 or len(file_list) <= 1:
+        return [run_file(func, file) for file in file_list]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(file_list))) as executor:
+        futures = [executor.submit(run_file, func, file) for file in file_list]
+        for file, future in zip(file_list, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # ワーカープロセスが異常終了した場合
+                logger.error(f"failed to process {file}: {e!r}")
+                results.append({"file": file, "result": None, "error": repr(e)})
+    return results
+
+
+def run_file(func: Callable[[Path], Any], file: Path) -> dict[str, Any]:
+    """1ファイルの処理を実行する
+
+    Args:
+        func (Callable[[Path], Any]): ファイルごとの処理
+        file (Path): 処理対象のファイルパス
+
+    Returns:
+        dict[str, Any]: 処理結果
+    """
+    try:
+        return {"file": file, "result": func(file), "error": None}
+    except Exception as e:
+        logger.exception(f"failed to process {file}")
+        return {"file": file, "result": None, "error": repr(e)}
+
+
+def print_summary(title: str, results: list[dict[str, Any]]):
+    """処理結果の一覧を表示する
+
+    Args:
+        title (str): 処理名
+        results (list[dict[str, Any]]): run_filesの処理結果
+    """
+    failed = [result for result in results if result["error"] is not None]
+    print(f"[{title}] {len(results)} files, {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    for result in results:
+        if result["error"] is None:
+            print(f"  OK {result['file'].name}")
+        else:
+            print(f"  NG {result['file'].name}: {result['error']}")
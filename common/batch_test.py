@@ -0,0 +1,29 @@
+from batch import run_files
+from pathlib import Path
+import time
+
+
+def process(file: Path) -> str:
+    # 先頭のファイルほど遅く終わるようにして、完了順と入力順を変える
+    time.sleep(0.05 * int(file.stem))
+    if file.suffix == ".ng":
+        raise ValueError(f"invalid file: {file.name}")
+    return file.stem
+
+
+def test_run_files():
+    file_list = [Path("3.csv"), Path("2.ng"), Path("1.csv"), Path("0.csv")]
+    results = run_files(process, file_list)
+
+    # 入力と同じ順序で結果が返り、失敗したファイルはエラーになって残りのファイルは処理が継続されること
+    assert [result["file"] for result in results] == file_list
+    assert [result["result"] for result in results] == ["3", None, "1", "0"]
+    assert [result["error"] for result in results] == [None, "ValueError('invalid file: 2.ng')", None, None]
+
+    # 並列に実行しても同じ結果になること
+    assert run_files(process, file_list, jobs=3) == results
+
+
+def test_run_files_empty():
+    assert run_files(process, []) == []
+    assert run_files(process, [], jobs=2) == []
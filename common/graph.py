@@ -1,10 +1,13 @@
 """グラフ表示モジュール
+
+MEMO: mplfinanceとmatplotlib(japanize_matplotlibのフォント登録を含む)は読み込みに時間がかかるため、
+      グラフを表示する時に読み込む (グラフを表示しない実行では読み込まない)
 """
-import mplfinance as mpf
+from pathlib import Path
+from typing import Any
 from pandas import DataFrame
+import numpy as np
 import pandas as pd
-import japanize_matplotlib  # noqa: F401
-import matplotlib.pyplot as plt
 import re
 
 sma_colors = [
@@ -17,58 +20,228 @@ sma_colors = [
 ]
 
 
-def show(df: DataFrame, title: str = ""):
-    dfc = df.copy()
-    dfc["datetime"] = pd.to_datetime(dfc["datetime"])
-    dfc = dfc.set_index("datetime")
+# 画像の出力形式
+IMAGE_FORMATS = ["png", "svg"]
+
+# 1枚のグラフに描画するローソク足の本数の既定値 (超える場合は間引いて描画する)
+DEFAULT_MAX_BARS = 2000
+
+# 価格に重ねて表示するマーカー (列名, マーカー, 色)
+MARKERS = [
+    ('zigzag-peak-price', "v", 'red'),
+    ('zigzag-bottom-price', "^", 'blue'),
+    ('origin-down', "v", 'green'),
+    ('origin-up', "^", 'yellow'),
+]
+
+# 線で描画するインジケータの列名
+LINE_COLUMN_PATTERN = r'^(sma-\d+|ichimoku_senkou_span_[12])$'
+# マーカーで描画する列名
+MARKER_COLUMN_PATTERN = r'^(zigzag-(peak|bottom)-price|origin-(up|down)|resistance-point-.+)$'
+
+
+def show(df: DataFrame, title: str = "", max_bars: int = DEFAULT_MAX_BARS, start=None, end=None):
+    """ローソク足とインジケータをウインドウに表示する
+
+    Args:
+        df (DataFrame): インジケータが書き込まれたデータフレーム
+        title (str): グラフのタイトル
+        max_bars (int): 描画するローソク足の最大本数 (超える場合は間引く、0の場合は間引かない)
+        start (str | datetime | None): 描画する範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 描画する範囲の終了日時 (Noneの場合は末尾まで)
+    """
+    import mplfinance as mpf
+    import japanize_matplotlib  # noqa: F401
+    import matplotlib.pyplot as plt
+
+    dfc = to_plot_frame(df, start, end)
+    if len(dfc) == 0:
+        return
+    plot(mpf, plt, dfc, title, max_bars)
+    plt.show()
+
+
+def render(df: DataFrame, output_dir: str | Path, stem: str, image_format: str = "png", chunk: int = 0, dpi: int = 100,
+           max_bars: int = DEFAULT_MAX_BARS, start=None, end=None) -> list[Path]:
+    """ローソク足とインジケータを画像ファイルに出力する
+
+    ウインドウを開かずにAggバックエンドで描画する。
+    chunkが指定された場合はchunk本ごとに分割して"ファイル名_連番"の画像を出力する。
+
+    Args:
+        df (DataFrame): インジケータが書き込まれたデータフレーム
+        output_dir (str | Path): 出力フォルダのパス
+        stem (str): 出力ファイル名 (拡張子なし)
+        image_format (str): 画像の形式 (png, svg)
+        chunk (int): 1枚の画像に描画するローソク足の本数 (0の場合は分割しない)
+        dpi (int): 画像の解像度
+        max_bars (int): 1枚の画像に描画するローソク足の最大本数 (超える場合は間引く、0の場合は間引かない)
+        start (str | datetime | None): 描画する範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 描画する範囲の終了日時 (Noneの場合は末尾まで)
+
+    Returns:
+        list[Path]: 出力した画像ファイルのパス
+    """
+    import matplotlib
+    # MEMO: pyplotを読み込む前にバックエンドを切り替える (ディスプレイのない環境でも描画できる)
+    matplotlib.use("Agg")
+    import mplfinance as mpf
+    import japanize_matplotlib  # noqa: F401
+    import matplotlib.pyplot as plt
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    dfc = to_plot_frame(df, start, end)
+    size = chunk if 0 < chunk else max(1, len(dfc))
+    files = []
+    for number, begin in enumerate(range(0, len(dfc), size)):
+        part = dfc.iloc[begin:begin + size]
+        name = f"{stem}_{number:04d}" if 0 < chunk else stem
+        file = output_dir / f"{name}.{image_format}"
+        fig = plot(mpf, plt, part, name, max_bars)
+        fig.savefig(file, format=image_format, dpi=dpi)
+        plt.close(fig)
+        files.append(file)
+    return files
+
+
+def to_plot_frame(df: DataFrame, start=None, end=None) -> DataFrame:
+    """描画に使う列だけを日時のインデックスで取り出す
+
+    MEMO: データフレーム全体を複製しないように描画に使う列だけを選択する
+
+    Args:
+        df (DataFrame): インジケータが書き込まれたデータフレーム
+        start (str | datetime | None): 描画する範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 描画する範囲の終了日時 (Noneの場合は末尾まで)
+
+    Returns:
+        DataFrame: 日時をインデックスにしたデータフレーム
+    """
+    columns = ["open", "high", "low", "close"] + [
+        column for column in df.columns if re.match(LINE_COLUMN_PATTERN, column) or re.match(MARKER_COLUMN_PATTERN, column)]
+    index = pd.DatetimeIndex(df["datetime"], name="datetime")
+    dfc = df[columns].set_axis(index, axis=0)
+    if start is not None or end is not None:
+        # 日時は昇順に並んでいるため二分探索で範囲を切り出す
+        first = 0 if start is None else index.searchsorted(pd.Timestamp(start), side="left")
+        last = len(index) if end is None else index.searchsorted(pd.Timestamp(end), side="right")
+        dfc = dfc.iloc[first:last]
+    return dfc
+
 
+def decimate(dfc: DataFrame, max_bars: int) -> tuple[DataFrame, int]:
+    """ローソク足をmax_bars本以下になるように間引く
+
+    連続するstep本のローソク足を1本にまとめる (始値は先頭、高値は最大、安値は最小、終値とインジケータは末尾の値)
+
+    Args:
+        dfc (DataFrame): to_plot_frameで取り出したデータフレーム
+        max_bars (int): ローソク足の最大本数 (0の場合は間引かない)
+
+    Returns:
+        tuple[DataFrame, int]: 間引いたデータフレームとまとめた本数
+    """
+    size = len(dfc)
+    if max_bars <= 0 or size <= max_bars:
+        return dfc, 1
+
+    step = -(-size // max_bars)
+    starts = np.arange(0, size, step)
+    ends = np.minimum(starts + step, size) - 1
+    columns = {
+        "open": dfc["open"].to_numpy(dtype=float)[starts],
+        "high": np.maximum.reduceat(dfc["high"].to_numpy(dtype=float), starts),
+        "low": np.minimum.reduceat(dfc["low"].to_numpy(dtype=float), starts),
+        "close": dfc["close"].to_numpy(dtype=float)[ends],
+    }
+    for column in dfc.columns:
+        if re.match(LINE_COLUMN_PATTERN, column):
+            columns[column] = dfc[column].to_numpy(dtype=float)[ends]
+    return DataFrame(columns, index=dfc.index[starts]), step
+
+
+def collect_markers(dfc: DataFrame, step: int = 1) -> list[dict[str, Any]]:
+    """マーカーを描画する位置と価格を集める
+
+    MEMO: マーカーは全てのローソク足の長さの配列ではなく、値がある位置だけを保持する
+          (間引いた場合も価格は元の値のまま、位置だけをまとめたローソク足に合わせる)
+
+    Args:
+        dfc (DataFrame): to_plot_frameで取り出したデータフレーム (間引く前)
+        step (int): decimateでまとめた本数
+
+    Returns:
+        list[dict[str, Any]]: マーカーごとの描画位置(x)、価格(y)、マーカー、色
+    """
+    resistance_points = [(column, "o", "gold") for column in dfc.columns if re.match(r'^resistance-point-.+$', column)]
+    markers = []
+    for name, marker, color in MARKERS + resistance_points:
+        if name not in dfc.columns:
+            continue
+        prices = dfc[name].to_numpy(dtype=float, na_value=np.nan)
+        positions = np.flatnonzero(~np.isnan(prices))
+        if len(positions) == 0:
+            continue
+        markers.append({"x": positions // step, "y": prices[positions], "marker": marker, "color": color})
+    return markers
+
+
+def plot(mpf, plt, dfc: DataFrame, title: str, max_bars: int):
+    """ローソク足とインジケータ、マーカーを描画する
+
+    Args:
+        mpf (module): mplfinanceモジュール
+        plt (module): matplotlib.pyplotモジュール
+        dfc (DataFrame): to_plot_frameで取り出したデータフレーム
+        title (str): グラフのタイトル
+        max_bars (int): 描画するローソク足の最大本数 (超える場合は間引く、0の場合は間引かない)
+
+    Returns:
+        Figure: 描画したグラフ
+    """
+    frame, step = decimate(dfc, max_bars)
+    fig, axes = mpf.plot(frame, **make_plot_options(mpf, plt, frame, title), returnfig=True)
+    # MEMO: mplfinanceはローソク足の位置を0から始まる連番で描画するため、マーカーも連番の位置に描画する
+    for marker in collect_markers(dfc, step):
+        axes[0].scatter(marker["x"], marker["y"], s=10, marker=marker["marker"], color=marker["color"], zorder=3)
+    return fig
+
+
+def make_plot_options(mpf, plt, frame: DataFrame, title: str) -> dict[str, Any]:
+    """mpf.plotの引数を生成する
+
+    Args:
+        mpf (module): mplfinanceモジュール
+        plt (module): matplotlib.pyplotモジュール
+        frame (DataFrame): 描画するデータフレーム
+        title (str): グラフのタイトル
+
+    Returns:
+        dict[str, Any]: mpf.plotの引数
+    """
     # カラム名からSMAの数値を取得する
     sma = []
-    for column in dfc.columns:
+    for column in frame.columns:
         res = re.findall(r'^sma-(\d+)$', column)
         if 0 < len(res):
             sma.append(*res)
 
-    # カラム名から抵抗帯を取得する
-    resistance_points = []
-    for column in dfc.columns:
-        if re.match(r'^resistance-point-.+$', column):
-            resistance_points.append(column)
-
     apds = []
 
     # 単純移動平均線のマーカー追加
-    for i, s in enumerate(sma if sma is not None else []):
+    for i, s in enumerate(sma):
         color = sma_colors[i % len(sma_colors)]
         apds.append(mpf.make_addplot(
-            dfc[f'sma-{s}'], color=color, label=f'SMA {s}'))
+            frame[f'sma-{s}'], color=color, label=f'SMA {s}'))
 
-    if "ichimoku_senkou_span_1" in dfc.columns:
+    if "ichimoku_senkou_span_1" in frame.columns:
         apds.append(mpf.make_addplot(
-            dfc['ichimoku_senkou_span_1'], color='sandybrown', label='先行スパン1'))
-    if "ichimoku_senkou_span_2" in dfc.columns:
+            frame['ichimoku_senkou_span_1'], color='sandybrown', label='先行スパン1'))
+    if "ichimoku_senkou_span_2" in frame.columns:
         apds.append(mpf.make_addplot(
-            dfc['ichimoku_senkou_span_2'], color='thistle', label='先行スパン2'))
-
-    zigzag_inputs = [
-        {"name": 'zigzag-peak-price', "marker": "v", "color": 'red'},
-        {"name": 'zigzag-bottom-price', "marker": "^", "color": 'blue'},
-        {"name": 'origin-down', "marker": "v", "color": 'green'},
-        {"name": 'origin-up', "marker": "^", "color": 'yellow'},
-        *[{"name": name, "marker": "o", "color": "gold"} for name in resistance_points]
-    ]
-
-    # ジグザグのマーカーを追加
-    for zi in zigzag_inputs:
-        if zi["name"] in dfc.columns:
-            zigzag_prices = dfc[zi["name"]]
-            if zigzag_prices.nunique() <= 1 or zigzag_prices.isna().all():
-                # MEMO:
-                # 空配列、または全てNaN,null,Noneのデータの場合。
-                # このケースは配列を引数とするmax関数でエラーになるため、この段階で弾いておく。
-                continue
-            apds.append(mpf.make_addplot(zigzag_prices, type='scatter',
-                        markersize=10, marker=zi["marker"], color=zi["color"]))
+            frame['ichimoku_senkou_span_2'], color='thistle', label='先行スパン2'))
 
     s = mpf.make_mpf_style(
         # 基本はdefaultの設定値を使う。
@@ -79,10 +252,11 @@ def show(df: DataFrame, title: str = ""):
 
     # 時刻の種類に応じてX軸の表示フォーマットを変更する
     datetime_format = '%Y/%m/%d'
-    # MEMO: .dt.timeで時刻だけを抽出して00:00:00以外のデータが存在するかをクエリーする
-    if 0 < len(df.query("datetime.dt.time != @pd.to_datetime('00:00:00').time()")):
+    # MEMO: 日付で切り捨てた値と異なる日時があれば00:00:00以外のデータが存在する
+    if (frame.index != frame.index.normalize()).any():
         # 00時00分00秒以外のデータが存在している場合
         datetime_format = '%Y/%m/%d %H:%M:%S'
 
-    mpf.plot(dfc, title=title, addplot=apds, type="candle",
-             style=s, ylabel='Price', volume=False, datetime_format=datetime_format)
+    # MEMO: 間引いた本数で描画するため、本数が多い場合の警告は表示しない
+    return dict(title=title, addplot=apds, type="candle", style=s, ylabel='Price', volume=False,
+                datetime_format=datetime_format, warn_too_much_data=len(frame) + 1)
@@ -0,0 +1,56 @@
+from graph import collect_markers, decimate, render, to_plot_frame
+from loader import load_candles
+from sma import mark_sma
+from zigzag import mark_zigzag2
+import numpy as np
+import pandas as pd
+import os
+import subprocess
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_graph_lazy_import():
+    # グラフを表示するまでmatplotlibとmplfinanceを読み込まないこと
+    code = "import sys, graph; sys.exit(any(name in sys.modules for name in ['matplotlib', 'mplfinance', 'japanize_matplotlib']))"
+    assert subprocess.run([sys.executable, "-c", code], cwd=current_dir).returncode == 0
+
+
+def test_render_chunk(tmp_path):
+    df = mark_sma(mark_zigzag2(load_candles(test_data_path).iloc[:250].reset_index(drop=True)), [20])
+
+    # 指定した本数ごとに分割して出力されること
+    files = render(df, tmp_path, "USDJPYDaily", "png", chunk=100)
+    assert [file.name for file in files] == ["USDJPYDaily_0000.png", "USDJPYDaily_0001.png", "USDJPYDaily_0002.png"]
+    assert all(file.is_file() and 0 < file.stat().st_size for file in files)
+
+    files = render(df, tmp_path, "USDJPYDaily", "svg")
+    assert [file.name for file in files] == ["USDJPYDaily.svg"]
+
+
+def test_decimate_markers():
+    df = mark_zigzag2(load_candles(test_data_path))
+    dfc = to_plot_frame(df)
+
+    frame, step = decimate(dfc, 100)
+    assert len(frame) <= 100
+    # 高値と安値はまとめた範囲の最大値と最小値になること
+    assert frame["high"].max() == dfc["high"].max()
+    assert frame["low"].min() == dfc["low"].min()
+
+    # マーカーは間引いた後も元の価格のまま全て残ること
+    peaks = dfc['zigzag-peak-price'].dropna()
+    marker = collect_markers(dfc, step)[0]
+    assert len(marker["x"]) == len(peaks)
+    np.testing.assert_array_equal(marker["y"], peaks.to_numpy())
+    assert marker["x"].max() < len(frame)
+
+
+def test_to_plot_frame_range():
+    df = load_candles(test_data_path)
+    dfc = to_plot_frame(df, "2024-02-01", "2024-02-29")
+    assert dfc.index.min() >= pd.Timestamp("2024-02-01")
+    assert dfc.index.max() <= pd.Timestamp("2024-02-29")
+    assert len(dfc) == ((df["datetime"] >= "2024-02-01") & (df["datetime"] <= "2024-02-29")).sum()
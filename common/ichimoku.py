@@ -1,38 +1,180 @@
 """一目均衡表計算モジュール
 """
 
-from pandas import DataFrame
+from collections import deque
+from typing import Any, Callable, Mapping
+from pandas import DataFrame, Series
+import math
+
+# 転換線、基準線、先行スパン2の期間
+TENKAN_PERIOD = 9
+KIJUN_PERIOD = 26
+SENKOU_SPAN_2_PERIOD = 52
+# 先行スパンを先行させる本数
+SENKOU_SHIFT = 26
+
+
+# 一目均衡表の計算に使用する中間値 (種類, 列名, 期間)
+ICHIMOKU_INPUTS = [
+    ("rolling_max", "high", KIJUN_PERIOD),
+    ("rolling_min", "low", KIJUN_PERIOD),
+    ("rolling_max", "high", TENKAN_PERIOD),
+    ("rolling_min", "low", TENKAN_PERIOD),
+    ("rolling_max", "high", SENKOU_SPAN_2_PERIOD),
+    ("rolling_min", "low", SENKOU_SPAN_2_PERIOD),
+]
 
 
 def mark_ichimoku(df: DataFrame) -> DataFrame:
+    """一目均衡表をデータフレームに書き込む
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+
+    Returns:
+        DataFrame: 一目均衡表が書き込まれたデータフレーム
+    """
+    def rolling(kind: str, column: str, window: int) -> Series:
+        values = df[column].rolling(window=window)
+        return values.max() if kind == "rolling_max" else values.min()
+
+    for name, values in calc_ichimoku(rolling, df['close']).items():
+        df[name] = values
+    return df
+
+
+def calc_ichimoku(rolling: Callable[[str, str, int], Series], close: Series) -> dict[str, Series]:
+    """一目均衡表を計算する
+
+    MEMO: 期間ごとの最高値と最安値はrollingから取得し、データフレームに一時的な列を追加しない
+
+    Args:
+        rolling (Callable[[str, str, int], Series]): ICHIMOKU_INPUTSの中間値を取得する処理
+        close (Series): 終値
+
+    Returns:
+        dict[str, Series]: 一目均衡表の列名と値 (書き込む順)
+    """
     # 基準線（赤線）＝（26日間の最高値+26日間の最安値）÷2
     # 転換線（青線）＝（9日間の最高値+9日間の最安値）÷2
     # 先行スパン1（水色線）＝（基準線+転換線）÷2を26日間先行させたもの
     # 先行スパン2（橙線）＝（52日間の最高値+52日間の最安値）÷2を26日間先行させたもの
     # 遅行スパン（黄色線）＝当日の終値を26日遅行させたもの
-    dfc = df.copy()
+    columns = {}
 
     # 基準線（26日間の最高値 + 最安値）÷ 2
-    dfc['26日間の最高値'] = df['high'].rolling(window=26).max()
-    dfc['26日間の最安値'] = df['low'].rolling(window=26).min()
-    df['ichimoku_kijun_sen'] = (dfc['26日間の最高値'] + dfc['26日間の最安値']) / 2
+    columns['ichimoku_kijun_sen'] = (rolling("rolling_max", "high", KIJUN_PERIOD) + rolling("rolling_min", "low", KIJUN_PERIOD)) / 2
 
     # 転換線（9日間の最高値 + 最安値）÷ 2
-    dfc['9日間の最高値'] = df['high'].rolling(window=9).max()
-    dfc['9日間の最安値'] = df['low'].rolling(window=9).min()
-    df['ichimoku_tenkan_sen'] = (dfc['9日間の最高値'] + dfc['9日間の最安値']) / 2
+    columns['ichimoku_tenkan_sen'] = (rolling("rolling_max", "high", TENKAN_PERIOD) + rolling("rolling_min", "low", TENKAN_PERIOD)) / 2
 
     # 先行スパン1（水色線）＝（基準線 + 転換線）÷ 2 を26日間先行
-    df['ichimoku_senkou_span_1'] = (
-        (df['ichimoku_kijun_sen'] + df['ichimoku_tenkan_sen']) / 2).shift(26)
+    columns['ichimoku_senkou_span_1'] = (
+        (columns['ichimoku_kijun_sen'] + columns['ichimoku_tenkan_sen']) / 2).shift(SENKOU_SHIFT)
 
     # 先行スパン2（橙線）＝（52日間の最高値 + 最安値）÷ 2 を26日間先行
-    dfc['52日間の最高値'] = df['high'].rolling(window=52).max()
-    dfc['52日間の最安値'] = df['low'].rolling(window=52).min()
-    df['ichimoku_senkou_span_2'] = (
-        (dfc['52日間の最高値'] + dfc['52日間の最安値']) / 2).shift(26)
+    columns['ichimoku_senkou_span_2'] = (
+        (rolling("rolling_max", "high", SENKOU_SPAN_2_PERIOD) + rolling("rolling_min", "low", SENKOU_SPAN_2_PERIOD)) / 2).shift(SENKOU_SHIFT)
 
     # 遅行スパン（黄色線）＝当日の終値を26日遅行
-    df['ichimoku_chikou_span'] = df['close'].shift(-26)
+    columns['ichimoku_chikou_span'] = close.shift(-SENKOU_SHIFT)
 
-    return df
+    return columns
+
+
+class RollingExtremum:
+    """直近windowの最大値または最小値を1本ずつ計算するクラス
+
+    値が単調に並ぶ両端キューに候補だけを保持するため、1本あたり償却O(1)で計算できる
+
+    Attributes:
+        window (int): 期間
+        maximum (bool): 最大値を求めるか否かのフラグ値 (Falseの場合は最小値)
+    """
+
+    def __init__(self, window: int, maximum: bool):
+        """コンストラクタ
+
+        Args:
+            window (int): 期間
+            maximum (bool): 最大値を求めるか否かのフラグ値 (Falseの場合は最小値)
+        """
+        self.window = window
+        self.maximum = maximum
+        self._count = 0
+        self._candidates = deque()
+
+    def update(self, value: float) -> float:
+        """値を1つ追加して直近windowの最大値または最小値を求める
+
+        Args:
+            value (float): 追加する値
+
+        Returns:
+            float: 直近windowの最大値または最小値 (本数が足りない場合はnan)
+        """
+        candidates = self._candidates
+        # 追加する値より劣る候補は二度と最大値(最小値)にならないため取り除く
+        if self.maximum:
+            while candidates and candidates[-1][1] <= value:
+                candidates.pop()
+        else:
+            while candidates and value <= candidates[-1][1]:
+                candidates.pop()
+        candidates.append((self._count, value))
+        self._count += 1
+
+        # 窓から外れた候補を取り除く
+        if candidates[0][0] <= self._count - 1 - self.window:
+            candidates.popleft()
+
+        if self._count < self.window:
+            return math.nan
+        return candidates[0][1]
+
+
+class StreamingIchimoku:
+    """一目均衡表を1本ずつ計算するクラス
+
+    MEMO: 遅行スパンは26本先の終値を使うため、ローソク足を追加した時点では値が確定しない。
+          そのため、updateは遅行スパン以外の4本の線を返す
+    """
+
+    def __init__(self):
+        """コンストラクタ
+        """
+        self._tenkan_high = RollingExtremum(TENKAN_PERIOD, True)
+        self._tenkan_low = RollingExtremum(TENKAN_PERIOD, False)
+        self._kijun_high = RollingExtremum(KIJUN_PERIOD, True)
+        self._kijun_low = RollingExtremum(KIJUN_PERIOD, False)
+        self._span_2_high = RollingExtremum(SENKOU_SPAN_2_PERIOD, True)
+        self._span_2_low = RollingExtremum(SENKOU_SPAN_2_PERIOD, False)
+        # 先行させる前の先行スパンを保持する
+        self._spans = deque([(math.nan, math.nan)] * SENKOU_SHIFT, maxlen=SENKOU_SHIFT)
+
+    def update(self, bar: Mapping[str, Any]) -> dict[str, float]:
+        """ローソク足を1本追加して一目均衡表を計算する
+
+        Args:
+            bar (Mapping[str, Any]): ローソク足の情報 (high, low)
+
+        Returns:
+            dict[str, float]: 列名と一目均衡表の値 (本数が足りない場合はnan)
+        """
+        high = float(bar['high'])
+        low = float(bar['low'])
+
+        kijun_sen = (self._kijun_high.update(high) + self._kijun_low.update(low)) / 2
+        tenkan_sen = (self._tenkan_high.update(high) + self._tenkan_low.update(low)) / 2
+        span_2 = (self._span_2_high.update(high) + self._span_2_low.update(low)) / 2
+
+        # 26本前に計算した先行スパンを取り出す
+        senkou_span_1, senkou_span_2 = self._spans[0]
+        self._spans.append(((kijun_sen + tenkan_sen) / 2, span_2))
+
+        return {
+            'ichimoku_kijun_sen': kijun_sen,
+            'ichimoku_tenkan_sen': tenkan_sen,
+            'ichimoku_senkou_span_1': senkou_span_1,
+            'ichimoku_senkou_span_2': senkou_span_2,
+        }
@@ -0,0 +1,29 @@
+from ichimoku import RollingExtremum, StreamingIchimoku, mark_ichimoku
+from loader import load_candles
+import numpy as np
+import pandas as pd
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_rolling_extremum():
+    values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0, 5.0, 3.0, 5.0]
+    for window in [1, 3, 4]:
+        maximum = RollingExtremum(window, True)
+        minimum = RollingExtremum(window, False)
+        expect = pd.Series(values).rolling(window=window)
+        np.testing.assert_array_equal([maximum.update(value) for value in values], expect.max().to_numpy())
+        np.testing.assert_array_equal([minimum.update(value) for value in values], expect.min().to_numpy())
+
+
+def test_streaming_ichimoku():
+    df = mark_ichimoku(load_candles(test_data_path))
+
+    ichimoku = StreamingIchimoku()
+    actual = pd.DataFrame([ichimoku.update(bar) for bar in df.to_dict('records')])
+
+    # 遅行スパン以外は1本ずつ計算した結果がmark_ichimokuと一致すること
+    for column in actual.columns:
+        np.testing.assert_array_equal(actual[column].to_numpy(), df[column].to_numpy())
@@ -0,0 +1,190 @@
+"""インジケータ登録モジュール
+
+インジケータは使用する中間値(ローリング最大値など)と出力する列を宣言して登録する。
+選択されたインジケータが使用する中間値は計画時に重複を除き、評価時に1度だけ計算して共有する。
+中間値はデータフレームに列として追加せず、最後に使用するインジケータの評価後に破棄する。
+"""
+
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable
+from pandas import DataFrame, Series
+import numpy as np
+
+# 中間値の計算処理 (種類 -> 計算処理(入力の系列, 期間))
+INTERMEDIATES: dict[str, Callable[[Series, int], Series]] = {
+    "rolling_max": lambda series, window: series.rolling(window=window).max(),
+    "rolling_min": lambda series, window: series.rolling(window=window).min(),
+    "rolling_mean": lambda series, window: series.rolling(window=window, min_periods=window).mean(),
+    "rolling_std": lambda series, window: series.rolling(window=window, min_periods=window).std(ddof=0),
+}
+
+# ローソク足から計算する系列 (名前 -> 計算処理(データフレーム))
+DERIVED_SERIES: dict[str, Callable[[DataFrame], Series]] = {
+    # 真の値幅 (高値と安値の差、前日終値との差の最大値)
+    "true_range": lambda df: Series(np.fmax(df['high'] - df['low'], np.fmax(
+        (df['high'] - df['close'].shift(1)).abs(), (df['low'] - df['close'].shift(1)).abs())), index=df.index),
+}
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """インジケータの定義
+
+    Attributes:
+        name (str): インジケータ名 (設定ファイルで選択する名前)
+        inputs (Callable[[dict[str, Any]], list[tuple[str, str, int]]]): 使用する中間値 (種類, 入力の系列名, 期間)
+        compute (Callable[[DataFrame, Intermediates, dict[str, Any]], dict[str, Series]]): 出力する列を計算する処理
+            (データフレームに直接書き込む場合は空の辞書を返す)
+        lookback (Callable[[dict[str, Any]], int | None]): 計算に必要な過去のローソク足の本数 (全て必要な場合はNone)
+        lookahead (Callable[[dict[str, Any]], int]): 計算に使用する未来のローソク足の本数
+    """
+    name: str
+    inputs: Callable[[dict[str, Any]], list[tuple[str, str, int]]]
+    compute: Callable[[DataFrame, "Intermediates", dict[str, Any]], dict[str, Series]]
+    lookback: Callable[[dict[str, Any]], int | None] = field(default=lambda params: 0)
+    lookahead: Callable[[dict[str, Any]], int] = field(default=lambda params: 0)
+
+
+@dataclass
+class Plan:
+    """インジケータの評価計画
+
+    Attributes:
+        steps (list[tuple[Indicator, dict[str, Any]]]): 評価するインジケータと引数 (評価順)
+        last_use (dict[tuple[str, str, int], int]): 中間値ごとの最後に使用するステップの番号
+    """
+    steps: list[tuple[Indicator, dict[str, Any]]]
+    last_use: dict[tuple[str, str, int], int]
+
+    def lookback(self) -> int | None:
+        """計算に必要な過去のローソク足の本数 (全て必要な場合はNone)"""
+        lookbacks = [indicator.lookback(params) for indicator, params in self.steps]
+        return None if None in lookbacks else max(lookbacks, default=0)
+
+    def lookahead(self) -> int:
+        """計算に使用する未来のローソク足の本数"""
+        return max([indicator.lookahead(params) for indicator, params in self.steps], default=0)
+
+
+class Intermediates:
+    """中間値の計算結果を保持するクラス
+
+    Attributes:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        values (dict[tuple[str, str, int], Series]): 計算済みの中間値
+    """
+
+    def __init__(self, df: DataFrame):
+        """コンストラクタ
+
+        Args:
+            df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        """
+        self.df = df
+        self.values = {}
+        self._series = {}
+
+    def get(self, kind: str, source: str, window: int) -> Series:
+        """中間値を取得する (未計算の場合は計算する)
+
+        Args:
+            kind (str): 中間値の種類 (INTERMEDIATESのキー)
+            source (str): 入力の系列名 (データフレームの列名またはDERIVED_SERIESのキー)
+            window (int): 期間
+
+        Returns:
+            Series: 中間値
+        """
+        key = (kind, source, window)
+        if key not in self.values:
+            self.values[key] = INTERMEDIATES[kind](self.series(source), window)
+        return self.values[key]
+
+    def series(self, source: str) -> Series:
+        """入力の系列を取得する
+
+        Args:
+            source (str): 入力の系列名 (データフレームの列名またはDERIVED_SERIESのキー)
+
+        Returns:
+            Series: 入力の系列
+        """
+        if source in DERIVED_SERIES:
+            if source not in self._series:
+                self._series[source] = DERIVED_SERIES[source](self.df)
+            return self._series[source]
+        return self.df[source]
+
+    def release(self, keys: list[tuple[str, str, int]]):
+        """使用し終わった中間値を破棄する
+
+        Args:
+            keys (list[tuple[str, str, int]]): 破棄する中間値
+        """
+        for key in keys:
+            self.values.pop(key, None)
+
+
+# 登録済みのインジケータ (インジケータ名 -> 定義)
+REGISTRY: dict[str, Indicator] = {}
+
+
+def register(indicator: Indicator) -> Indicator:
+    """インジケータを登録する
+
+    Args:
+        indicator (Indicator): インジケータの定義
+
+    Returns:
+        Indicator: 登録したインジケータの定義
+    """
+    REGISTRY[indicator.name] = indicator
+    return indicator
+
+
+def plan(selections: list[dict[str, Any]]) -> Plan:
+    """選択されたインジケータの評価計画を作成する
+
+    Args:
+        selections (list[dict[str, Any]]): 選択されたインジケータ ("name"にインジケータ名、それ以外は引数)
+
+    Returns:
+        Plan: 評価計画
+
+    Raises:
+        ValueError: 登録されていないインジケータが選択された場合
+    """
+    steps = []
+    last_use = {}
+    for selection in selections:
+        name = selection.get("name")
+        if name not in REGISTRY:
+            raise ValueError(name)
+        indicator = REGISTRY[name]
+        params = {key: value for key, value in selection.items() if key != "name"}
+        for key in indicator.inputs(params):
+            # MEMO: 同じ中間値は最後に使用するステップまで保持して共有する
+            last_use[key] = len(steps)
+        steps.append((indicator, params))
+    return Plan(steps, last_use)
+
+
+def evaluate(df: DataFrame, plan: Plan, stage: Callable[[str], Any] | None = None) -> DataFrame:
+    """評価計画に従ってインジケータを計算してデータフレームに書き込む
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        plan (Plan): 評価計画
+        stage (Callable[[str], ContextManager] | None): インジケータごとの計測範囲を生成する処理 (Profiler.stage)
+
+    Returns:
+        DataFrame: インジケータが書き込まれたデータフレーム
+    """
+    intermediates = Intermediates(df)
+    for step, (indicator, params) in enumerate(plan.steps):
+        with stage(indicator.name) if stage is not None else nullcontext():
+            for name, values in indicator.compute(df, intermediates, params).items():
+                df[name] = values
+        intermediates.release([key for key, last in plan.last_use.items() if last == step])
+    return df
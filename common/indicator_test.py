@@ -0,0 +1,60 @@
+from indicator import INTERMEDIATES, REGISTRY, Indicator, evaluate, plan
+from ichimoku import ICHIMOKU_INPUTS, calc_ichimoku, mark_ichimoku
+from loader import load_candles
+import pandas as pd
+import pytest
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+@pytest.fixture
+def test_indicators(monkeypatch):
+    # MEMO: テスト用のインジケータはテストの終了時に登録を取り消して、他のテストの登録と衝突させない
+    for indicator in [
+        Indicator(
+            name="test-ichimoku",
+            inputs=lambda params: ICHIMOKU_INPUTS,
+            compute=lambda df, intermediates, params: calc_ichimoku(intermediates.get, df['close']),
+        ),
+        Indicator(
+            name="test-channel",
+            inputs=lambda params: [("rolling_max", "high", params["period"]), ("rolling_min", "low", params["period"])],
+            compute=lambda df, intermediates, params: {
+                f"channel-{params['period']}": intermediates.get("rolling_max", "high", params["period"]) - intermediates.get("rolling_min", "low", params["period"])},
+        ),
+    ]:
+        monkeypatch.setitem(REGISTRY, indicator.name, indicator)
+
+
+def test_evaluate_shared_intermediates(monkeypatch, test_indicators):
+    calls = []
+    rolling_max = INTERMEDIATES["rolling_max"]
+    monkeypatch.setitem(INTERMEDIATES, "rolling_max", lambda series, window: (calls.append(window), rolling_max(series, window))[1])
+
+    df = load_candles(test_data_path)
+    columns = list(df.columns)
+    evaluation = plan([{"name": "test-ichimoku"}, {"name": "test-channel", "period": 26}])
+    # 一目均衡表とチャネルで共通の26本の最高値は最後に使用するチャネルまで保持すること
+    assert evaluation.last_use[("rolling_max", "high", 26)] == 1
+    assert evaluation.last_use[("rolling_max", "high", 9)] == 0
+    evaluate(df, evaluation)
+
+    # 共通の中間値は1度だけ計算し、中間値の列はデータフレームに追加しないこと
+    assert sorted(calls) == [9, 26, 52]
+    assert [column for column in df.columns if column not in columns] == [
+        'ichimoku_kijun_sen', 'ichimoku_tenkan_sen', 'ichimoku_senkou_span_1', 'ichimoku_senkou_span_2', 'ichimoku_chikou_span', 'channel-26']
+    pd.testing.assert_frame_equal(df[columns + [column for column in df.columns if column.startswith('ichimoku')]],
+                                  mark_ichimoku(load_candles(test_data_path)))
+
+
+def test_plan_unknown_indicator():
+    with pytest.raises(ValueError):
+        plan([{"name": "unknown"}])
+
+
+def test_test_indicators_unregistered():
+    # テスト用のインジケータはテストの外では登録されていないこと
+    assert "test-ichimoku" not in REGISTRY
+    assert "test-channel" not in REGISTRY
@@ -0,0 +1,120 @@
+"""入力ファイル読み込みモジュール
+"""
+
+from pathlib import Path
+from typing import Iterator
+from pandas import DataFrame
+from pyarrow import csv
+import hashlib
+import pandas as pd
+import pyarrow as pa
+
+# MT4,5が出力するCSVの列名
+CANDLE_COLUMNS = ["datetime", "open", "high", "low", "close", "tick", "volume"]
+
+# MT4,5が出力するCSVの列の型
+CANDLE_TYPES = {
+    "datetime": pa.timestamp("us"),
+    "open": pa.float64(),
+    "high": pa.float64(),
+    "low": pa.float64(),
+    "close": pa.float64(),
+    "tick": pa.int64(),
+    "volume": pa.int64(),
+}
+
+# MT4,5が出力する日時の書式 (YYYY.MM.DD[ HH:MM[:SS]])
+DATETIME_FORMATS = ["%Y.%m.%d %H:%M:%S", "%Y.%m.%d %H:%M", "%Y.%m.%d"]
+
+# 入力CSVファイルのエンコーディング
+CSV_ENCODING = "utf-16le"
+
+
+def load_candles(file: str | Path, cache_dir: str | Path | None = None) -> DataFrame:
+    """MT4,5が出力したCSVを読み込む
+
+    cache_dirが指定された場合は読み込んだ結果をfeather形式でキャッシュし、
+    ファイルサイズと更新日時が変わっていなければキャッシュから読み込む
+    (キャッシュは入力ファイルの絶対パスごとに作成するため、別のフォルダの同じ名前のファイルと共有できる)
+
+    Args:
+        file (str | Path): 入力ファイルのパス
+        cache_dir (str | Path | None): キャッシュを格納するフォルダのパス
+
+    Returns:
+        DataFrame: ローソク足の情報が格納されたデータフレーム
+    """
+    file = Path(file)
+    if cache_dir is None:
+        return read_mt_csv(file)
+
+    # 絶対パスのハッシュ値とファイルサイズと更新日時をキャッシュのキーにする
+    stat = file.stat()
+    cache_dir = Path(cache_dir)
+    path_hash = hashlib.sha1(str(file.resolve()).encode()).hexdigest()[:16]
+    cache_path = cache_dir / f"{file.name}.{path_hash}.{stat.st_size}-{stat.st_mtime_ns}.feather"
+    if cache_path.is_file():
+        return pd.read_feather(cache_path)
+
+    df = read_mt_csv(file)
+
+    # 同じファイルの古いキャッシュを削除してから書き込む
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for old_cache_path in cache_dir.glob(f"{file.name}.{path_hash}.*.feather"):
+        old_cache_path.unlink()
+    df.to_feather(cache_path)
+    return df
+
+
+def read_mt_csv(file: str | Path) -> DataFrame:
+    """MT4,5が出力したCSVを固定の型で読み込む
+
+    Args:
+        file (str | Path): 入力ファイルのパス
+
+    Returns:
+        DataFrame: ローソク足の情報が格納されたデータフレーム
+    """
+    # UTF-16を一度だけデコードする (先頭のBOMは取り除く)
+    with open(file, mode='rb') as f:
+        data = f.read().decode(CSV_ENCODING).lstrip("\ufeff").encode("utf-8")
+
+    # 型と日時の書式を固定して推論せずに変換する
+    table = csv.read_csv(
+        pa.py_buffer(data),
+        read_options=csv.ReadOptions(column_names=CANDLE_COLUMNS),
+        convert_options=csv.ConvertOptions(column_types=CANDLE_TYPES, timestamp_parsers=DATETIME_FORMATS))
+    return table.to_pandas()
+
+
+def iter_mt_csv(file: str | Path, chunk_rows: int) -> Iterator[DataFrame]:
+    """MT4,5が出力したCSVをchunk_rows行ずつ読み込む
+
+    MEMO: UTF-16からUTF-8への変換とCSVの解析を少しずつ行うため、ファイル全体をメモリ上に展開しない
+
+    Args:
+        file (str | Path): 入力ファイルのパス
+        chunk_rows (int): 1回に読み込む行数 (最後の1回を除く)
+
+    Yields:
+        DataFrame: ローソク足の情報が格納されたデータフレーム (インデックスは0から)
+    """
+    stream = pa.transcoding_input_stream(pa.input_stream(str(file)), CSV_ENCODING, "utf-8")
+    reader = csv.open_csv(
+        stream,
+        read_options=csv.ReadOptions(column_names=CANDLE_COLUMNS),
+        convert_options=csv.ConvertOptions(column_types=CANDLE_TYPES, timestamp_parsers=DATETIME_FORMATS))
+    batches = []
+    rows = 0
+    for batch in reader:
+        batches.append(batch)
+        rows += batch.num_rows
+        # 読み込んだバッチをchunk_rows行ずつに分けて返す
+        while chunk_rows <= rows:
+            table = pa.Table.from_batches(batches, schema=reader.schema)
+            yield table.slice(0, chunk_rows).to_pandas()
+            rest = table.slice(chunk_rows)
+            batches = rest.to_batches()
+            rows = rest.num_rows
+    if 0 < rows:
+        yield pa.Table.from_batches(batches, schema=reader.schema).to_pandas()
@@ -0,0 +1,45 @@
+from loader import iter_mt_csv, load_candles
+from pathlib import Path
+import pandas as pd
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_load_candles(tmp_path):
+    expect = pd.read_csv(test_data_path, parse_dates=["datetime"], dayfirst=False, encoding="utf-16le", names=[
+        "datetime", "open", "high", "low", "close", "tick", "volume"])
+    pd.testing.assert_frame_equal(expect, load_candles(test_data_path))
+
+    # 初回の読み込みでキャッシュが作成され、2回目以降はキャッシュから読み込まれること
+    pd.testing.assert_frame_equal(expect, load_candles(test_data_path, tmp_path))
+    cache_paths = list(tmp_path.glob("USDJPYDaily.csv.*.feather"))
+    assert 1 == len(cache_paths)
+    pd.testing.assert_frame_equal(expect, load_candles(test_data_path, tmp_path))
+
+
+def test_load_candles_same_name(tmp_path):
+    # 別のフォルダにある同じ名前のファイルは同じキャッシュフォルダで互いのキャッシュを削除しないこと
+    files = []
+    for folder, rows in [("a", 10), ("b", 20)]:
+        file = tmp_path / folder / "USDJPYDaily.csv"
+        file.parent.mkdir()
+        lines = Path(test_data_path).read_bytes().decode("utf-16le").splitlines(keepends=True)
+        file.write_bytes("".join(lines[:rows]).encode("utf-16le"))
+        files.append(file)
+
+    cache_dir = tmp_path / "cache"
+    for file in files:
+        load_candles(file, cache_dir)
+    assert 2 == len(list(cache_dir.glob("USDJPYDaily.csv.*.feather")))
+    assert [10, 20] == [len(load_candles(file, cache_dir)) for file in files]
+    assert 2 == len(list(cache_dir.glob("USDJPYDaily.csv.*.feather")))
+
+
+def test_iter_mt_csv():
+    expect = load_candles(test_data_path)
+    # 分割して読み込んでも一括で読み込んだ場合と同じ内容になること
+    chunks = list(iter_mt_csv(test_data_path, 50))
+    assert [50, 50, 50, 50, 33] == [len(chunk) for chunk in chunks]
+    pd.testing.assert_frame_equal(expect, pd.concat(chunks, ignore_index=True))
@@ -0,0 +1,132 @@
+"""起点計算モジュール
+"""
+
+from pandas import DataFrame
+import numpy as np
+
+# 高値更新の起点の列名 (ボトムの行に書き込む)
+ORIGIN_UP_COLUMNS = ["origin-up", "origin-up-rate", "origin-up-dist"]
+# 安値更新の起点の列名 (ピークの行に書き込む)
+ORIGIN_DOWN_COLUMNS = ["origin-down", "origin-down-rate", "origin-down-dist"]
+
+
+def calc_origins(kinds, body_min, body_max) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """高値・安値更新が行われたジグザグの起点を計算する
+
+    ジグザグの並びに対して、直前の同じ種類のジグザグと直前の逆の種類のジグザグを
+    累積最大値で求め、全ての更新を一括で判定する。
+
+    - ピークが直前のピークの実体の高値を更新した場合、直前のボトムを高値更新の起点とする
+    - ボトムが直前のボトムの実体の安値を更新した場合、直前のピークを安値更新の起点とする
+
+    Args:
+        kinds (ArrayLike): ジグザグの種類 ("peak"または"bottom")
+        body_min (ArrayLike): ジグザグのローソク足の実体の安値
+        body_max (ArrayLike): ジグザグのローソク足の実体の高値
+
+    Returns:
+        dict[str, tuple[np.ndarray, np.ndarray]]: 起点の種類ごとの(起点のジグザグの位置, 値)
+            - up: 値の形状は(起点の数, 3) (起点の価格, 更新率, 更新幅)
+            - down: 値の形状は(起点の数, 3) (起点の価格, 更新率, 更新幅)
+            同じ起点が複数回更新された場合は最後の更新の値だけを返す
+            辞書は最初に更新が見つかった種類の順に並ぶ
+    """
+    kinds = np.asarray(kinds, dtype=object)
+    body_min = np.asarray(body_min, dtype=float)
+    body_max = np.asarray(body_max, dtype=float)
+    positions = np.arange(len(kinds))
+    if len(kinds) == 0:
+        empty = (np.empty(0, dtype=np.int64), np.empty((0, 3)))
+        return {"up": empty, "down": empty}
+    is_peak = kinds == "peak"
+    is_bottom = kinds == "bottom"
+
+    def previous(mask):
+        # 直前(自身を含まない)の該当するジグザグの位置 (存在しない場合は-1)
+        latest = np.maximum.accumulate(np.where(mask, positions, -1))
+        return np.concatenate([[-1], latest[:-1]]).astype(np.int64)
+
+    last_peak = previous(is_peak)
+    last_bottom = previous(is_bottom)
+    has_both = (0 <= last_peak) & (0 <= last_bottom)
+    prev_peak = np.where(0 <= last_peak, last_peak, 0)
+    prev_bottom = np.where(0 <= last_bottom, last_bottom, 0)
+
+    events = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 高値更新: 直前のボトムの実体の安値から直前のピークを超えた比率と幅
+        up = np.flatnonzero(is_peak & has_both & (body_max[prev_peak] < body_max))
+        origin = body_min[prev_bottom[up]]
+        dist = body_max[up] - origin
+        rate = dist / (body_max[prev_peak[up]] - origin)
+        events["up"] = (up, last_bottom[up], np.column_stack([origin, rate, dist]))
+
+        # 安値更新: 直前のピークの実体の高値から直前のボトムを下回った比率と幅
+        down = np.flatnonzero(is_bottom & has_both & (body_min < body_min[prev_bottom]))
+        origin = body_max[prev_peak[down]]
+        dist = origin - body_min[down]
+        rate = dist / (origin - body_min[prev_bottom[down]])
+        events["down"] = (down, last_peak[down], np.column_stack([origin, rate, dist]))
+
+    # 最初に更新が見つかった種類から順に並べる
+    def first_event(name):
+        found = events[name][0]
+        return found[0] if 0 < len(found) else len(kinds)
+
+    origins = {}
+    for name in sorted(events, key=first_event):
+        _, targets, values = events[name]
+        origins[name] = last_write_wins(targets, values)
+    return origins
+
+
+def last_write_wins(targets: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """同じ位置への書き込みを最後の値だけにまとめる
+
+    Args:
+        targets (np.ndarray): 書き込み先の位置 (書き込んだ順)
+        values (np.ndarray): 書き込む値
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 最初に書き込まれた順に並んだ位置と最後に書き込まれた値
+    """
+    unique, first = np.unique(targets, return_index=True)
+    _, last_reversed = np.unique(targets[::-1], return_index=True)
+    last = len(targets) - 1 - last_reversed
+    order = np.argsort(first, kind='stable')
+    return unique[order], values[last[order]]
+
+
+def mark_origins(df: DataFrame, indices: list[int], kinds=None) -> DataFrame:
+    """高値・安値更新が行われたジグザグの起点をデータフレームに書き込む
+
+    列は最初に起点が見つかった種類の順に生成し、起点以外の行は既存の値を引き継ぐ
+
+    Args:
+        df (DataFrame): ジグザグ情報が書き込まれたデータフレーム
+        indices (list[int]): ジグザグのインデックス番号
+        kinds (ndarray | None): ジグザグの種類 (Noneの場合はzigzag-kindの列から取得する)
+
+    Returns:
+        DataFrame: 起点の情報が書き込まれたデータフレーム
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    open_prices = df['open'].to_numpy(dtype=float)[indices]
+    close_prices = df['close'].to_numpy(dtype=float)[indices]
+    if kinds is None:
+        kinds = df['zigzag-kind'].to_numpy(dtype=object)[indices] if 0 < len(indices) else []
+    origins = calc_origins(kinds, np.minimum(open_prices, close_prices), np.maximum(open_prices, close_prices))
+
+    # MEMO: 最初に更新が見つかった種類から列を生成する
+    names = {"up": ORIGIN_UP_COLUMNS, "down": ORIGIN_DOWN_COLUMNS}
+    columns = {}
+    for kind, (positions, values) in origins.items():
+        if len(positions) == 0:
+            continue
+        for i, name in enumerate(names[kind]):
+            column = df[name].to_numpy(dtype=float, copy=True) if name in df.columns else np.full(len(df), np.nan)
+            column[indices[positions]] = values[:, i]
+            columns[name] = column
+    if 0 < len(columns):
+        df[list(columns)] = DataFrame(columns, index=df.index)
+    return df
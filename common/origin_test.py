@@ -0,0 +1,57 @@
+from origin import mark_origins
+from zigzag import mark_zigzag, mark_zigzag2
+from loader import load_candles
+import pandas as pd
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def mark_origins_loop(df, zigzag_indices):
+    # ジグザグを1つずつ確認する (一括計算の期待値)
+    lastPeak = None
+    lastBottom = None
+    for zigzag_idx in zigzag_indices:
+        row = df.iloc[zigzag_idx]
+        kind = row['zigzag-kind']
+        if kind == "peak":
+            bodyMax = max(row['open'], row['close'])
+            if lastPeak is not None:
+                lastPeakBodyMax = max(df.loc[lastPeak, 'open'], df.loc[lastPeak, 'close'])
+                if lastPeakBodyMax < bodyMax and lastBottom is not None:
+                    origin = min(df.loc[lastBottom, 'open'], df.loc[lastBottom, 'close'])
+                    dist = (bodyMax - origin)
+                    df.loc[lastBottom, "origin-up"] = origin
+                    df.loc[lastBottom, "origin-up-rate"] = dist / (lastPeakBodyMax - origin)
+                    df.loc[lastBottom, "origin-up-dist"] = dist
+            lastPeak = zigzag_idx
+        elif kind == "bottom":
+            bodyMin = min(row['open'], row['close'])
+            if lastBottom is not None:
+                lastBottomBodyMin = min(df.loc[lastBottom, 'open'], df.loc[lastBottom, 'close'])
+                if bodyMin < lastBottomBodyMin and lastPeak is not None:
+                    origin = max(df.loc[lastPeak, 'open'], df.loc[lastPeak, 'close'])
+                    dist = origin - bodyMin
+                    df.loc[lastPeak, "origin-down"] = origin
+                    df.loc[lastPeak, "origin-down-rate"] = dist / (origin - lastBottomBodyMin)
+                    df.loc[lastPeak, "origin-down-dist"] = dist
+            lastBottom = zigzag_idx
+    return df
+
+
+def test_mark_origins():
+    # ピークとボトムが交互に並ぶ場合と、同じ種類が連続する場合(v1)
+    for mark in [mark_zigzag2, mark_zigzag]:
+        df = mark(load_candles(test_data_path))
+        zigzag_indices = df.index[df['zigzag']].tolist()
+
+        expect = mark_origins_loop(df.copy(), zigzag_indices)
+        actual = mark_origins(df.copy(), zigzag_indices)
+        pd.testing.assert_frame_equal(expect, actual)
+
+
+def test_mark_origins_empty():
+    df = load_candles(test_data_path)
+    df['zigzag'] = False
+    pd.testing.assert_frame_equal(mark_origins(df.copy(), []), df)
@@ -0,0 +1,237 @@
+"""処理時間計測モジュール
+"""
+
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable
+import cProfile
+import json
+import tempfile
+import time
+import tracemalloc
+
+# 最大RSSとRSSを取得するファイルと、最大RSSを戻すファイル (Linuxのみ)
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+class Profiler:
+    """段階ごとの処理時間とメモリ使用量を計測するクラス
+
+    無効な場合はstageが何もしないコンテキストを返すため、計測箇所を残したままでも負荷はほぼない。
+    メモリ使用量は段階ごとに最大RSSを戻して段階中の最大RSSの増加量を計測する (Linuxのみ)。
+    tracemallocとcProfileは処理を大きく遅くするため、tracemallocは指定した場合だけ詳細な計測として使用し、
+    cProfileはtargetに指定した1つの段階だけで有効にする (profile_hottestで最も時間のかかった段階を計測し直す)
+
+    Attributes:
+        enabled (bool): 計測の可否
+        label (str): 計測対象の名前 (ファイル名)
+        stats_dir (str | None): cProfileの結果を出力するフォルダのパス
+        memory (bool): tracemallocでPythonとNumPyの確保量も計測するかの可否
+        target (tuple[str, str] | None): cProfileで計測する段階 (計測対象の名前, 段階の名前)
+        records (list[dict[str, Any]]): 段階ごとの計測結果
+    """
+
+    def __init__(self, enabled: bool = False, label: str = "", stats_dir: str | None = None, memory: bool = False,
+                 target: tuple[str, str] | None = None):
+        """コンストラクタ
+
+        Args:
+            enabled (bool): 計測の可否
+            label (str): 計測対象の名前 (ファイル名)
+            stats_dir (str | None): cProfileの結果を出力するフォルダのパス
+            memory (bool): tracemallocでPythonとNumPyの確保量も計測するかの可否
+            target (tuple[str, str] | None): cProfileで計測する段階 (計測対象の名前, 段階の名前)
+        """
+        self.enabled = enabled
+        self.label = label
+        self.stats_dir = stats_dir
+        self.memory = memory
+        self.target = target
+        self.records = []
+        self._profile = None
+
+    def stage(self, name: str):
+        """段階の計測範囲を生成する
+
+        Args:
+            name (str): 段階の名前
+
+        Returns:
+            ContextManager: 計測範囲 (無効な場合は何もしない)
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name: str):
+        tracing = False
+        if self.memory:
+            # MEMO: tracemallocはPythonとNumPyの確保量を追跡する (pyarrowの確保量は含まれない)
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+
+        # MEMO: 最大RSSを段階の開始時のRSSに戻しておき、段階の終了時の最大RSSとの差を段階のメモリ使用量とする
+        rss = read_status_mb("VmRSS") if reset_peak_rss() else None
+
+        profile = cProfile.Profile() if self.stats_dir and self.target == (self.label, name) else None
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._profile = (self.label, name, profile)
+            peak = read_status_mb("VmHWM") if rss is not None else None
+            self.records.append({
+                "file": self.label,
+                "stage": name,
+                "wall": time.perf_counter() - wall,
+                "cpu": time.process_time() - cpu,
+                "peak_mb": max(0.0, peak - rss) if peak is not None else None,
+                "traced_mb": (tracemalloc.get_traced_memory()[1] - base) / (1024 * 1024) if self.memory else None,
+            })
+            if self.memory and not tracing:
+                tracemalloc.stop()
+
+    def finish(self) -> list[dict[str, Any]] | None:
+        """計測を終了して計測結果を返す
+
+        cProfileで計測した段階がある場合は"計測対象の名前.段階の名前.pstats"として出力する
+        (計測対象の名前は計測中にlabelを変更して段階ごとに切り替えられる)
+
+        Returns:
+            list[dict[str, Any]] | None: 段階ごとの計測結果 (無効な場合はNone)
+        """
+        if not self.enabled:
+            return None
+        if self._profile is not None:
+            label, name, profile = self._profile
+            stats_dir = Path(self.stats_dir)
+            stats_dir.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(stats_dir / f"{label}.{name}.pstats")
+        return self.records
+
+
+def read_status_mb(key: str) -> float | None:
+    """/proc/self/statusのメモリ使用量を取得する
+
+    Args:
+        key (str): 項目名 (VmRSS: 現在のRSS、VmHWM: 最大RSS)
+
+    Returns:
+        float | None: メモリ使用量 (MB、取得できない場合はNone)
+    """
+    try:
+        for line in PROC_STATUS.read_text().splitlines():
+            if line.startswith(f"{key}:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """現在のプロセスの最大RSSを現在のRSSに戻す (Linuxのみ)
+
+    Returns:
+        bool: 戻せた場合はTrue
+    """
+    try:
+        PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def profile_hottest(func: Callable[..., list[dict[str, Any]] | None], stats_dir: str | None, output_path: str | None,
+                    file: Path) -> list[dict[str, Any]] | None:
+    """ファイルごとの処理を計測し、最も時間のかかった段階をcProfileで計測し直す
+
+    MEMO: 段階の処理時間はcProfileを無効にして計測し、cProfileの出力先が指定された場合だけ
+          同じ処理をもう1度実行して最も時間のかかった段階だけをcProfileで計測する。
+          計測し直す実行はグラフを表示せず、出力ファイルを上書きしないように一時フォルダに出力する
+
+    Args:
+        func (Callable[..., list[dict[str, Any]] | None]): ファイルごとの処理 (引数profile_targetでcProfileで計測する段階、
+            show_graphでグラフ表示の可否、output_pathで出力先を受け取り、Profiler.finishの戻り値を返す)
+        stats_dir (str | None): cProfileの結果を出力するフォルダのパス (Noneの場合は計測し直さない)
+        output_path (str | None): 1回目の出力先フォルダのパス (Noneの場合は計測し直す実行も出力しない)
+        file (Path): 処理対象のファイルパス
+
+    Returns:
+        list[dict[str, Any]] | None: 1回目の段階ごとの計測結果 (計測しない場合はNone)
+    """
+    records = func(file, profile_target=None)
+    if stats_dir and records:
+        hottest = max(records, key=lambda record: record["wall"])
+        with tempfile.TemporaryDirectory() as temporary:
+            func(file, profile_target=(hottest["file"], hottest["stage"]), show_graph=False,
+                 output_path=temporary if output_path else None)
+    return records
+
+
+def collect_records(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """run_filesの処理結果から計測結果を集める
+
+    Args:
+        results (list[dict[str, Any]]): run_filesの処理結果 (resultがProfiler.finishの戻り値)
+
+    Returns:
+        list[dict[str, Any]]: 全てのファイルの段階ごとの計測結果
+    """
+    records = []
+    for result in results:
+        if result["error"] is None and result["result"] is not None:
+            records.extend(result["result"])
+    return records
+
+
+def print_profile(title: str, records: list[dict[str, Any]]):
+    """段階ごとの計測結果を表示する
+
+    Args:
+        title (str): 処理名
+        records (list[dict[str, Any]]): 段階ごとの計測結果 (メモリ使用量を計測していない場合は"-"を表示する)
+    """
+    def peak(value):
+        return f"{value:>12.1f}" if value is not None else f"{'-':>12}"
+
+    print(f"[{title}] profile")
+    print(f"  {'file':<24}{'stage':<12}{'wall(s)':>10}{'cpu(s)':>10}{'peak(MB)':>12}{'traced(MB)':>12}")
+    for record in records:
+        print(f"  {record['file']:<24}{record['stage']:<12}{record['wall']:>10.3f}{record['cpu']:>10.3f}"
+              f"{peak(record['peak_mb'])}{peak(record['traced_mb'])}")
+
+    # 段階ごとの合計 (メモリ使用量は最大値)
+    totals = {}
+    for record in records:
+        total = totals.setdefault(record["stage"], {"wall": 0.0, "cpu": 0.0, "peak_mb": None, "traced_mb": None})
+        total["wall"] += record["wall"]
+        total["cpu"] += record["cpu"]
+        for key in ["peak_mb", "traced_mb"]:
+            if record[key] is not None:
+                total[key] = max(total[key] or 0.0, record[key])
+    for stage, total in totals.items():
+        print(f"  {'(total)':<24}{stage:<12}{total['wall']:>10.3f}{total['cpu']:>10.3f}{peak(total['peak_mb'])}{peak(total['traced_mb'])}")
+
+
+def write_profile(output_path: str | Path, title: str, records: list[dict[str, Any]]):
+    """段階ごとの計測結果をjsonで出力する
+
+    Args:
+        output_path (str | Path): 出力ファイルのパス
+        title (str): 処理名
+        records (list[dict[str, Any]]): 段階ごとの計測結果
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, mode='w') as f:
+        json.dump({"command": title, "records": records}, f, indent=4)
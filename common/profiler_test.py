@@ -0,0 +1,77 @@
+from profiler import Profiler, collect_records, profile_hottest, reset_peak_rss
+from pathlib import Path
+import os
+
+
+def test_profiler_disabled():
+    profiler = Profiler()
+    with profiler.stage("load"):
+        pass
+    # 無効な場合は計測しないこと
+    assert profiler.finish() is None
+    assert profiler.records == []
+
+
+def test_profiler_stats(tmp_path):
+    profiler = Profiler(True, "A.csv", str(tmp_path))
+    with profiler.stage("load"):
+        sum(range(1000))
+    profiler.label = "A_H1"
+    with profiler.stage("sma"):
+        [0.0] * 100000
+
+    records = profiler.finish()
+    assert [(record["file"], record["stage"]) for record in records] == [("A.csv", "load"), ("A_H1", "sma")]
+    assert all(0.0 <= record["wall"] for record in records)
+    # 最大RSSの増加量は常に計測し、tracemallocは指定しない場合は計測せず、cProfileは対象の段階がない場合は出力しないこと
+    if reset_peak_rss():
+        assert all(0.0 <= record["peak_mb"] for record in records)
+    assert all(record["traced_mb"] is None for record in records)
+    assert os.listdir(tmp_path) == []
+
+    results = [{"error": None, "result": records}, {"error": "failed", "result": None}]
+    assert collect_records(results) == records
+
+
+def test_profiler_memory():
+    profiler = Profiler(True, "A.csv", memory=True)
+    with profiler.stage("load"):
+        values = bytearray(64 * 1024 * 1024)
+        values[::4096] = b"\x01" * len(values[::4096])
+    record = profiler.finish()[0]
+    assert 0.0 < record["traced_mb"]
+    if reset_peak_rss():
+        # 段階中に確保したメモリが最大RSSの増加量に含まれること
+        assert 32.0 < record["peak_mb"]
+
+
+def test_profile_hottest(tmp_path):
+    targets = []
+
+    def run(file, profile_target=None, show_graph=True, output_path="output"):
+        targets.append((profile_target, show_graph, output_path))
+        profiler = Profiler(True, file.name, str(tmp_path), target=profile_target)
+        with profiler.stage("load"):
+            pass
+        with profiler.stage("sma"):
+            sum(range(200000))
+        return profiler.finish()
+
+    records = profile_hottest(run, str(tmp_path), "output", Path("A.csv"))
+    # 1回目の計測結果を返し、最も時間のかかった段階だけを計測し直してpstatsを出力すること
+    hottest = max(records, key=lambda record: record["wall"])
+    assert targets[0] == (None, True, "output")
+    assert targets[1][:2] == ((hottest["file"], hottest["stage"]), False)
+    assert os.listdir(tmp_path) == [f"{hottest['file']}.{hottest['stage']}.pstats"]
+    # 計測し直す実行はグラフを表示せず、出力先と異なる一時フォルダに出力すること
+    assert targets[1][2] != "output" and not Path(targets[1][2]).exists()
+
+    # 出力先が指定されない場合は計測し直す実行も出力しないこと
+    targets.clear()
+    profile_hottest(run, str(tmp_path), None, Path("A.csv"))
+    assert targets[1][2] is None
+
+    # cProfileの出力先が指定されない場合は計測し直さないこと
+    targets.clear()
+    profile_hottest(run, None, "output", Path("A.csv"))
+    assert targets == [(None, True, "output")]
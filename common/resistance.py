@@ -0,0 +1,214 @@
+"""抵抗帯計算モジュール
+"""
+
+from typing import Iterator
+from pandas import DataFrame
+import numpy as np
+
+# 抵抗帯の上下の面積と数の名前と型
+AREA_TYPES = {
+    "over_area": float,
+    "under_area": float,
+    "over_count": np.int64,
+    "under_count": np.int64,
+    "count_overlap": np.int64,
+}
+
+
+def calc_contributions(df: DataFrame, band_names: list[str]) -> dict[str, np.ndarray]:
+    """ローソク足1本ごとの抵抗帯の上下の面積と数を計算する
+
+    抵抗帯の値が欠損しているローソク足は寄与なしとする。
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        band_names (list[str]): 抵抗帯の列名
+
+    Returns:
+        dict[str, np.ndarray]: AREA_TYPESの名前ごとの寄与 (各配列の形状は(ローソク足の数, 抵抗帯の数))
+    """
+    open_prices = df['open'].to_numpy(dtype=float)
+    close_prices = df['close'].to_numpy(dtype=float)
+    max_body = np.maximum(open_prices, close_prices)[:, np.newaxis]
+    min_body = np.minimum(open_prices, close_prices)[:, np.newaxis]
+    high = df['high'].to_numpy(dtype=float)[:, np.newaxis]
+    low = df['low'].to_numpy(dtype=float)[:, np.newaxis]
+    bands = df[band_names].to_numpy(dtype=float) if band_names else np.empty((len(df), 0))
+
+    # ローソク足1本ごとの寄与を計算する (抵抗帯が欠損している場合は寄与なし)
+    valid = ~np.isnan(bands)
+    with np.errstate(invalid='ignore'):
+        # 高値から安値の間で抵抗帯が含まれている場合
+        overlap = valid & (low <= bands) & (bands <= high)
+        # 実体の中に抵抗帯が存在している場合 (実体の一部を合算)
+        inside = valid & (min_body <= bands) & (bands <= max_body)
+        # 抵抗帯より下に実体がある (実体を全て合算)
+        under = valid & ~inside & (max_body < bands)
+        # 抵抗帯より上に実体がある (実体を全て合算)
+        over = valid & ~inside & ~under & (bands < min_body)
+        body = max_body - min_body
+        over_area = np.where(inside, max_body - bands, np.where(over, body, 0.0))
+        under_area = np.where(inside, bands - min_body, np.where(under, body, 0.0))
+
+    values = {
+        "over_area": over_area,
+        "under_area": under_area,
+        "over_count": over,
+        "under_count": under,
+        "count_overlap": overlap,
+    }
+    return {name: values[name].astype(dtype) for name, dtype in AREA_TYPES.items()}
+
+
+def calc_resistance_areas(df: DataFrame, band_names: list[str], indices: list[int], window_size: int) -> dict[str, np.ndarray]:
+    """抵抗帯の上下に存在するローソク足の実体の面積と数を計算する
+
+    ジグザグのインデックスを中心とした前後window_size本のローソク足について、
+    全てのジグザグと抵抗帯の組み合わせを一括で計算する。
+    抵抗帯の値が欠損しているローソク足は計算から除外する。
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        band_names (list[str]): 抵抗帯の列名
+        indices (list[int]): ジグザグのインデックス番号
+        window_size (int): 抵抗帯判定に使用するウインドウの幅
+
+    Returns:
+        dict[str, np.ndarray]: 抵抗帯の上下の面積と数が格納された辞書データ
+            (各配列の形状は(ジグザグの数, 抵抗帯の数))
+            - over_area: 抵抗帯より上の実体面積
+            - under_area: 抵抗帯より下の実体面積
+            - over_count: 抵抗帯より実体が上にある数
+            - under_count: 抵抗帯より実体が下にある数
+            - count_overlap: 高値から安値の間で抵抗帯が存在しているローソク足の数
+    """
+    _, areas = next(accumulate_windows(calc_contributions(df, band_names), indices, [window_size]))
+    return areas
+
+
+def sweep_resistance_areas(df: DataFrame, band_names: list[str], indices: list[int], window_sizes: list[int]) -> Iterator[tuple[int, dict[str, np.ndarray]]]:
+    """複数のウインドウの幅について抵抗帯の上下の面積と数を計算する
+
+    ローソク足1本ごとの寄与は1回だけ計算し、幅w+1のウインドウは幅wのウインドウの集計に両端の2本を加えて計算する。
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        band_names (list[str]): 抵抗帯の列名
+        indices (list[int]): ジグザグのインデックス番号
+        window_sizes (list[int]): 抵抗帯判定に使用するウインドウの幅の候補
+
+    Yields:
+        tuple[int, dict[str, np.ndarray]]: ウインドウの幅とcalc_resistance_areasと同じ集計 (幅の昇順)
+    """
+    yield from accumulate_windows(calc_contributions(df, band_names), indices, window_sizes)
+
+
+def accumulate_windows(contributions: dict[str, np.ndarray], indices: list[int], window_sizes: list[int]) -> Iterator[tuple[int, dict[str, np.ndarray]]]:
+    """ジグザグを中心としたウインドウ内の寄与を幅の昇順に集計する
+
+    幅w+1のウインドウは幅wのウインドウの両端に1本ずつ加えたものなので、中心から外側へ順に加算して集計を使い回す。
+    MEMO: 加算の順序(中心、左、右の順に外側へ)を固定しているため、同じ幅の集計は最大の幅によらずビット単位で一致する
+          (検出(detect)と一括評価(sweep)の判定を一致させるため、両方ともこの関数で集計する)
+
+    Args:
+        contributions (dict[str, np.ndarray]): calc_contributionsで計算したローソク足1本ごとの寄与
+        indices (list[int]): ジグザグのインデックス番号
+        window_sizes (list[int]): 集計するウインドウの幅
+
+    Yields:
+        tuple[int, dict[str, np.ndarray]]: ウインドウの幅と集計 (各配列の形状は(ジグザグの数, 抵抗帯の数))
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    targets = set(window_sizes)
+    if len(targets) == 0:
+        return
+    max_window = max(targets)
+
+    # ウインドウがデータの範囲外にはみ出さないように前後を寄与なしで埋める
+    padded = {name: np.pad(values, ((max_window, max_window), (0, 0))) for name, values in contributions.items()}
+    center = indices + max_window
+
+    totals = {name: values[center] for name, values in padded.items()}
+    for window_size in range(max_window + 1):
+        if 0 < window_size:
+            for name, values in padded.items():
+                totals[name] += values[center - window_size]
+                totals[name] += values[center + window_size]
+        if window_size in targets:
+            yield window_size, {name: total.copy() for name, total in totals.items()}
+
+
+def calc_resistance_ratios(areas: dict[str, np.ndarray], kinds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ジグザグの反発方向の実体面積率と判定の対象か否かを計算する
+
+    Args:
+        areas (dict[str, np.ndarray]): calc_resistance_areasで計算した抵抗帯の上下の面積と数
+        kinds (np.ndarray): ジグザグの種類 ("peak"または"bottom")
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 実体面積率と判定の対象か否かのフラグ値 (形状は(ジグザグの数, 抵抗帯の数))
+            実体面積率が閾値以上かつ判定の対象の場合に抵抗帯で反発したと判定する
+    """
+    over_area = areas["over_area"]
+    under_area = areas["under_area"]
+    all_area = over_area + under_area
+    kinds = np.asarray(kinds, dtype=object)[:, np.newaxis]
+    is_peak = kinds == "peak"
+    is_bottom = kinds == "bottom"
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # ピークは抵抗帯より下の実体面積率、ボトムは抵抗帯より上の実体面積率
+        ratios = np.where(is_peak, under_area / all_area, np.where(is_bottom, over_area / all_area, np.nan))
+
+    # 上に抵抗帯がある(ピーク)、または下に抵抗帯がある(ボトム)場合
+    eligible = (is_peak & (areas["over_count"] == 0)) | (is_bottom & (areas["under_count"] == 0))
+    # 面積がない場合 (クロスの場合) は対象外
+    eligible &= (all_area != 0.0) & (1 <= areas["count_overlap"])
+    return ratios, eligible
+
+
+def detect_resistance_points(areas: dict[str, np.ndarray], kinds: np.ndarray, threshold: float) -> np.ndarray:
+    """ジグザグが抵抗帯で反発したかを判定する
+
+    Args:
+        areas (dict[str, np.ndarray]): calc_resistance_areasで計算した抵抗帯の上下の面積と数
+        kinds (np.ndarray): ジグザグの種類 ("peak"または"bottom")
+        threshold (float): 抵抗帯面積率の閾値
+
+    Returns:
+        np.ndarray: 抵抗帯で反発したか否かのフラグ値 (形状は(ジグザグの数, 抵抗帯の数))
+    """
+    ratios, eligible = calc_resistance_ratios(areas, kinds)
+    with np.errstate(invalid='ignore'):
+        return eligible & (threshold <= ratios)
+
+
+def count_resistance_points(areas: dict[str, np.ndarray], kinds: np.ndarray, thresholds: list[float]) -> tuple[np.ndarray, np.ndarray]:
+    """複数の閾値について抵抗帯で反発したジグザグの数を数える
+
+    判定の対象の実体面積率を整列しておき、閾値ごとに二分探索で数える。
+
+    Args:
+        areas (dict[str, np.ndarray]): calc_resistance_areasで計算した抵抗帯の上下の面積と数
+        kinds (np.ndarray): ジグザグの種類 ("peak"または"bottom")
+        thresholds (list[float]): 抵抗帯面積率の閾値の候補
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 抵抗帯ごとの反発数 (形状は(閾値の数, 抵抗帯の数))と
+            いずれかの抵抗帯で反発したジグザグの数 (形状は(閾値の数,))
+    """
+    ratios, eligible = calc_resistance_ratios(areas, kinds)
+    thresholds = np.asarray(thresholds, dtype=float)
+    ratios = np.where(eligible, ratios, -np.inf)
+
+    def count(values):
+        # 閾値以上の値の数
+        ordered = np.sort(values)
+        return len(ordered) - np.searchsorted(ordered, thresholds, side='left')
+
+    per_band = np.zeros((len(thresholds), ratios.shape[1]), dtype=np.int64)
+    for band in range(ratios.shape[1]):
+        per_band[:, band] = count(ratios[:, band])
+    # いずれかの抵抗帯で反発した場合は最大の実体面積率が閾値以上になる
+    best = ratios.max(axis=1) if 0 < ratios.shape[1] else np.full(len(ratios), -np.inf)
+    return per_band, count(best)
@@ -0,0 +1,77 @@
+from resistance import calc_resistance_areas, calc_resistance_ratios, count_resistance_points, detect_resistance_points, sweep_resistance_areas
+from zigzag import mark_zigzag2
+from sma import mark_sma
+from loader import load_candles
+import numpy as np
+import pandas as pd
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_calc_resistance_areas():
+    df = load_candles(test_data_path)
+    mark_zigzag2(df)
+    mark_sma(df, [5, 20])
+    band_names = ["sma-5", "sma-20"]
+    window_size = 2
+    zigzag_indices = df.index[df['zigzag']].tolist()
+
+    areas = calc_resistance_areas(df, band_names, zigzag_indices, window_size)
+
+    # ローソク足を1本ずつ確認した結果と一致すること
+    for i, zigzag_idx in enumerate(zigzag_indices):
+        for j, band_name in enumerate(band_names):
+            expect = {"over_area": 0, "under_area": 0, "over_count": 0, "under_count": 0, "count_overlap": 0}
+            start = max(0, zigzag_idx - window_size)
+            end = min(len(df), zigzag_idx + window_size + 1)
+            for _, row in df.iloc[start:end].iterrows():
+                band = row[band_name]
+                if pd.isna(band):
+                    continue
+                if row['low'] <= band and band <= row['high']:
+                    expect["count_overlap"] += 1
+                max_body = max(row['open'], row['close'])
+                min_body = min(row['open'], row['close'])
+                if min_body <= band and band <= max_body:
+                    expect["over_area"] += (max_body - band)
+                    expect["under_area"] += (band - min_body)
+                elif max_body < band:
+                    expect["under_area"] += (max_body - min_body)
+                    expect["under_count"] += 1
+                elif band < min_body:
+                    expect["over_area"] += (max_body - min_body)
+                    expect["over_count"] += 1
+            assert expect == {name: values[i, j] for name, values in areas.items()}
+
+    found = detect_resistance_points(areas, df.loc[zigzag_indices, 'zigzag-kind'].to_numpy(), 0.8)
+    assert found.shape == (len(zigzag_indices), len(band_names))
+    assert found.any()
+
+
+def test_sweep_resistance_areas():
+    df = load_candles(test_data_path)
+    mark_zigzag2(df)
+    mark_sma(df, [5, 20])
+    band_names = ["sma-5", "sma-20"]
+    zigzag_indices = df.index[df['zigzag']].tolist()
+    zigzag_kinds = df.loc[zigzag_indices, 'zigzag-kind'].to_numpy()
+
+    window_sizes = []
+    for window_size, areas in sweep_resistance_areas(df, band_names, zigzag_indices, [3, 0, 1, 3, 7]):
+        window_sizes.append(window_size)
+        # ウインドウの幅ごとに計算した結果とビット単位で一致すること
+        expect = calc_resistance_areas(df, band_names, zigzag_indices, window_size)
+        for name in expect:
+            np.testing.assert_array_equal(areas[name], expect[name])
+
+        # 実体面積率と同じ値の閾値(判定の境界)を含めて、検出と同じ反発数になること
+        ratios, eligible = calc_resistance_ratios(expect, zigzag_kinds)
+        thresholds = sorted(set([0.5, 0.8, 1.0] + ratios[eligible & (0 < ratios)].tolist()))
+        per_band, total = count_resistance_points(areas, zigzag_kinds, thresholds)
+        for i, threshold in enumerate(thresholds):
+            found = detect_resistance_points(expect, zigzag_kinds, threshold)
+            assert per_band[i].tolist() == found.sum(axis=0).tolist()
+            assert total[i] == found.any(axis=1).sum()
+    assert window_sizes == [0, 1, 3, 7]
@@ -0,0 +1,184 @@
+"""データフレームの形式モジュール
+
+抽出結果の通常形式(全ての列がローソク足と同じ長さ)とコンパクト形式を相互に変換する。
+コンパクト形式はインジケータをfloat32で保持し、ジグザグの情報をローソク足の列ではなく
+ジグザグの点ごとの表(ピボット表)として別に保持する。
+また、抽出結果のストアからジグザグの前後だけを読み込むためのピボットインデックスを作成する。
+"""
+
+from pathlib import Path
+from pandas import DataFrame
+import numpy as np
+import pandas as pd
+
+# ローソク足の列名 (コンパクト形式でも型を変えない)
+CANDLE_COLUMNS = ["datetime", "open", "high", "low", "close", "tick", "volume"]
+# ジグザグの点ごとの列名 (通常形式のジグザグの列の並び順)
+ZIGZAG_COLUMNS = ["zigzag", "zigzag-kind", "zigzag-from", "zigzag-velocity", "zigzag-delta", "zigzag-bottom-price", "zigzag-peak-price"]
+# ジグザグの種類
+PIVOT_KINDS = ["peak", "bottom"]
+# ピボット表のローソク足のインデックス番号の列名
+PIVOT_BAR_COLUMN = "bar"
+# ピボット表のファイル名に付ける接尾辞 ("入力ファイル名.pivots.拡張子")
+PIVOT_SUFFIX = ".pivots"
+# ピボットインデックスのファイル名に付ける接尾辞と拡張子 ("入力ファイル名.pivotindex.arrow")
+PIVOT_INDEX_SUFFIX = ".pivotindex"
+PIVOT_INDEX_EXT = "arrow"
+# ピボットインデックスのジグザグの価格の列名 (ピークは実体の高値、ボトムは実体の安値)
+PIVOT_PRICE_COLUMN = "zigzag-price"
+
+
+def compact_frame(df: DataFrame) -> tuple[DataFrame, DataFrame | None]:
+    """通常形式のデータフレームをコンパクト形式に変換する
+
+    MEMO: ローソク足の4本値はジグザグの価格と比較するためfloat64のまま保持する
+
+    Args:
+        df (DataFrame): 通常形式のデータフレーム
+
+    Returns:
+        tuple[DataFrame, DataFrame | None]: ジグザグの列を除いたデータフレームとピボット表
+            (ジグザグを計算していない場合はNone)
+    """
+    columns = {}
+    for column in df.columns:
+        if column in ZIGZAG_COLUMNS:
+            continue
+        if column not in CANDLE_COLUMNS and df[column].dtype == np.float64:
+            # インジケータはfloat32で保持する
+            columns[column] = df[column].astype(np.float32)
+        else:
+            columns[column] = df[column]
+    frame = DataFrame(columns, index=df.index)
+    if 'zigzag' not in df.columns:
+        return frame, None
+
+    bars = np.flatnonzero(df['zigzag'].to_numpy(dtype=bool, na_value=False))
+
+    pivots = {PIVOT_BAR_COLUMN: bars}
+    if 'zigzag-kind' in df.columns:
+        pivots['zigzag-kind'] = pd.Categorical(df['zigzag-kind'].to_numpy(dtype=object)[bars], categories=PIVOT_KINDS)
+    if 'zigzag-from' in df.columns:
+        pivots['zigzag-from'] = pd.array(df['zigzag-from'].to_numpy(dtype=float)[bars], dtype="Int64")
+    for column in ['zigzag-velocity', 'zigzag-delta', 'zigzag-bottom-price', 'zigzag-peak-price']:
+        if column in df.columns:
+            pivots[column] = df[column].to_numpy(dtype=float)[bars]
+    return frame, DataFrame(pivots)
+
+
+def expand_frame(frame: DataFrame, pivots: DataFrame | None) -> DataFrame:
+    """コンパクト形式のデータフレームを通常形式に変換する
+
+    ジグザグの列はローソク足の列の直後に元の並び順で挿入する。
+    float32で保持したインジケータはfloat64に戻す (値はfloat32の精度のまま)。
+
+    Args:
+        frame (DataFrame): ジグザグの列を除いたデータフレーム
+        pivots (DataFrame | None): ピボット表 (Noneの場合はジグザグの列を挿入しない)
+
+    Returns:
+        DataFrame: 通常形式のデータフレーム
+    """
+    size = len(frame)
+    zigzag_columns = {}
+    if pivots is not None:
+        bars = pivots[PIVOT_BAR_COLUMN].to_numpy(dtype=np.int64)
+        zigzag = np.zeros(size, dtype=bool)
+        zigzag[bars] = True
+        zigzag_columns['zigzag'] = zigzag
+        for column in ZIGZAG_COLUMNS[1:]:
+            if column not in pivots.columns:
+                continue
+            if column == 'zigzag-kind':
+                values = np.full(size, np.nan, dtype=object)
+                values[bars] = pivots[column].to_numpy(dtype=object)
+            else:
+                values = np.full(size, np.nan)
+                values[bars] = pivots[column].to_numpy(dtype=float, na_value=np.nan)
+            zigzag_columns[column] = values
+
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        columns[column] = values.astype(np.float64) if values.dtype == np.float32 else values
+        if column == CANDLE_COLUMNS[-1]:
+            # ローソク足の列の直後にジグザグの列を挿入する
+            columns.update(zigzag_columns)
+    columns.update({column: values for column, values in zigzag_columns.items() if column not in columns})
+    return DataFrame(columns, index=frame.index)
+
+
+def pivot_index(df: DataFrame) -> DataFrame | None:
+    """ジグザグの点ごとのピボットインデックスを作成する
+
+    ピボットインデックスはローソク足のインデックス番号、日時、種類、価格、起点、速度、変化量を
+    ジグザグの点ごとに保持し、ストアからジグザグの前後のローソク足だけを読み込む時に使用する。
+
+    Args:
+        df (DataFrame): 通常形式のデータフレーム (分割したデータフレームの場合はインデックスを全体の行番号にすること)
+
+    Returns:
+        DataFrame | None: ピボットインデックス (ジグザグを計算していない場合はNone)
+    """
+    if 'zigzag' not in df.columns:
+        return None
+
+    bars = np.flatnonzero(df['zigzag'].to_numpy(dtype=bool, na_value=False))
+
+    def values(column):
+        # MEMO: 価格の列はジグザグの種類が見つかった場合だけ生成されるため、ない場合は欠損とする
+        return df[column].to_numpy(dtype=float)[bars] if column in df.columns else np.full(len(bars), np.nan)
+
+    kinds = df['zigzag-kind'].to_numpy(dtype=object)[bars]
+    return DataFrame({
+        PIVOT_BAR_COLUMN: df.index.to_numpy(dtype=np.int64)[bars],
+        'datetime': df['datetime'].to_numpy()[bars],
+        'zigzag-kind': pd.Categorical(kinds, categories=PIVOT_KINDS),
+        PIVOT_PRICE_COLUMN: np.where(kinds == "peak", values('zigzag-peak-price'), values('zigzag-bottom-price')),
+        'zigzag-from': pd.array(values('zigzag-from'), dtype="Int64"),
+        'zigzag-velocity': values('zigzag-velocity'),
+        'zigzag-delta': values('zigzag-delta'),
+    })
+
+
+def pivot_path(file: Path) -> Path:
+    """抽出結果のファイルに対応するピボット表のファイルパスを取得する
+
+    Args:
+        file (Path): 抽出結果のファイルパス (gzip圧縮を含む)
+
+    Returns:
+        Path: ピボット表のファイルパス ("入力ファイル名.pivots.拡張子")
+    """
+    file = Path(file)
+    if file.suffix == ".gz":
+        return file.with_name(f"{Path(file.stem).stem}{PIVOT_SUFFIX}{Path(file.stem).suffix}.gz")
+    return file.with_name(f"{file.stem}{PIVOT_SUFFIX}{file.suffix}")
+
+
+def pivot_index_path(file: Path) -> Path:
+    """抽出結果のファイルに対応するピボットインデックスのファイルパスを取得する
+
+    Args:
+        file (Path): 抽出結果のファイルパス (gzip圧縮を含む)
+
+    Returns:
+        Path: ピボットインデックスのファイルパス ("入力ファイル名.pivotindex.arrow")
+    """
+    file = Path(file)
+    stem = Path(file.stem).stem if file.suffix == ".gz" else file.stem
+    return file.with_name(f"{stem}{PIVOT_INDEX_SUFFIX}.{PIVOT_INDEX_EXT}")
+
+
+def is_pivot_file(file: Path) -> bool:
+    """ピボット表またはピボットインデックスのファイルか判定する
+
+    Args:
+        file (Path): ファイルパス
+
+    Returns:
+        bool: ピボット表またはピボットインデックスのファイルの場合はTrue
+    """
+    file = Path(file)
+    stem = Path(file.stem).stem if file.suffix == ".gz" else file.stem
+    return stem.endswith(PIVOT_SUFFIX) or stem.endswith(PIVOT_INDEX_SUFFIX)
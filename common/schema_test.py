@@ -0,0 +1,69 @@
+from schema import compact_frame, expand_frame, is_pivot_file, pivot_index, pivot_index_path, pivot_path
+from loader import load_candles
+from sma import mark_sma
+from ichimoku import mark_ichimoku
+from zigzag import mark_zigzag2
+from pathlib import Path
+import numpy as np
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_compact_frame():
+    df = mark_ichimoku(mark_sma(mark_zigzag2(load_candles(test_data_path)), [20]))
+    frame, pivots = compact_frame(df)
+
+    # ジグザグの列はピボット表に移り、インジケータはfloat32になること
+    assert not any(column.startswith("zigzag") for column in frame.columns)
+    assert frame["sma-20"].dtype == np.float32
+    assert frame["close"].dtype == np.float64
+    assert len(pivots) == df["zigzag"].sum()
+    assert pivots["zigzag-kind"].dtype == "category"
+    assert str(pivots["zigzag-from"].dtype) == "Int64"
+
+    # 通常形式に戻すと列の並びと値が一致すること
+    expanded = expand_frame(frame, pivots)
+    assert list(expanded.columns) == list(df.columns)
+    np.testing.assert_array_equal(expanded["zigzag"].to_numpy(), df["zigzag"].to_numpy())
+    for column in ["zigzag-from", "zigzag-peak-price", "zigzag-bottom-price"]:
+        np.testing.assert_array_equal(expanded[column].to_numpy(dtype=float), df[column].to_numpy(dtype=float))
+    np.testing.assert_allclose(expanded["sma-20"], df["sma-20"], rtol=1e-6)
+
+
+def test_compact_frame_without_zigzag():
+    frame, pivots = compact_frame(mark_sma(load_candles(test_data_path), [20]))
+    assert pivots is None
+    assert list(expand_frame(frame, pivots).columns) == list(frame.columns)
+
+
+def test_pivot_path():
+    assert pivot_path(Path("out/A.json")) == Path("out/A.pivots.json")
+    assert pivot_path(Path("out/A.csv.gz")) == Path("out/A.pivots.csv.gz")
+    assert is_pivot_file(Path("out/A.pivots.csv.gz"))
+    assert not is_pivot_file(Path("out/A.json"))
+
+
+def test_pivot_index():
+    df = mark_zigzag2(load_candles(test_data_path))
+    index = pivot_index(df)
+
+    # ジグザグの点ごとにインデックス番号、日時、価格を保持すること
+    bars = np.flatnonzero(df["zigzag"].to_numpy(dtype=bool))
+    np.testing.assert_array_equal(index["bar"].to_numpy(), bars)
+    np.testing.assert_array_equal(index["datetime"].to_numpy(), df["datetime"].to_numpy()[bars])
+    prices = np.where(df["zigzag-kind"].to_numpy(dtype=object)[bars] == "peak",
+                      df["zigzag-peak-price"].to_numpy(dtype=float)[bars], df["zigzag-bottom-price"].to_numpy(dtype=float)[bars])
+    np.testing.assert_array_equal(index["zigzag-price"].to_numpy(), prices)
+
+    # 分割したデータフレームはインデックスを全体の行番号として扱うこと
+    part = df.iloc[100:200]
+    np.testing.assert_array_equal(pivot_index(part)["bar"].to_numpy(), bars[(100 <= bars) & (bars < 200)])
+    assert pivot_index(mark_sma(load_candles(test_data_path), [20])) is None
+
+
+def test_pivot_index_path():
+    assert pivot_index_path(Path("out/A.arrow")) == Path("out/A.pivotindex.arrow")
+    assert pivot_index_path(Path("out/A.json.gz")) == Path("out/A.pivotindex.arrow")
+    assert is_pivot_file(Path("out/A.pivotindex.arrow"))
@@ -1,6 +1,19 @@
-"""単純移動平均線計算モジュール
+"""移動平均線計算モジュール
+
+単純移動平均線(SMA)、指数平滑移動平均線(EMA)、加重移動平均線(WMA)を
+複数の本数についてまとめて計算する。
 """
-from pandas import DataFrame
+from collections import deque
+from typing import Any, Mapping
+from pandas import DataFrame, Series
+from numpy.lib.stride_tricks import sliding_window_view
+import math
+import numpy as np
+
+# 移動平均線の種類 (列名の接頭辞)
+AVERAGE_KINDS = ["sma", "ema", "wma"]
+# 加重移動平均線の加重合計を直接計算し直す間隔 (本数)
+WEIGHTED_BLOCK = 1024
 
 
 def mark_sma(df: DataFrame, averages: list[int]) -> DataFrame:
@@ -8,11 +21,213 @@ def mark_sma(df: DataFrame, averages: list[int]) -> DataFrame:
 
     Args:
         df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        averages (list[int]): SMAの数値
 
     Returns:
         DataFrame: 単純移動平均線が書き込まれたデータフレーム
     """
-    for average in (averages if averages is not None else []):
-        df[f'sma-{average}'] = df['close'].rolling(
-            window=average, min_periods=average).mean()
+    return mark_moving_averages(df, averages, "sma")
+
+
+def mark_moving_averages(df: DataFrame, averages: list[int], kind: str = "sma") -> DataFrame:
+    """移動平均線をデータフレームに書き込む (列名は"種類-本数")
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        averages (list[int]): 平均する本数
+        kind (str): 移動平均線の種類 (sma, ema, wma)
+
+    Returns:
+        DataFrame: 移動平均線が書き込まれたデータフレーム
+    """
+    for name, values in calc_moving_averages(df['close'], averages, kind).items():
+        df[name] = values
     return df
+
+
+def calc_moving_averages(close: Series, averages: list[int], kind: str = "sma") -> DataFrame:
+    """移動平均線を複数の本数についてまとめて計算する
+
+    MEMO: 全ての本数の結果を1つの2次元配列に書き込み、列はその配列を共有する
+          (データフレームに書き込んでも本数ごとの配列は複製されない)
+
+    Args:
+        close (Series): 終値
+        averages (list[int]): 平均する本数
+        kind (str): 移動平均線の種類 (sma, ema, wma)
+
+    Returns:
+        DataFrame: 移動平均線 (列名は"種類-本数"、本数が足りない位置はnan)
+
+    Raises:
+        ValueError: 移動平均線の種類または本数が不正な場合
+    """
+    if kind not in AVERAGE_KINDS:
+        raise ValueError(f"invalid kind: {kind}")
+    averages = [int(average) for average in (averages if averages is not None else [])]
+    if any(average < 1 for average in averages):
+        raise ValueError(f"invalid averages: {averages}")
+
+    values = close.to_numpy(dtype=np.float64)
+    # 行が本数、列がローソク足の配列 (DataFrameの列として連続した領域になる)
+    block = np.full((len(averages), len(values)), np.nan)
+    if kind == "ema":
+        for row, average in zip(block, averages):
+            # MEMO: 指数平滑は直前の値に依存するためpandasの逐次計算を使う (平均する本数に達するまではnan)
+            row[:] = close.ewm(span=average, adjust=False, min_periods=average).mean().to_numpy()
+    elif np.isnan(values).any():
+        # MEMO: 欠損値を含む場合は累積和が以降の全ての値に伝播するため本数ごとにローリング計算する
+        for row, average in zip(block, averages):
+            rolling = close.rolling(window=average, min_periods=average)
+            if kind == "sma":
+                row[:] = rolling.mean().to_numpy()
+            else:
+                weights = np.arange(1, average + 1) / (average * (average + 1) / 2)
+                row[:] = rolling.apply(lambda window: np.dot(window, weights), raw=True).to_numpy()
+    else:
+        prefix = compensated_cumsum(values)
+        upper = float(values.max()) if 0 < len(values) and 0.0 <= values.min() else None
+        for row, average in zip(block, averages):
+            if len(values) < average:
+                continue
+            if kind == "sma":
+                window_sums(prefix, average, out=row[average - 1:], upper=upper)
+                row[average - 1:] /= average
+            else:
+                row[average - 1:] = weighted_window_sums(values, prefix, average, upper) / (average * (average + 1) / 2)
+    return DataFrame(block.T, index=close.index, columns=[f'{kind}-{average}' for average in averages], copy=False)
+
+
+def compensated_cumsum(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """丸め誤差を補正した累積和を計算する
+
+    累積和の各加算で失われた誤差をTwoSumで求めて別に累積する。
+    区間の合計は(上位の差 + 補正値の差)で求めるため、系列が長くても誤差が蓄積しない。
+
+    Args:
+        values (np.ndarray): 系列 (欠損値を含まないこと)
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 累積和と補正値 (先頭に0を加えたlen(values) + 1個の配列)
+    """
+    high = np.zeros(len(values) + 1)
+    np.cumsum(values, out=high[1:])
+    # MEMO: high[i] = fl(high[i-1] + values[i-1]) の誤差 (TwoSum)
+    previous = high[:-1]
+    rounded = high[1:] - previous
+    errors = (previous - (high[1:] - rounded)) + (values - rounded)
+    low = np.zeros(len(values) + 1)
+    np.cumsum(errors, out=low[1:])
+    return high, low
+
+
+def window_sums(prefix: tuple[np.ndarray, np.ndarray], average: int, out: np.ndarray | None = None,
+                upper: float | None = None) -> np.ndarray:
+    """直近average本の合計を計算する
+
+    Args:
+        prefix (tuple[np.ndarray, np.ndarray]): compensated_cumsumの結果
+        average (int): 合計する本数
+        out (np.ndarray | None): 結果を書き込む配列 (Noneの場合は新しく確保する)
+        upper (float | None): 系列の最大値 (系列が負の値を含む場合はNone)
+
+    Returns:
+        np.ndarray: average本目以降の合計 (len(values) - average + 1個)
+    """
+    high, low = prefix
+    later, earlier = high[average:], high[:-average]
+    sums = np.subtract(later, earlier, out=out)
+
+    # MEMO: 累積和の差は2つの値が2倍以内なら丸め誤差なく計算できる (Sterbenzの補題)。
+    #       それ以外の位置は差の丸め誤差をTwoSumで求めて補正値に加え、計算を始める位置によって結果が変わらないようにする
+    #       (分割・差分計算でも一括計算と同じ値になる)。
+    #       負の値を含まない系列は累積和が単調増加するため、累積和が合計の上限の2倍を超えた位置からは補正しない
+    head = len(sums) if upper is None else int(np.searchsorted(earlier, 2.0 * average * upper, side="left"))
+    corrections = np.subtract(low[average:], low[:-average])
+    if 0 < head:
+        # 一時配列を増やさないように作業用の配列に上書きしながら計算する
+        later, earlier, difference = later[:head], earlier[:head], sums[:head]
+        rounded = np.subtract(difference, later)
+        errors = np.subtract(difference, rounded)
+        np.subtract(later, errors, out=errors)
+        rounded += earlier
+        errors -= rounded
+        corrections[:head] += errors
+    sums += corrections
+    return sums
+
+
+def weighted_window_sums(values: np.ndarray, prefix: tuple[np.ndarray, np.ndarray], average: int, upper: float | None = None,
+                         block: int = WEIGHTED_BLOCK) -> np.ndarray:
+    """直近average本の加重合計(新しい順にaverage, average-1, ..., 1倍)を計算する
+
+    1本進むと加重合計は average * 新しい終値 - 直前のaverage本の合計 だけ変わるため、その変化量を累積する。
+    MEMO: 変化量の丸め誤差が蓄積しないようにblock本ごとに加重合計を直接計算して累積し直す
+
+    Args:
+        values (np.ndarray): 系列 (欠損値を含まないこと)
+        prefix (tuple[np.ndarray, np.ndarray]): compensated_cumsumの結果
+        average (int): 合計する本数
+        upper (float | None): 系列の最大値 (系列が負の値を含む場合はNone)
+        block (int): 加重合計を直接計算する間隔
+
+    Returns:
+        np.ndarray: average本目以降の加重合計 (len(values) - average + 1個)
+    """
+    count = len(values) - average + 1
+    rows = -(-count // block)
+    steps = np.zeros(rows * block)
+    steps[1:count] = average * values[average:] - window_sums(prefix, average, upper=upper)[:-1]
+    starts = np.arange(0, count, block)
+    steps[starts] = sliding_window_view(values, average)[starts] @ np.arange(1, average + 1, dtype=np.float64)
+    return np.cumsum(steps.reshape(rows, block), axis=1).reshape(-1)[:count]
+
+
+class StreamingSma:
+    """単純移動平均線を1本ずつ計算するクラス
+
+    直近averageに含まれる終値とその合計を保持し、ローソク足が追加されるたびに
+    窓に入った終値を加算して窓から外れた終値を減算する (1本あたりO(1))
+
+    Attributes:
+        average (int): SMAの数値
+        name (str): 列名
+    """
+
+    def __init__(self, average: int):
+        """コンストラクタ
+
+        Args:
+            average (int): SMAの数値
+        """
+        self.average = average
+        self.name = f'sma-{average}'
+        self._closes = deque()
+        self._sum = 0.0
+        # MEMO: 加算と減算を繰り返すと丸め誤差が蓄積するため補正値を保持する (カハンの加算)
+        self._compensation = 0.0
+
+    def _add(self, value: float):
+        y = value - self._compensation
+        t = self._sum + y
+        self._compensation = (t - self._sum) - y
+        self._sum = t
+
+    def update(self, bar: Mapping[str, Any]) -> dict[str, float]:
+        """ローソク足を1本追加して単純移動平均線を計算する
+
+        Args:
+            bar (Mapping[str, Any]): ローソク足の情報 (close)
+
+        Returns:
+            dict[str, float]: 列名と単純移動平均線の値 (本数が足りない場合はnan)
+        """
+        close = float(bar['close'])
+        self._closes.append(close)
+        self._add(close)
+        if self.average < len(self._closes):
+            self._add(-self._closes.popleft())
+
+        if len(self._closes) < self.average:
+            return {self.name: math.nan}
+        return {self.name: self._sum / self.average}
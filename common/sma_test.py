@@ -0,0 +1,72 @@
+from sma import StreamingSma, calc_moving_averages, mark_sma
+from loader import load_candles
+import numpy as np
+import pandas as pd
+import pytest
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_streaming_sma():
+    df = mark_sma(load_candles(test_data_path), [1, 5, 20])
+
+    for average in [1, 5, 20]:
+        sma = StreamingSma(average)
+        values = np.array([sma.update(bar)[f'sma-{average}'] for bar in df.to_dict('records')])
+        # 1本ずつ計算した結果がmark_smaと一致すること
+        np.testing.assert_allclose(values, df[f'sma-{average}'].to_numpy(), rtol=1e-12)
+
+
+def test_calc_moving_averages():
+    close = load_candles(test_data_path)['close']
+    averages = [1, 5, 20, 75]
+
+    sma = calc_moving_averages(close, averages, "sma")
+    wma = calc_moving_averages(close, averages, "wma")
+    ema = calc_moving_averages(close, averages, "ema")
+    for average in averages:
+        # 累積和から求めた値がローリング計算と一致すること
+        expected = close.rolling(window=average, min_periods=average).mean()
+        np.testing.assert_allclose(sma[f'sma-{average}'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+        weights = np.arange(1, average + 1)
+        expected = close.rolling(window=average).apply(lambda window: np.dot(window, weights) / weights.sum(), raw=True)
+        np.testing.assert_allclose(wma[f'wma-{average}'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+        expected = close.ewm(span=average, adjust=False, min_periods=average).mean()
+        np.testing.assert_allclose(ema[f'ema-{average}'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+    # 全ての本数の列が1つの2次元配列を共有すること
+    block = sma.to_numpy()
+    assert all(np.shares_memory(sma[f'sma-{average}'].to_numpy(), block) for average in averages)
+
+
+def test_calc_moving_averages_drift():
+    # 価格の大きい長い系列でも累積和の丸め誤差が蓄積しないこと
+    rng = np.random.default_rng(0)
+    close = pd.Series(1.0e6 + np.cumsum(rng.normal(0.0, 1.0, 200000)))
+    sma = calc_moving_averages(close, [3], "sma")['sma-3'].to_numpy()
+    wma = calc_moving_averages(close, [3], "wma")['wma-3'].to_numpy()
+    values = close.to_numpy()
+    for index in [2, 100000, 199999]:
+        window = values[index - 2:index + 1]
+        assert sma[index] == pytest.approx(window.sum() / 3, rel=1e-15)
+        assert wma[index] == pytest.approx(np.dot(window, [1, 2, 3]) / 6, rel=1e-14)
+
+
+def test_calc_moving_averages_nan():
+    close = load_candles(test_data_path)['close'].copy()
+    close.iloc[100] = np.nan
+    # 欠損値を含む場合は欠損値を含む窓だけがnanになること
+    for kind in ["sma", "wma"]:
+        values = calc_moving_averages(close, [5], kind)[f'{kind}-5'].to_numpy()
+        assert np.isnan(values[100:105]).all()
+        assert not np.isnan(values[4:100]).any()
+        assert not np.isnan(values[105:]).any()
+
+    with pytest.raises(ValueError):
+        calc_moving_averages(close, [5], "hma")
+    with pytest.raises(ValueError):
+        calc_moving_averages(close, [0], "sma")
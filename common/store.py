@@ -0,0 +1,177 @@
+"""ローソク足ストア読み込みモジュール
+
+抽出結果を保存した非圧縮のArrow IPCファイル(拡張子arrow、writer.write_arrowで出力する)をメモリマップで読み込む。
+ファイルは一定の行数ごとのレコードバッチに分かれているため、日時の範囲または行番号を指定した場合は
+それらを含むバッチだけを参照する (範囲外のページは読み込まれず、ファイル全体をメモリ上に展開しない)。
+"""
+
+from pathlib import Path
+from pandas import DataFrame
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# ストアの拡張子
+STORE_EXT = "arrow"
+# 日時の列名 (昇順に並んでいること)
+DATETIME_COLUMN = "datetime"
+
+
+def read_store(file: str | Path, start=None, end=None) -> tuple[DataFrame, int]:
+    """ストアをメモリマップで読み込む
+
+    Args:
+        file (str | Path): ストアのファイルパス
+        start (str | datetime | None): 読み込む範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 読み込む範囲の終了日時 (Noneの場合は末尾まで、終了日時を含む)
+
+    Returns:
+        tuple[DataFrame, int]: 範囲内のデータフレーム(インデックスは0から)と先頭の行のストア内の行番号
+    """
+    with pa.memory_map(str(file), "r") as source:
+        reader = ipc.open_file(source)
+        if start is None and end is None:
+            return reader.read_all().to_pandas(), 0
+        offsets = batch_offsets(reader)
+        first, last = row_range(reader, offsets, start, end)
+        return slice_batches(reader, offsets, first, last).to_pandas(), first
+
+
+def locate_store(file: str | Path, start=None, end=None) -> tuple[int, int]:
+    """日時の範囲に含まれる行番号の範囲を取得する
+
+    Args:
+        file (str | Path): ストアのファイルパス
+        start (str | datetime | None): 範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 範囲の終了日時 (Noneの場合は末尾まで、終了日時を含む)
+
+    Returns:
+        tuple[int, int]: 範囲の先頭の行番号と末尾の次の行番号
+    """
+    with pa.memory_map(str(file), "r") as source:
+        reader = ipc.open_file(source)
+        return row_range(reader, batch_offsets(reader), start, end)
+
+
+def read_store_rows(file: str | Path, rows) -> DataFrame:
+    """指定した行番号の行だけをメモリマップで読み込む
+
+    MEMO: 行を含まないバッチは参照しないため、まばらな行を読み込む場合はファイル全体を読み込むより速い
+
+    Args:
+        file (str | Path): ストアのファイルパス
+        rows (ArrayLike): 読み込む行番号 (昇順で重複がないこと)
+
+    Returns:
+        DataFrame: 指定した行番号の順に並んだデータフレーム (インデックスは0から)
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    with pa.memory_map(str(file), "r") as source:
+        reader = ipc.open_file(source)
+        offsets = batch_offsets(reader)
+        # 行番号ごとのバッチの番号
+        owners = np.searchsorted(offsets, rows, side="right") - 1
+        batches = []
+        for index in np.unique(owners).tolist():
+            batches.append(reader.get_batch(index).take(pa.array(rows[owners == index] - offsets[index])))
+        if len(batches) == 0 and 0 < reader.num_record_batches:
+            # MEMO: 行がない場合もカテゴリの種類を保持するためバッチを0行にして使う
+            batches.append(reader.get_batch(0).slice(0, 0))
+        return pa.Table.from_batches(batches, schema=reader.schema).to_pandas()
+
+
+def batch_offsets(reader: ipc.RecordBatchFileReader) -> list[int]:
+    """バッチごとの先頭の行番号を取得する
+
+    Args:
+        reader (RecordBatchFileReader): ストアの読み込みクラス
+
+    Returns:
+        list[int]: バッチごとの先頭の行番号 (末尾は全体の行数)
+    """
+    offsets = [0]
+    for index in range(reader.num_record_batches):
+        offsets.append(offsets[-1] + reader.get_batch(index).num_rows)
+    return offsets
+
+
+def row_range(reader: ipc.RecordBatchFileReader, offsets: list[int], start, end) -> tuple[int, int]:
+    """日時の範囲に含まれる行番号の範囲を二分探索する
+
+    Args:
+        reader (RecordBatchFileReader): ストアの読み込みクラス
+        offsets (list[int]): バッチごとの先頭の行番号 (末尾は全体の行数)
+        start (str | datetime | None): 範囲の開始日時 (Noneの場合は先頭から)
+        end (str | datetime | None): 範囲の終了日時 (Noneの場合は末尾まで、終了日時を含む)
+
+    Returns:
+        tuple[int, int]: 範囲の先頭の行番号と末尾の次の行番号
+    """
+    first = 0 if start is None else search(reader, offsets, start, "left")
+    last = offsets[-1] if end is None else max(first, search(reader, offsets, end, "right"))
+    return first, last
+
+
+def search(reader: ipc.RecordBatchFileReader, offsets: list[int], value, side: str) -> int:
+    """日時を挿入する行番号を二分探索する (numpy.searchsortedと同じ)
+
+    バッチの末尾の日時で挿入するバッチを絞り込み、そのバッチの中だけを探索する
+
+    Args:
+        reader (RecordBatchFileReader): ストアの読み込みクラス
+        offsets (list[int]): バッチごとの先頭の行番号 (末尾は全体の行数)
+        value (str | datetime): 探索する日時
+        side (str): 同じ日時がある場合に左右どちらに挿入するか (left, right)
+
+    Returns:
+        int: 日時を挿入する行番号
+    """
+    value = pd.Timestamp(value).to_datetime64()
+    low, high = 0, reader.num_record_batches
+    while low < high:
+        middle = (low + high) // 2
+        last = datetimes(reader.get_batch(middle))[-1]
+        if last < value or (side == "right" and last == value):
+            low = middle + 1
+        else:
+            high = middle
+    if low == reader.num_record_batches:
+        return offsets[-1]
+    return offsets[low] + int(np.searchsorted(datetimes(reader.get_batch(low)), value, side=side))
+
+
+def datetimes(batch: pa.RecordBatch) -> np.ndarray:
+    """バッチの日時の列をメモリマップを参照したまま取り出す
+
+    Args:
+        batch (RecordBatch): レコードバッチ
+
+    Returns:
+        ndarray: 日時 (datetime64)
+    """
+    return batch.column(DATETIME_COLUMN).to_numpy()
+
+
+def slice_batches(reader: ipc.RecordBatchFileReader, offsets: list[int], first: int, last: int) -> pa.Table:
+    """行番号の範囲を含むバッチだけを取り出す
+
+    Args:
+        reader (RecordBatchFileReader): ストアの読み込みクラス
+        offsets (list[int]): バッチごとの先頭の行番号 (末尾は全体の行数)
+        first (int): 範囲の先頭の行番号
+        last (int): 範囲の末尾の次の行番号
+
+    Returns:
+        Table: 範囲内の行
+    """
+    batches = []
+    for index in range(reader.num_record_batches):
+        begin, end = offsets[index], offsets[index + 1]
+        if end <= first or last <= begin:
+            continue
+        batches.append(reader.get_batch(index).slice(max(first, begin) - begin, min(last, end) - max(first, begin)))
+    if len(batches) == 0 and 0 < reader.num_record_batches:
+        # MEMO: 範囲が空の場合もカテゴリの種類を保持するためバッチを0行にして使う
+        batches.append(reader.get_batch(0).slice(0, 0))
+    return pa.Table.from_batches(batches, schema=reader.schema)
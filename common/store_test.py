@@ -0,0 +1,62 @@
+from store import locate_store, read_store, read_store_rows
+from writer import write_arrow, write_dataframe
+from zigzag import mark_zigzag2
+from loader import load_candles
+import pandas as pd
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_read_store(tmp_path):
+    df = mark_zigzag2(load_candles(test_data_path))
+    output_full_path = write_dataframe(df, tmp_path, "USDJPYDaily", "arrow")
+    assert output_full_path == tmp_path / "USDJPYDaily.arrow"
+
+    # 型を再推論せずに読み込めること
+    frame, first = read_store(output_full_path)
+    pd.testing.assert_frame_equal(df, frame)
+    assert first == 0
+
+
+def test_read_store_range(tmp_path):
+    df = mark_zigzag2(load_candles(test_data_path))
+    # バッチの境界をまたぐ範囲を読み込めるように小さいバッチで書き込む
+    file = tmp_path / "USDJPYDaily.arrow"
+    write_arrow(df, file, batch_rows=16)
+
+    datetimes = df['datetime']
+    ranges = [
+        (datetimes[10], datetimes[100]),
+        (datetimes[15], datetimes[16]),
+        (datetimes[16], None),
+        (None, datetimes[31]),
+        (datetimes[40] + pd.Timedelta(hours=1), datetimes[50] - pd.Timedelta(hours=1)),
+        (datetimes.iloc[-1] + pd.Timedelta(days=1), None),
+        (None, datetimes[0] - pd.Timedelta(days=1)),
+    ]
+    for start, end in ranges:
+        frame, first = read_store(file, start, end)
+        # 範囲は開始日時と終了日時を含み、インデックスは0から振り直されること
+        lower = 0 if start is None else int((datetimes < start).sum())
+        upper = len(df) if end is None else int((datetimes <= end).sum())
+        pd.testing.assert_frame_equal(df.iloc[lower:max(lower, upper)].reset_index(drop=True), frame)
+        assert first == lower
+
+
+def test_read_store_rows(tmp_path):
+    df = mark_zigzag2(load_candles(test_data_path))
+    file = tmp_path / "USDJPYDaily.arrow"
+    write_arrow(df, file, batch_rows=16)
+
+    # バッチの境界をまたぐまばらな行を読み込めること
+    for rows in [[0, 1, 15, 16, 17, 100, len(df) - 1], list(range(30, 50)), []]:
+        pd.testing.assert_frame_equal(df.iloc[rows].reset_index(drop=True), read_store_rows(file, rows))
+
+    # 日時の範囲の行番号はread_storeの先頭の行番号と行数に一致すること
+    datetimes = df['datetime']
+    start, end = datetimes[10], datetimes[100]
+    frame, first = read_store(file, start, end)
+    assert locate_store(file, start, end) == (first, first + len(frame))
+    assert locate_store(file) == (0, len(df))
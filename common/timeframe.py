@@ -0,0 +1,131 @@
+"""時間足変換モジュール
+"""
+
+from pandas import DataFrame
+from pandas.tseries.frequencies import to_offset
+import pandas as pd
+
+# MT4,5の時間足とpandasのリサンプリングの周期
+TIMEFRAMES = {
+    "M1": "1min",
+    "M5": "5min",
+    "M15": "15min",
+    "M30": "30min",
+    "H1": "1h",
+    "H4": "4h",
+    "D1": "1D",
+    # MEMO: MT4,5の週足は日曜日に始まる
+    "W1": "W-SUN",
+    "MN1": "MS",
+}
+
+# 時間足の長さ (時間足の大小の比較に使用する)
+TIMEFRAME_LENGTHS = {
+    "M1": pd.Timedelta(minutes=1),
+    "M5": pd.Timedelta(minutes=5),
+    "M15": pd.Timedelta(minutes=15),
+    "M30": pd.Timedelta(minutes=30),
+    "H1": pd.Timedelta(hours=1),
+    "H4": pd.Timedelta(hours=4),
+    "D1": pd.Timedelta(days=1),
+    "W1": pd.Timedelta(weeks=1),
+    "MN1": pd.Timedelta(days=28),
+}
+
+# 4本値と出来高の集計方法
+AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "tick": "sum",
+    "volume": "sum",
+}
+
+
+def validate_timeframes(base_timeframe: str, timeframes: list[str]) -> str | None:
+    """変換元と変換先の時間足を検査する
+
+    Args:
+        base_timeframe (str): 入力ファイルの時間足
+        timeframes (list[str]): 変換先の時間足
+
+    Returns:
+        str | None: 不正な時間足 (全て正しい場合はNone)
+    """
+    if base_timeframe not in TIMEFRAMES:
+        return base_timeframe
+    for timeframe in timeframes:
+        # 入力ファイルより短い時間足には変換できない
+        if timeframe not in TIMEFRAMES or TIMEFRAME_LENGTHS[timeframe] < TIMEFRAME_LENGTHS[base_timeframe]:
+            return timeframe
+    return None
+
+
+def resample_candles(df: DataFrame, timeframe: str) -> DataFrame:
+    """ローソク足を長い時間足に変換する
+
+    始値は最初、高値は最大、安値は最小、終値は最後の値とし、ティック数と出来高は合計する。
+    ローソク足が存在しない期間(休場日など)は出力しない。
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        timeframe (str): 変換先の時間足 (TIMEFRAMESのキー)
+
+    Returns:
+        DataFrame: 変換後のローソク足の情報が格納されたデータフレーム
+    """
+    resampled = df.set_index("datetime").resample(TIMEFRAMES[timeframe], closed="left", label="left").agg(
+        {name: method for name, method in AGGREGATIONS.items() if name in df.columns})
+    resampled = resampled[resampled["open"].notna()]
+    # 集計で型が変わらないように元の型に戻す
+    resampled = resampled.astype({name: df[name].dtype for name in resampled.columns})
+    return resampled.reset_index()[df.columns.intersection(["datetime", *AGGREGATIONS])]
+
+
+def resample_timeframes(df: DataFrame, base_timeframe: str, timeframes: list[str]) -> dict[str, DataFrame]:
+    """ローソク足を複数の時間足に変換する
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        base_timeframe (str): 入力ファイルの時間足
+        timeframes (list[str]): 変換先の時間足
+
+    Returns:
+        dict[str, DataFrame]: 時間足ごとのローソク足 (入力ファイルと同じ時間足は変換せずにコピーする)
+    """
+    frames = {}
+    for timeframe in dict.fromkeys(timeframes):
+        if timeframe == base_timeframe:
+            frames[timeframe] = df.copy()
+        else:
+            frames[timeframe] = resample_candles(df, timeframe)
+    return frames
+
+
+def merge_higher_timeframe(df: DataFrame, higher: DataFrame, timeframe: str, columns: list[str]) -> DataFrame:
+    """上位足の列をローソク足に結合する
+
+    上位足の値はその足が確定した時刻(次の足の開始時刻)以降のローソク足に前方補完で結合する。
+    どちらも日時の昇順に並んでいるため、日時のas-of結合で1回だけ位置合わせを行う。
+    結合した列名は"列名@時間足"とする。
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        higher (DataFrame): 上位足のデータフレーム
+        timeframe (str): 上位足の時間足 (TIMEFRAMESのキー)
+        columns (list[str]): 結合する上位足の列名
+
+    Returns:
+        DataFrame: 上位足の列が結合されたデータフレーム
+    """
+    left = pd.DataFrame({"datetime": pd.to_datetime(df["datetime"]).astype("datetime64[ns]").to_numpy()})
+    right = higher[columns].reset_index(drop=True)
+    # MEMO: 足の開始時刻で結合すると確定前の値を参照するため、確定した時刻で結合する
+    closed = pd.to_datetime(higher["datetime"]).astype("datetime64[ns]") + to_offset(TIMEFRAMES[timeframe])
+    right.insert(0, "datetime", closed.to_numpy())
+    merged = pd.merge_asof(left, right, on="datetime", direction="backward")
+
+    df[[f"{name}@{timeframe}" for name in columns]] = DataFrame(
+        {f"{name}@{timeframe}": merged[name].to_numpy() for name in columns}, index=df.index)
+    return df
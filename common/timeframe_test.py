@@ -0,0 +1,56 @@
+from timeframe import merge_higher_timeframe, resample_candles, resample_timeframes, validate_timeframes
+from loader import load_candles
+import pandas as pd
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_resample_candles():
+    df = load_candles(test_data_path)
+    weekly = resample_candles(df, "W1")
+
+    # 日曜日始まりの週ごとに集計されていること
+    assert (weekly['datetime'].dt.dayofweek == 6).all()
+    assert weekly.columns.tolist() == df.columns.tolist()
+    assert weekly.dtypes.tolist() == df.dtypes.tolist()
+    first = df[df['datetime'] < weekly.loc[1, 'datetime']]
+    assert weekly.loc[0, 'open'] == first['open'].iloc[0]
+    assert weekly.loc[0, 'high'] == first['high'].max()
+    assert weekly.loc[0, 'low'] == first['low'].min()
+    assert weekly.loc[0, 'close'] == first['close'].iloc[-1]
+    assert weekly.loc[0, 'tick'] == first['tick'].sum()
+    assert weekly['tick'].sum() == df['tick'].sum()
+
+
+def test_resample_timeframes():
+    df = load_candles(test_data_path)
+    frames = resample_timeframes(df, "D1", ["D1", "W1", "MN1"])
+
+    assert list(frames) == ["D1", "W1", "MN1"]
+    # 同じ時間足は変換しないこと
+    pd.testing.assert_frame_equal(frames["D1"], df)
+    assert len(frames["MN1"]) == df['datetime'].dt.to_period("M").nunique()
+
+
+def test_validate_timeframes():
+    assert validate_timeframes("M1", ["M5", "H1", "D1"]) is None
+    assert validate_timeframes("H1", ["M5"]) == "M5"
+    assert validate_timeframes("X1", ["D1"]) == "X1"
+
+
+def test_merge_higher_timeframe():
+    df = load_candles(test_data_path)
+    weekly = resample_candles(df, "W1")
+    weekly['band'] = weekly['close']
+
+    merge_higher_timeframe(df, weekly, "W1", ["band"])
+
+    # 週足が確定する前のローソク足には結合されないこと
+    first_week = df['datetime'] < weekly.loc[1, 'datetime']
+    assert df.loc[first_week, 'band@W1'].isna().all()
+    # 確定した直近の週足の値が結合されること
+    for i, row in df[~first_week].iterrows():
+        closed = weekly[weekly['datetime'] + pd.Timedelta(weeks=1) <= row['datetime']]
+        assert row['band@W1'] == closed['band'].iloc[-1]
@@ -0,0 +1,237 @@
+"""出力モジュール
+"""
+
+from pathlib import Path
+from pandas import DataFrame
+import gzip
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# 1回の書き込みで文字列化する行数
+CHUNK_SIZE = 10000
+# ストア(arrow)の1つのレコードバッチに格納する行数
+STORE_BATCH_ROWS = 65536
+
+
+def write_dataframe(df: DataFrame, output_path: str | Path, stem: str, ext: str, compress: bool = False, chunksize: int = CHUNK_SIZE) -> Path:
+    """データフレームをファイルに出力する
+
+    json, jsonl, csvはchunksize行ずつ文字列化してファイルへ直接書き込むため、
+    出力全体の文字列をメモリ上に構築しない
+
+    Args:
+        df (DataFrame): 出力するデータフレーム
+        output_path (str | Path): 出力先フォルダのパス
+        stem (str): 出力ファイル名 (拡張子なし)
+        ext (str): 出力ファイルの拡張子 (json, jsonl, csv, parquet, feather, arrow)
+        compress (bool): gzip圧縮の可否 (json, jsonl, csvのみ)
+        chunksize (int): 1回の書き込みで文字列化する行数
+
+    Returns:
+        Path: 出力したファイルのパス
+    """
+    output_full_path = Path(output_path) / Path(stem + f".{ext}")
+    output_full_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 列指向のバイナリ形式は型情報(日時、真偽値、カテゴリ)を保持したまま出力する
+    if ext == "parquet":
+        df.to_parquet(output_full_path, index=False)
+        return output_full_path
+    elif ext == "feather":
+        df.reset_index(drop=True).to_feather(output_full_path)
+        return output_full_path
+    elif ext == "arrow":
+        write_arrow(df, output_full_path)
+        return output_full_path
+
+    if compress:
+        output_full_path = output_full_path.with_name(output_full_path.name + ".gz")
+        f = gzip.open(output_full_path, mode='wt')
+    else:
+        f = open(output_full_path, mode='w')
+
+    with f:
+        # 抽出結果の出力
+        if ext == "json":
+            write_json(df, f, chunksize)
+        elif ext == "jsonl":
+            write_json_lines(df, f, chunksize)
+        elif ext == "csv":
+            df.to_csv(f, index=True, index_label="index", chunksize=chunksize)
+    return output_full_path
+
+
+def write_arrow(df: DataFrame, file: Path, batch_rows: int = STORE_BATCH_ROWS):
+    """データフレームをメモリマップで読み込めるArrow IPCファイル(ストア)に書き込む
+
+    MEMO: 圧縮するとメモリマップから直接参照できなくなるため圧縮しない。
+          batch_rows行ごとのレコードバッチに分けて、日時の範囲を読み込む時に必要なバッチだけを参照できるようにする
+
+    Args:
+        df (DataFrame): 出力するデータフレーム (日時の列で昇順に並んでいること)
+        file (Path): 出力ファイルのパス
+        batch_rows (int): 1つのレコードバッチに格納する行数
+    """
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    with pa.OSFile(str(file), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=batch_rows)
+
+
+def write_json(df: DataFrame, f, chunksize: int = CHUNK_SIZE):
+    """データフレームをjson形式で書き込む
+
+    df.to_json(orient="records", indent=4)と同じ内容をchunksize行ずつ書き込む
+    (空のデータフレームはdf.to_json(orient="records")と同じ"[]"を書き込む)
+
+    Args:
+        df (DataFrame): 出力するデータフレーム
+        f (TextIO): 出力先のファイル
+        chunksize (int): 1回の書き込みで文字列化する行数
+    """
+    if len(df) == 0:
+        f.write("[]")
+        return
+    f.write("[\n")
+    for start in range(0, len(df), chunksize):
+        data = df.iloc[start:start + chunksize].to_json(orient="records",
+                                                        date_format="iso", date_unit="s", indent=4)
+        if 0 < start:
+            f.write(",\n")
+        # 配列の括弧を取り除いてレコードだけを書き込む
+        f.write(data[2:-2])
+    f.write("\n]")
+
+
+def write_json_lines(df: DataFrame, f, chunksize: int = CHUNK_SIZE):
+    """データフレームを1行1レコードのjson形式(JSON Lines)で書き込む
+
+    Args:
+        df (DataFrame): 出力するデータフレーム
+        f (TextIO): 出力先のファイル
+        chunksize (int): 1回の書き込みで文字列化する行数
+    """
+    for start in range(0, len(df), chunksize):
+        f.write(df.iloc[start:start + chunksize].to_json(orient="records", lines=True,
+                                                         date_format="iso", date_unit="s"))
+
+
+class ChunkedWriter:
+    """データフレームを分割して1つのファイルに追記するクラス
+
+    write_dataframeで一括出力した場合と同じ内容になるように、先頭から順に分割したデータフレームを書き込む。
+    csvのインデックスは書き込んだデータフレームのインデックスをそのまま出力する。
+    json, jsonl, csvはmarkで取得したバイト位置でファイルを切り詰めて、その位置から追記し直すことができる。
+
+    Attributes:
+        path (Path): 出力ファイルのパス
+        ext (str): 出力ファイルの拡張子 (json, jsonl, csv, parquet, feather, arrow)
+        rows (int): 書き込んだ行数
+    """
+
+    def __init__(self, output_path: str | Path, stem: str, ext: str, compress: bool = False, chunksize: int = CHUNK_SIZE,
+                 offset: int | None = None, rows: int = 0):
+        """コンストラクタ
+
+        Args:
+            output_path (str | Path): 出力先フォルダのパス
+            stem (str): 出力ファイル名 (拡張子なし)
+            ext (str): 出力ファイルの拡張子 (json, jsonl, csv, parquet, feather, arrow)
+            compress (bool): gzip圧縮の可否 (json, jsonl, csvのみ)
+            chunksize (int): 1回の書き込みで文字列化する行数
+            offset (int | None): 既存のファイルを切り詰めて追記するバイト位置 (markの戻り値、json, jsonl, csvのみ。
+                Noneの場合は新しく書き込む)
+            rows (int): 切り詰めた位置までに書き込まれている行数 (offsetを指定した場合)
+        """
+        self.path = Path(output_path) / Path(stem + f".{ext}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ext = ext
+        self.rows = 0
+        self._chunksize = chunksize
+        self._compress = compress
+        self._appending = offset is not None
+        self._writer = None
+        self._file = None
+        if ext in ["parquet", "feather", "arrow"]:
+            # 列指向のバイナリ形式は最初のデータフレームのスキーマで書き込みを開始する
+            if self._appending:
+                raise ValueError(f"cannot append to {ext}")
+            return
+        if compress:
+            self.path = self.path.with_name(self.path.name + ".gz")
+        mode = 'w'
+        if self._appending:
+            # MEMO: gzipはmarkの位置でメンバーを区切っているため、切り詰めた後に新しいメンバーとして追記できる
+            with open(self.path, mode='r+b') as f:
+                f.truncate(offset)
+            self.rows = rows
+            mode = 'a'
+        self._file = gzip.open(self.path, mode=mode + 't') if compress else open(self.path, mode=mode)
+
+    def write(self, df: DataFrame):
+        """データフレームを追記する
+
+        Args:
+            df (DataFrame): 追記するデータフレーム (列は全ての書き込みで同じであること)
+        """
+        if self.ext in ["parquet", "feather", "arrow"]:
+            table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+            if self._writer is None:
+                if self.ext == "parquet":
+                    self._writer = pq.ParquetWriter(str(self.path), table.schema)
+                else:
+                    self._writer = ipc.new_file(str(self.path), table.schema)
+            if self.ext == "arrow":
+                self._writer.write_table(table, max_chunksize=STORE_BATCH_ROWS)
+            else:
+                self._writer.write_table(table)
+        elif self.ext == "json":
+            for start in range(0, len(df), self._chunksize):
+                data = df.iloc[start:start + self._chunksize].to_json(orient="records", date_format="iso", date_unit="s", indent=4)
+                # MEMO: 空のファイルを"[]"で閉じられるように最初のレコードを書き込む時に括弧を書き込む
+                self._file.write(",\n" if 0 < self.rows + start else "[\n")
+                self._file.write(data[2:-2])
+        elif self.ext == "jsonl":
+            write_json_lines(df, self._file, self._chunksize)
+        elif self.ext == "csv":
+            df.to_csv(self._file, index=True, index_label="index", chunksize=self._chunksize, header=self.rows == 0)
+        self.rows += len(df)
+
+    def mark(self) -> int:
+        """次に書き込む行の先頭のバイト位置を取得する (json, jsonl, csvのみ)
+
+        Returns:
+            int: 切り詰めて追記する時に指定するバイト位置
+        """
+        if self._compress:
+            # 圧縮したファイルはメンバーを閉じてから新しいメンバーで書き込みを続ける
+            self._file.close()
+            offset = self.path.stat().st_size
+            self._file = gzip.open(self.path, mode='at')
+        else:
+            self._file.flush()
+            offset = self.path.stat().st_size
+        return offset
+
+    def close(self) -> Path:
+        """ファイルを閉じる
+
+        Returns:
+            Path: 出力したファイルのパス
+        """
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            if self.ext == "json":
+                self._file.write("\n]" if 0 < self.rows else "[]")
+            self._file.close()
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if exc_type is not None and not self._appending:
+            # MEMO: 途中で失敗した場合は書きかけのファイルを残さない (追記の場合は次回に同じ位置から追記し直す)
+            self.path.unlink(missing_ok=True)
@@ -0,0 +1,75 @@
+from writer import ChunkedWriter, write_dataframe
+from store import read_store
+from zigzag import mark_zigzag2
+from loader import load_candles
+import gzip
+import pandas as pd
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+test_data_path = f"{current_dir}/test/USDJPYDaily.csv"
+
+
+def test_write_dataframe_columnar(tmp_path):
+    df = mark_zigzag2(load_candles(test_data_path))
+    for ext, read in [("parquet", pd.read_parquet), ("feather", pd.read_feather)]:
+        output_full_path = write_dataframe(df, tmp_path, "USDJPYDaily", ext)
+        assert output_full_path == tmp_path / f"USDJPYDaily.{ext}"
+        # 型を再推論せずに読み込めること
+        pd.testing.assert_frame_equal(df, read(output_full_path))
+
+
+def test_write_dataframe_streaming(tmp_path):
+    df = mark_zigzag2(load_candles(test_data_path))
+    # 分割して書き込んでも一括で文字列化した場合と同じ内容になること
+    output_full_path = write_dataframe(df, tmp_path, "USDJPYDaily", "json", chunksize=50)
+    assert df.to_json(orient="records", date_format="iso", date_unit="s", indent=4) == output_full_path.read_text()
+    output_full_path = write_dataframe(df, tmp_path, "USDJPYDaily", "csv", chunksize=50)
+    assert df.to_csv(index=True, index_label="index") == output_full_path.read_text()
+    output_full_path = write_dataframe(df, tmp_path, "USDJPYDaily", "jsonl", compress=True, chunksize=50)
+    assert output_full_path == tmp_path / "USDJPYDaily.jsonl.gz"
+    assert len(df) == len(pd.read_json(output_full_path, lines=True))
+
+
+def test_chunked_writer(tmp_path):
+    df = mark_zigzag2(load_candles(test_data_path))
+    for ext in ["json", "jsonl", "csv", "parquet", "feather", "arrow"]:
+        expect = write_dataframe(df, tmp_path / "expect", "USDJPYDaily", ext)
+        with ChunkedWriter(tmp_path / "chunked", "USDJPYDaily", ext, chunksize=30) as writer:
+            for start in range(0, len(df), 100):
+                writer.write(df.iloc[start:start + 100])
+        # 分割して追記しても一括で出力した場合と同じ内容になること
+        if ext in ["json", "jsonl", "csv"]:
+            assert expect.read_text() == writer.path.read_text()
+        elif ext == "arrow":
+            pd.testing.assert_frame_equal(read_store(expect)[0], read_store(writer.path)[0])
+        else:
+            read = pd.read_parquet if ext == "parquet" else pd.read_feather
+            pd.testing.assert_frame_equal(read(expect), read(writer.path))
+
+
+def test_write_empty_json(tmp_path):
+    df = mark_zigzag2(load_candles(test_data_path)).iloc[:0]
+    # 空のデータフレームはto_json(orient="records")と同じ"[]"になること
+    output_full_path = write_dataframe(df, tmp_path / "expect", "USDJPYDaily", "json")
+    assert df.to_json(orient="records") == output_full_path.read_text()
+    with ChunkedWriter(tmp_path / "chunked", "USDJPYDaily", "json") as writer:
+        writer.write(df)
+    assert "[]" == writer.path.read_text()
+
+
+def test_chunked_writer_append(tmp_path):
+    df = mark_zigzag2(load_candles(test_data_path))
+    for ext, compress in [("json", False), ("jsonl", False), ("csv", False), ("csv", True)]:
+        expect = write_dataframe(df, tmp_path / "expect", "USDJPYDaily", ext, compress)
+        with ChunkedWriter(tmp_path / "chunked", "USDJPYDaily", ext, compress) as writer:
+            writer.write(df.iloc[:100])
+            offset = writer.mark()
+            writer.write(df.iloc[100:150])
+        # markの位置で切り詰めて追記し直しても一括で出力した場合と同じ内容になること
+        with ChunkedWriter(tmp_path / "chunked", "USDJPYDaily", ext, compress, offset=offset, rows=100) as writer:
+            writer.write(df.iloc[100:])
+        if compress:
+            assert gzip.open(expect).read() == gzip.open(writer.path).read()
+        else:
+            assert expect.read_text() == writer.path.read_text()
@@ -2,7 +2,558 @@
 """
 
 from pandas import DataFrame
-from typing import Any
+from typing import Any, Mapping
+from array import array
+import numpy as np
+import pandas as pd
+import weakref
+
+# ジグザグの種類 (zigzag-kind列のカテゴリ)
+ZIGZAG_KINDS = ["peak", "bottom"]
+# ジグザグの種類のコード値
+PEAK = 0
+BOTTOM = 1
+
+
+class ZigzagEngine:
+    """ジグザグ探索クラス
+
+    ローソク足の実体の高値・安値を事前に配列として計算しておき、
+    データフレームへアクセスせずにインデックスだけでピークとボトムを探索する
+
+    Attributes:
+        box_min (list[float]): ローソク足の実体の安値の配列
+        box_max (list[float]): ローソク足の実体の高値の配列
+        positive (list[bool]): ローソク足が陽線か否かの配列
+        negative (list[bool]): ローソク足が陰線か否かの配列
+    """
+
+    def __init__(self, open_prices, close_prices):
+        """コンストラクタ
+
+        Args:
+            open_prices (ArrayLike): ローソク足の始値の配列
+            close_prices (ArrayLike): ローソク足の終値の配列
+        """
+        open_prices = np.asarray(open_prices, dtype=float)
+        close_prices = np.asarray(close_prices, dtype=float)
+        # MEMO: 1要素ずつ参照するためNumPy配列よりアクセスが高速なlistに変換しておく
+        self.box_min = np.minimum(open_prices, close_prices).tolist()
+        self.box_max = np.maximum(open_prices, close_prices).tolist()
+        self.positive = (open_prices < close_prices).tolist()
+        self.negative = (close_prices < open_prices).tolist()
+
+    @classmethod
+    def from_dataframe(cls, df: DataFrame) -> "ZigzagEngine":
+        """データフレームからジグザグ探索クラスを生成する
+
+        Args:
+            df (DataFrame): ローソク足の情報が格納されたデータフレーム
+
+        Returns:
+            ZigzagEngine: ジグザグ探索クラスのインスタンス
+        """
+        return cls(df['open'].to_numpy(), df['close'].to_numpy())
+
+    def __len__(self) -> int:
+        return len(self.box_min)
+
+    def point(self, index: int, start: int, exhausted: bool = False) -> dict[str:Any]:
+        """ピークまたはボトムの情報を生成する
+
+        Args:
+            index (int): ピークまたはボトムのローソク足のインデックス番号
+            start (int): 次の検索を開始するローソク足のインデックス番号
+            exhausted (bool): 確定せずに最後のローソク足まで探索したか否かのフラグ値
+
+        Returns:
+            dict[str:Any]: ピークまたはボトムの情報が格納された辞書データ
+        """
+        return {
+            "index": index,
+            "start": start,
+            "box_min": self.box_min[index],
+            "box_max": self.box_max[index],
+            "exhausted": exhausted
+        }
+
+    def find_peak(self, start: int) -> dict[str:Any]:
+        """高値更新が止まったポイントを探す
+
+        Args:
+            start (int): 検索を開始するローソク足のインデックス番号
+
+        Returns:
+            dict[str:Any]: 高値更新が止まったポイントの情報が格納された辞書データ
+        """
+        size = len(self)
+        if size <= start:
+            raise Exception("Program error")
+
+        box_min = self.box_min
+        box_max = self.box_max
+
+        peak_index = start
+        if size <= peak_index + 1:
+            return self.point(peak_index, peak_index, True)
+
+        last_index = peak_index
+        for i in range(peak_index + 1, size):
+            last_index = i
+
+            # 高値更新されているか確認
+            if box_max[peak_index] < box_max[i]:
+                # 高値更新された場合
+                peak_index = i
+                continue
+
+            prev = i - 1
+            updated_high = box_max[prev] < box_max[i]
+            updated_low = box_min[i] < box_min[prev]
+            # ローソク足の包含関係を確認
+            if box_min[prev] <= box_min[i] and box_max[i] <= box_max[prev]:
+                # 前回のローソク足に包含されている場合
+                continue
+            elif updated_high and not updated_low:
+                # 前回のローソク足の高値を更新した場合 (peakの更新はなし、安値の更新はなし)
+                continue
+            elif updated_low:
+                # 前回のローソク足の安値を更新した場合
+                if updated_high:
+                    # 安値と高値(peakの更新はなし)両方更新した場合
+
+                    if self.positive[i]:
+                        # ローソク足が陽線の場合
+                        continue  # 高値更新を優先する (処理継続)
+                    elif self.negative[i]:
+                        # ローソク足が陰線の場合
+                        break  # 安値更新を優先する (処理終了)
+                    else:
+                        # 十字線の場合
+                        # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
+                        raise Exception("Program error")
+                else:
+                    # 安値だけ更新した場合
+                    break
+            else:
+                # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
+                raise Exception("Program error")
+        else:
+            # 確定せずに最後のローソク足まで探索した場合
+            return self.point(peak_index, last_index, True)
+
+        return self.point(peak_index, last_index)
+
+    def find_bottom(self, start: int) -> dict[str:Any]:
+        """安値更新が止まったポイントを探す
+
+        Args:
+            start (int): 検索を開始するローソク足のインデックス番号
+
+        Returns:
+            dict[str:Any]: 安値更新が止まったポイントの情報が格納された辞書データ
+        """
+        size = len(self)
+        if size <= start:
+            raise Exception("Program error")
+
+        box_min = self.box_min
+        box_max = self.box_max
+
+        bottom_index = start
+        if size <= bottom_index + 1:
+            return self.point(bottom_index, bottom_index, True)
+
+        last_index = bottom_index
+        for i in range(bottom_index + 1, size):
+            last_index = i
+
+            # 安値更新されているか確認
+            if box_min[i] < box_min[bottom_index]:
+                # 安値更新された場合
+                bottom_index = i
+                continue
+
+            prev = i - 1
+            updated_high = box_max[prev] < box_max[i]
+            updated_low = box_min[i] < box_min[prev]
+            # ローソク足の包含関係を確認
+            if box_min[prev] <= box_min[i] and box_max[i] <= box_max[prev]:
+                # 前回のローソク足に包含されている場合
+                continue
+            elif updated_low and not updated_high:
+                # 前回のローソク足の安値を更新した場合 (bottomの更新はなし、高値の更新はなし)
+                continue
+            elif updated_high:
+                # 前回のローソク足の高値を更新した場合
+                if updated_low:
+                    # 高値と安値(bottomの更新はなし)両方更新した場合
+
+                    if self.negative[i]:
+                        # ローソク足が陰線の場合
+                        continue  # 安値更新を優先する (処理継続)
+                    elif self.positive[i]:
+                        # ローソク足が陽線の場合
+                        break  # 高値更新を優先する (処理終了)
+                    else:
+                        # 十字線の場合
+                        # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
+                        raise Exception("Program error")
+                else:
+                    # 安値だけ更新した場合
+                    break
+            else:
+                # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
+                raise Exception("Program error")
+        else:
+            # 確定せずに最後のローソク足まで探索した場合
+            return self.point(bottom_index, last_index, True)
+
+        return self.point(bottom_index, last_index)
+
+
+class ZigzagMarks:
+    """ジグザグのマーク付け結果を蓄積するクラス
+
+    マーク付けのたびにデータフレームへ書き込むと列の生成や型の変換が毎回発生するため、
+    ジグザグの情報を配列に蓄積しておき、最後に一括でデータフレームへ書き込む
+
+    Attributes:
+        link_name (str): 対になるジグザグのインデックスを格納する列名
+        index (array): ジグザグのインデックス番号
+        kind (array): ジグザグの種類のコード値 (PEAKまたはBOTTOM)
+        link (array): 対になるジグザグのインデックス番号
+        velocity (array): ジグザグの速度
+        delta (array): ジグザグのY軸のΔ
+        price (array): ジグザグの価格 (ピークは実体の高値、ボトムは実体の安値)
+    """
+
+    def __init__(self, link_name: str = 'zigzag-from'):
+        """コンストラクタ
+
+        Args:
+            link_name (str): 対になるジグザグのインデックスを格納する列名
+        """
+        self.link_name = link_name
+        self.index = array('q')
+        self.kind = array('b')
+        self.link = array('q')
+        self.velocity = array('d')
+        self.delta = array('d')
+        self.price = array('d')
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def append(self, index: int, kind: int, link: int, velocity: float, delta: float, price: float):
+        """ジグザグの情報を追加する
+
+        Args:
+            index (int): ジグザグのインデックス番号
+            kind (int): ジグザグの種類のコード値 (PEAKまたはBOTTOM)
+            link (int): 対になるジグザグのインデックス番号
+            velocity (float): ジグザグの速度
+            delta (float): ジグザグのY軸のΔ
+            price (float): ジグザグの価格
+        """
+        self.index.append(index)
+        self.kind.append(kind)
+        self.link.append(link)
+        self.velocity.append(velocity)
+        self.delta.append(delta)
+        self.price.append(price)
+
+    def apply(self, df: DataFrame, offset: int = 0) -> DataFrame:
+        """蓄積したジグザグの情報をデータフレームに一括で書き込む
+
+        既に列が存在する場合はジグザグの行だけを上書きする。
+        同じ行に複数回マーク付けされた場合は後から追加した情報が優先される。
+
+        Args:
+            df (DataFrame): ローソク足の情報が格納されたデータフレーム
+            offset (int): インデックス番号に加算する値 (データフレームの途中から探索した場合の開始位置)
+
+        Returns:
+            DataFrame: ジグザグ情報が書き込まれたデータフレーム
+        """
+        size = len(df)
+        index = np.frombuffer(self.index, dtype=np.int64) + offset
+        kind = np.frombuffer(self.kind, dtype=np.int8)
+
+        def base(name):
+            # 既存の列があれば引き継ぐ
+            if name in df.columns:
+                return df[name].to_numpy(dtype=float, copy=True)
+            return np.full(size, np.nan)
+
+        zigzag = df['zigzag'].to_numpy(dtype=bool, copy=True) if 'zigzag' in df.columns else np.zeros(size, dtype=bool)
+        zigzag[index] = True
+        columns = {'zigzag': zigzag}
+        if len(index) == 0:
+            df[list(columns)] = DataFrame(columns, index=df.index)
+            return df
+
+        codes = np.full(size, -1, dtype=np.int8)
+        if 'zigzag-kind' in df.columns:
+            codes = pd.Categorical(df['zigzag-kind'], categories=ZIGZAG_KINDS).codes.copy()
+        codes[index] = kind
+        columns['zigzag-kind'] = pd.Categorical.from_codes(codes, categories=ZIGZAG_KINDS)
+
+        for name, values in [
+            (self.link_name, np.frombuffer(self.link, dtype=np.int64) + offset),
+            ('zigzag-velocity', np.frombuffer(self.velocity, dtype=np.float64)),
+            ('zigzag-delta', np.frombuffer(self.delta, dtype=np.float64)),
+        ]:
+            column = base(name)
+            column[index] = values
+            columns[name] = column
+
+        # 価格列は最初にマーク付けされた種類の順に生成する
+        price = np.frombuffer(self.price, dtype=np.float64)
+        price_names = {PEAK: 'zigzag-peak-price', BOTTOM: 'zigzag-bottom-price'}
+        for code in dict.fromkeys(kind.tolist()):
+            name = price_names[code]
+            column = base(name)
+            column[index[kind == code]] = price[kind == code]
+            columns[name] = column
+
+        df[list(columns)] = DataFrame(columns, index=df.index)
+        return df
+
+
+class ZigzagScanner:
+    """ピークまたはボトムの探索をローソク足1本ずつ進めるクラス
+
+    ZigzagEngine.find_peak, find_bottomと同じ判定をローソク足が追加されるたびに行う。
+    探索に必要な直前のローソク足と高値(安値)のローソク足だけを保持する。
+
+    Attributes:
+        kind (int): 探索する種類のコード値 (PEAKまたはBOTTOM)
+        index (int): 高値(安値)を更新したローソク足のインデックス番号
+        box_min (float): 高値(安値)を更新したローソク足の実体の安値
+        box_max (float): 高値(安値)を更新したローソク足の実体の高値
+    """
+
+    def __init__(self, kind: int, index: int, box_min: float, box_max: float):
+        """コンストラクタ
+
+        Args:
+            kind (int): 探索する種類のコード値 (PEAKまたはBOTTOM)
+            index (int): 検索を開始するローソク足のインデックス番号
+            box_min (float): 検索を開始するローソク足の実体の安値
+            box_max (float): 検索を開始するローソク足の実体の高値
+        """
+        self.kind = kind
+        self.index = index
+        self.box_min = box_min
+        self.box_max = box_max
+        self._prev_min = box_min
+        self._prev_max = box_max
+
+    def point(self, start: int) -> dict[str:Any]:
+        """確定したピークまたはボトムの情報を生成する
+
+        Args:
+            start (int): 次の検索を開始するローソク足のインデックス番号
+
+        Returns:
+            dict[str:Any]: ピークまたはボトムの情報が格納された辞書データ
+        """
+        return {"index": self.index, "start": start, "box_min": self.box_min, "box_max": self.box_max, "exhausted": False}
+
+    def feed(self, index: int, box_min: float, box_max: float, positive: bool, negative: bool) -> bool:
+        """ローソク足を1本追加して探索を進める
+
+        Args:
+            index (int): ローソク足のインデックス番号
+            box_min (float): ローソク足の実体の安値
+            box_max (float): ローソク足の実体の高値
+            positive (bool): ローソク足が陽線か否かのフラグ値
+            negative (bool): ローソク足が陰線か否かのフラグ値
+
+        Returns:
+            bool: ピークまたはボトムが確定したか否かのフラグ値
+        """
+        prev_min = self._prev_min
+        prev_max = self._prev_max
+        self._prev_min = box_min
+        self._prev_max = box_max
+
+        if self.kind == PEAK:
+            # 高値更新されているか確認
+            if self.box_max < box_max:
+                self.index, self.box_min, self.box_max = index, box_min, box_max
+                return False
+            main_updated, sub_updated = prev_max < box_max, box_min < prev_min
+            keep, stop = positive, negative
+        else:
+            # 安値更新されているか確認
+            if box_min < self.box_min:
+                self.index, self.box_min, self.box_max = index, box_min, box_max
+                return False
+            main_updated, sub_updated = box_min < prev_min, prev_max < box_max
+            keep, stop = negative, positive
+
+        # ローソク足の包含関係を確認
+        if prev_min <= box_min and box_max <= prev_max:
+            # 前回のローソク足に包含されている場合
+            return False
+        elif main_updated and not sub_updated:
+            # 探索方向だけ更新した場合
+            return False
+        elif sub_updated:
+            if main_updated:
+                # 両方更新した場合はローソク足の向きで判定する
+                if keep:
+                    return False
+                elif stop:
+                    return True
+                # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
+                raise Exception("Program error")
+            # 探索方向の逆だけ更新した場合
+            return True
+        # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
+        raise Exception("Program error")
+
+
+class StreamingZigzag:
+    """ジグザグを1本ずつ探索するクラス (mark_zigzag2のストリーミング版)
+
+    ローソク足が追加されるたびに探索を進め、確定したピークとボトムだけを返す。
+    返されるピークとボトムはmark_zigzag2で全てのローソク足を探索した結果と一致する。
+    """
+
+    def __init__(self):
+        """コンストラクタ
+        """
+        self._count = 0
+        self._first = None
+        # 最初のピークとボトムを探索中は再探索のためにローソク足を保持する
+        self._candles = []
+        self._initial = None
+        self._initial_points = {}
+        self._scanner = None
+        self._last_peak = None
+        self._last_bottom = None
+
+    def update(self, bar: Mapping[str, Any]) -> list[dict[str, Any]]:
+        """ローソク足を1本追加してジグザグを探索する
+
+        Args:
+            bar (Mapping[str, Any]): ローソク足の情報 (open, close)
+
+        Returns:
+            list[dict[str, Any]]: 確定したジグザグの情報 (index, kind, link, velocity, delta, price)
+        """
+        open_price = float(bar['open'])
+        close_price = float(bar['close'])
+        candle = (self._count, min(open_price, close_price), max(open_price, close_price),
+                  open_price < close_price, close_price < open_price)
+        self._count += 1
+
+        if self._scanner is not None:
+            return self._scan(candle)
+
+        if self._first is None:
+            # 先頭のローソク足から最初のピークとボトムを探す
+            self._first = candle
+            self._candles.append(candle)
+            self._initial = {kind: ZigzagScanner(kind, 0, candle[1], candle[2]) for kind in [PEAK, BOTTOM]}
+            return []
+
+        self._candles.append(candle)
+        # 確定していない探索だけを進める
+        for kind, scanner in list(self._initial.items()):
+            if scanner.feed(*candle):
+                self._initial_points[kind] = scanner.point(candle[0])
+                del self._initial[kind]
+        if 0 < len(self._initial):
+            return []
+        return self._start()
+
+    def _start(self) -> list[dict[str, Any]]:
+        """最初のピークとボトムが確定した後に交互の探索を開始する
+
+        Returns:
+            list[dict[str, Any]]: 確定したジグザグの情報
+        """
+        peak = self._initial_points[PEAK]
+        bottom = self._initial_points[BOTTOM]
+        _, first_min, first_max, _, _ = self._first
+        first = {"index": 0, "start": 0, "box_min": first_min, "box_max": first_max, "exhausted": False}
+
+        pivots = []
+        row_index = 0
+        # ボトムが最初に見つかったかチェックする
+        if bottom['index'] < peak['index']:
+            row_index = bottom['start']
+            pivots.append(self._pivot(bottom, BOTTOM, first))  # インデックス0を仮のピークとする
+            self._last_bottom = bottom
+        else:
+            # インデックス0を仮のボトムとする
+            self._last_bottom = first
+
+        # 保持していたローソク足で探索をやり直す
+        candles = self._candles[row_index:]
+        self._candles = []
+        self._initial = None
+        _, box_min, box_max, _, _ = candles[0]
+        self._scanner = ZigzagScanner(PEAK, row_index, box_min, box_max)
+        for candle in candles[1:]:
+            pivots.extend(self._scan(candle))
+        return pivots
+
+    def _scan(self, candle: tuple) -> list[dict[str, Any]]:
+        """ピークとボトムを交互に探索する
+
+        Args:
+            candle (tuple): ローソク足の情報 (index, box_min, box_max, positive, negative)
+
+        Returns:
+            list[dict[str, Any]]: 確定したジグザグの情報
+        """
+        scanner = self._scanner
+        if not scanner.feed(*candle):
+            return []
+
+        index, box_min, box_max, _, _ = candle
+        point = scanner.point(index)
+        if scanner.kind == PEAK:
+            pivot = self._pivot(point, PEAK, self._last_bottom)
+            self._last_peak = point
+            self._scanner = ZigzagScanner(BOTTOM, index, box_min, box_max)
+        else:
+            pivot = self._pivot(point, BOTTOM, self._last_peak)
+            self._last_bottom = point
+            self._scanner = ZigzagScanner(PEAK, index, box_min, box_max)
+        return [pivot]
+
+    def _pivot(self, point: dict[str:Any], kind: int, link: dict[str:Any]) -> dict[str, Any]:
+        """ジグザグの情報を生成する (calc_zigzag2のマーク付けと同じ計算)
+
+        Args:
+            point (dict[str:Any]): 確定したピークまたはボトム
+            kind (int): 種類のコード値 (PEAKまたはBOTTOM)
+            link (dict[str:Any]): 対になるボトムまたはピーク
+
+        Returns:
+            dict[str, Any]: ジグザグの情報
+        """
+        # 経過時間
+        dx = point['index'] - link['index']
+        # Y軸のΔ
+        if kind == PEAK:
+            dy = point['box_max'] - link['box_min'] if dx != 0 else 0
+        else:
+            dy = point['box_min'] - link['box_max'] if dx != 0 else 0
+        return {
+            "index": point['index'],
+            "kind": ZIGZAG_KINDS[kind],
+            "link": link['index'],
+            "velocity": dy / dx if dx != 0 else 0,
+            "delta": dy,
+            "price": point['box_max'] if kind == PEAK else point['box_min'],
+        }
 
 
 def mark_zigzag(df: DataFrame) -> DataFrame:
@@ -33,9 +584,28 @@ def mark_zigzag2(df: DataFrame) -> DataFrame:
     """
     df['zigzag'] = False
 
-    # ピークとボトムのどちらが最初に見つからるかをチェックする
-    peak = find_peak(df, 0)
-    bottom = find_bottom(df, 0)
+    marks, _ = calc_zigzag2(ZigzagEngine.from_dataframe(df))
+
+    # マーク付けの結果を一括で書き込む
+    return marks.apply(df)
+
+
+def calc_zigzag2(engine: ZigzagEngine, state: dict[str:Any] | None = None) -> tuple[ZigzagMarks, dict[str:Any] | None]:
+    """ジグザグを探索する (mark_zigzag2の探索処理)
+
+    探索の途中状態を受け取って探索を再開できる。
+    最後のローソク足まで探索しても確定しなかったピークまたはボトムは
+    ローソク足が追加されると結果が変わるため、その探索の開始状態を次回の再開位置として返す。
+
+    Args:
+        engine (ZigzagEngine): ジグザグ探索クラスのインスタンス
+        state (dict[str:Any] | None): 前回返された再開位置 (Noneの場合は先頭から探索する)
+
+    Returns:
+        tuple[ZigzagMarks, dict[str:Any] | None]: マーク付けの結果と次回の再開位置
+            (再開位置がNoneの場合は次回も先頭から探索する必要がある)
+    """
+    marks = ZigzagMarks()
 
     def mark_peak(peak, bottom):
         # 経過時間
@@ -44,15 +614,8 @@ def mark_zigzag2(df: DataFrame) -> DataFrame:
         dy = peak['box_max'] - bottom['box_min'] if dx != 0 else 0
         # 速度を計算
         velocity = dy / dx if dx != 0 else 0
-        # マーク付けを行うデータのインデックス取得
-        i = peak['index']
         # インデックスの位置にマーク付けを行う
-        df.loc[i, 'zigzag'] = True
-        df.loc[i, 'zigzag-kind'] = "peak"
-        df.loc[i, 'zigzag-from'] = bottom['index']
-        df.loc[i, 'zigzag-velocity'] = velocity
-        df.loc[i, 'zigzag-delta'] = dy
-        df.loc[i, 'zigzag-peak-price'] = peak['box_max']
+        marks.append(peak['index'], PEAK, bottom['index'], velocity, dy, peak['box_max'])
 
     def mark_bottom(bottom, peak):
         # 経過時間
@@ -61,40 +624,45 @@ def mark_zigzag2(df: DataFrame) -> DataFrame:
         dy = bottom['box_min'] - peak['box_max'] if dx != 0 else 0
         # 速度を計算
         velocity = dy / dx if dx != 0 else 0
-        # マーク付けを行うデータのインデックス取得
-        i = bottom['index']
         # インデックスの位置にマーク付けを行う
-        df.loc[i, 'zigzag'] = True
-        df.loc[i, 'zigzag-kind'] = "bottom"
-        df.loc[i, 'zigzag-from'] = peak['index']
-        df.loc[i, 'zigzag-velocity'] = velocity
-        df.loc[i, 'zigzag-delta'] = dy
-        df.loc[i, 'zigzag-bottom-price'] = bottom['box_min']
-
-    # 仮のジグザグを用意
-    first = {
-        'index': 0,
-        'box_max': calc_box_max(df, 0),
-        'box_min': calc_box_min(df, 0),
-    }
-
-    row_index = 0
-    last_bottom = None
-    # ボトムが最初に見つかったかチェックする
-    if bottom['index'] < peak['index']:
-        row_index = bottom['start']
-        mark_bottom(bottom, first)  # インデックス0を仮のピークとする
-        last_bottom = bottom
+        marks.append(bottom['index'], BOTTOM, peak['index'], velocity, dy, bottom['box_min'])
+
+    resumable = True
+    if state is None:
+        # ピークとボトムのどちらが最初に見つからるかをチェックする
+        peak = engine.find_peak(0)
+        bottom = engine.find_bottom(0)
+        # 最初のピークとボトムが確定していない場合は再開できない
+        resumable = not (peak['exhausted'] or bottom['exhausted'])
+
+        # 仮のジグザグを用意
+        first = engine.point(0, 0)
+
+        row_index = 0
+        last_bottom = None
+        # ボトムが最初に見つかったかチェックする
+        if bottom['index'] < peak['index']:
+            row_index = bottom['start']
+            mark_bottom(bottom, first)  # インデックス0を仮のピークとする
+            last_bottom = bottom
+        else:
+            # インデックス0を仮のボトムとする
+            last_bottom = first
     else:
-        # インデックス0を仮のボトムとする
-        last_bottom = first
+        row_index = state['row_index']
+        last_bottom = state['last_bottom']
 
+    resume = None
     # ピークとボトムを順番に探してマーク付けする
-    while row_index + 1 < len(df):
+    while row_index + 1 < len(engine):
         # ピークを探す
-        peak = find_peak(df, row_index)
+        peak = engine.find_peak(row_index)
         # ボトムを探す
-        bottom = find_bottom(df, peak['start'])
+        bottom = engine.find_bottom(peak['start'])
+
+        if resumable and resume is None and (peak['exhausted'] or bottom['exhausted']):
+            # 確定していない探索の開始状態を再開位置とする
+            resume = {'row_index': row_index, 'last_bottom': last_bottom}
 
         # ピークとボトムのマーク付け
         mark_peak(peak, last_bottom)
@@ -104,7 +672,10 @@ def mark_zigzag2(df: DataFrame) -> DataFrame:
         row_index = bottom['start']
         last_bottom = bottom
 
-    return df
+    if resumable and resume is None:
+        resume = {'row_index': row_index, 'last_bottom': last_bottom}
+
+    return marks, resume
 
 
 def mark_zigzag_peak_to_bottom(df):
@@ -116,12 +687,15 @@ def mark_zigzag_peak_to_bottom(df):
     Returns:
         DataFrame: ジグザグ情報が書き込まれたデータフレーム
     """
+    engine = ZigzagEngine.from_dataframe(df)
+    marks = ZigzagMarks('zigzag-to')
+
     row_index = 0
-    while row_index < len(df):
+    while row_index < len(engine):
         # 高値更新が止まった場所を探す
-        peak = find_peak(df, row_index)
+        peak = engine.find_peak(row_index)
         # 安値更新が止まった場所を探す
-        bottom = find_bottom(df, peak['start'])
+        bottom = engine.find_bottom(peak['start'])
 
         if bottom['index'] <= peak['index']:
             # グラフが高値更新しかしていない場合、`peakIndex == bottomIndex`となる可能性がある。
@@ -135,16 +709,13 @@ def mark_zigzag_peak_to_bottom(df):
         # 速度を計算
         velocity = y / x
 
-        i = peak['index']
-        df.loc[i, 'zigzag'] = True
-        df.loc[i, 'zigzag-kind'] = "peak"
-        df.loc[i, 'zigzag-to'] = bottom['index']
-        df.loc[i, 'zigzag-velocity'] = velocity
-        df.loc[i, 'zigzag-delta'] = y
-        df.loc[i, 'zigzag-peak-price'] = peak['box_max']
+        marks.append(peak['index'], PEAK, bottom['index'], velocity, y, peak['box_max'])
 
         row_index = bottom['index'] + 1
 
+    # マーク付けの結果を一括で書き込む
+    return marks.apply(df)
+
 
 def mark_zigzag_bottom_to_peak(df):
     """安値から高値方向へのジグザグ情報をデータフレームに書き込む
@@ -155,12 +726,15 @@ def mark_zigzag_bottom_to_peak(df):
     Returns:
         DataFrame: ジグザグ情報が書き込まれたデータフレーム
     """
+    engine = ZigzagEngine.from_dataframe(df)
+    marks = ZigzagMarks('zigzag-to')
+
     row_index = 0
-    while row_index < len(df):
+    while row_index < len(engine):
         # 安値更新が止まった場所を探す
-        bottom = find_bottom(df, row_index)
+        bottom = engine.find_bottom(row_index)
         # 高値更新が止まった場所を探す
-        peak = find_peak(df, bottom['start'])
+        peak = engine.find_peak(bottom['start'])
 
         if peak['index'] <= bottom['index']:
             # グラフが安値更新しかしていない場合、`peakIndex == bottomIndex`となる可能性がある。
@@ -174,90 +748,64 @@ def mark_zigzag_bottom_to_peak(df):
         # 速度を計算
         velocity = y / x
 
-        i = bottom['index']
-        df.loc[i, 'zigzag'] = True
-        df.loc[i, 'zigzag-kind'] = "bottom"
-        df.loc[i, 'zigzag-to'] = peak['index']
-        df.loc[i, 'zigzag-velocity'] = velocity
-        df.loc[i, 'zigzag-delta'] = y
-        df.loc[i, 'zigzag-bottom-price'] = bottom['box_min']
+        marks.append(bottom['index'], BOTTOM, peak['index'], velocity, y, bottom['box_min'])
 
         row_index = peak['index'] + 1
 
+    # マーク付けの結果を一括で書き込む
+    return marks.apply(df)
 
-def find_peak(df: DataFrame, start: int) -> dict[str:Any]:
-    """高値更新が止まったポイントを探す
+
+# 互換関数(find_peak, find_bottom)で最後に探索したデータフレームとジグザグ探索クラス
+_engine_cache = None
+
+
+def engine_of(df: DataFrame) -> ZigzagEngine:
+    """データフレームのジグザグ探索クラスを取得する
+
+    同じデータフレームを続けて探索する場合は前回生成したジグザグ探索クラスを使い回す。
+    MEMO: 行数と列の配列が同じ場合は同じローソク足とみなすため、探索の途中でopen, closeの値を
+          その場で書き換えた場合は古い値で探索される (書き換える場合はZigzagEngineを生成し直すこと)
 
     Args:
         df (DataFrame): ローソク足の情報が格納されたデータフレーム
-        start (int): 検索を開始するローソク足のインデックス番号
 
     Returns:
-        dict[str:Any]: 高値更新が止まったポイントの情報が格納された辞書データ
+        ZigzagEngine: ジグザグ探索クラスのインスタンス
     """
-    if len(df) <= start:
-        raise Exception("Program error")
+    global _engine_cache
+    open_prices = df['open'].to_numpy()
+    close_prices = df['close'].to_numpy()
+    key = (len(df), open_prices.__array_interface__['data'][0], close_prices.__array_interface__['data'][0])
+    if _engine_cache is not None and _engine_cache[0]() is df and _engine_cache[1] == key:
+        return _engine_cache[2]
 
-    peak_index = start
-    if len(df) <= peak_index + 1:
-        return {
-            "index": peak_index,
-            "start": peak_index,
-            "box_min": calc_box_min(df, peak_index),
-            "box_max": calc_box_max(df, peak_index)
-        }
+    engine = ZigzagEngine(open_prices, close_prices)
+    # MEMO: データフレームは弱参照で保持し、キャッシュがデータフレームの解放を妨げないようにする
+    _engine_cache = (weakref.ref(df), key, engine)
+    return engine
 
-    last_index = peak_index
-    for i in range(peak_index + 1, len(df)):
-        last_index = i
 
-        # 高値更新されているか確認
-        if is_updated_high(df, peak_index, i):
-            # 高値更新された場合
-            peak_index = i
-            continue
+def find_peak(df: DataFrame, start: int) -> dict[str:Any]:
+    """高値更新が止まったポイントを探す
 
-        prev = i - 1
-        # ローソク足の包含関係を確認
-        if contains(df, prev, i):
-            # 前回のローソク足に包含されている場合
-            continue
-        elif is_updated_high(df, prev, i) and not is_updated_low(df, prev, i):
-            # 前回のローソク足の高値を更新した場合 (peakの更新はなし、安値の更新はなし)
-            continue
-        elif is_updated_low(df, prev, i):
-            # 前回のローソク足の安値を更新した場合
-            if is_updated_high(df, prev, i):
-                # 安値と高値(peakの更新はなし)両方更新した場合
-
-                if is_positive(df, i):
-                    # ローソク足が陽線の場合
-                    continue  # 高値更新を優先する (処理継続)
-                elif is_negative(df, i):
-                    # ローソク足が陰線の場合
-                    break  # 安値更新を優先する (処理終了)
-                else:
-                    # 十字線の場合
-                    # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
-                    raise Exception("Program error")
-            else:
-                # 安値だけ更新した場合
-                break
-        else:
-            # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
-            raise Exception("Program error")
+    MEMO: 同じデータフレームを繰り返し探索する場合は配列を生成し直さない (engine_ofを参照)
+
+    Args:
+        df (DataFrame): ローソク足の情報が格納されたデータフレーム
+        start (int): 検索を開始するローソク足のインデックス番号
 
-    return {
-        "index": peak_index,
-        "start": last_index,
-        "box_min": calc_box_min(df, peak_index),
-        "box_max": calc_box_max(df, peak_index)
-    }
+    Returns:
+        dict[str:Any]: 高値更新が止まったポイントの情報が格納された辞書データ
+    """
+    return engine_of(df).find_peak(start)
 
 
 def find_bottom(df: DataFrame, start: int) -> dict:
     """安値更新が止まったポイントを探す
 
+    MEMO: 同じデータフレームを繰り返し探索する場合は配列を生成し直さない (engine_ofを参照)
+
     Args:
         df (DataFrame): ローソク足の情報が格納されたデータフレーム
         start (int): 検索を開始するローソク足のインデックス番号
@@ -265,64 +813,7 @@ def find_bottom(df: DataFrame, start: int) -> dict:
     Returns:
         dict[str:Any]: 安値更新が止まったポイントの情報が格納された辞書データ
     """
-    if len(df) <= start:
-        raise Exception("Program error")
-
-    bottom_index = start
-    if len(df) <= bottom_index + 1:
-        return {
-            "index": bottom_index,
-            "start": bottom_index,
-            "box_min": calc_box_min(df, bottom_index),
-            "box_max": calc_box_max(df, bottom_index)
-        }
-
-    last_index = bottom_index
-    for i in range(bottom_index + 1, len(df)):
-        last_index = i
-
-        # 安値更新されているか確認
-        if is_updated_low(df, bottom_index, i):
-            # 安値更新された場合
-            bottom_index = i
-            continue
-
-        prev = i - 1
-        # ローソク足の包含関係を確認
-        if contains(df, prev, i):
-            # 前回のローソク足に包含されている場合
-            continue
-        elif is_updated_low(df, prev, i) and not is_updated_high(df, prev, i):
-            # 前回のローソク足の安値を更新した場合 (bottomの更新はなし、高値の更新はなし)
-            continue
-        elif is_updated_high(df, prev, i):
-            # 前回のローソク足の高値を更新した場合
-            if is_updated_low(df, prev, i):
-                # 高値と安値(bottomの更新はなし)両方更新した場合
-
-                if is_negative(df, i):
-                    # ローソク足が陰線の場合
-                    continue  # 安値更新を優先する (処理継続)
-                elif is_positive(df, i):
-                    # ローソク足が陽線の場合
-                    break  # 高値更新を優先する (処理終了)
-                else:
-                    # 十字線の場合
-                    # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
-                    raise Exception("Program error")
-            else:
-                # 安値だけ更新した場合
-                break
-        else:
-            # プログラムのミスまたは検討不足な問題(包含関係ではないので十字線はあり得ない)
-            raise Exception("Program error")
-
-    return {
-        "index": bottom_index,
-        "start": last_index,
-        "box_min": calc_box_min(df, bottom_index),
-        "box_max": calc_box_max(df, bottom_index)
-    }
+    return engine_of(df).find_bottom(start)
 
 
 def calc_box_min(df, i) -> float:
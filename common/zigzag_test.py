@@ -1,4 +1,5 @@
-from zigzag import mark_zigzag, mark_zigzag_bottom_to_peak, mark_zigzag_peak_to_bottom
+from zigzag import StreamingZigzag, ZigzagEngine, calc_zigzag2, engine_of, find_bottom, find_peak, mark_zigzag, mark_zigzag2, mark_zigzag_bottom_to_peak, mark_zigzag_peak_to_bottom
+from loader import load_candles
 import pandas as pd
 import os
 
@@ -17,8 +18,7 @@ def test_mark_zigzag():
         194, 198, 200, 201, 203, 207, 208,
         215, 220, 221, 224, 228, 229, 231
     ]
-    df = mark_zigzag(pd.read_csv(test_data_path, parse_dates=["datetime"], dayfirst=False, encoding="utf-16le", names=[
-        "datetime", "open", "high", "low", "close", "tick", "volume"]))
+    df = mark_zigzag(load_candles(test_data_path))
     assert test_data_expect == df[df['zigzag']].index.tolist()
 
 
@@ -30,8 +30,7 @@ def test_mark_zigzag_bottom_to_peak():
         179, 185, 190, 194, 200, 203, 208,
         220, 224, 229
     ]
-    df = pd.read_csv(test_data_path, parse_dates=["datetime"], dayfirst=False, encoding="utf-16le", names=[
-        "datetime", "open", "high", "low", "close", "tick", "volume"])
+    df = load_candles(test_data_path)
     df['zigzag'] = False
     mark_zigzag_bottom_to_peak(df)
     assert test_data_expect == df[df['zigzag']].index.tolist()
@@ -44,8 +43,75 @@ def test_mark_zigzag_peak_to_bottom():
         136, 140, 143, 157, 162, 174, 180, 189,
         192, 198, 201, 207, 215, 221, 228, 231,
     ]
-    df = pd.read_csv(test_data_path, parse_dates=["datetime"], dayfirst=False, encoding="utf-16le", names=[
-        "datetime", "open", "high", "low", "close", "tick", "volume"])
+    df = load_candles(test_data_path)
     df['zigzag'] = False
     mark_zigzag_peak_to_bottom(df)
     assert test_data_expect == df[df['zigzag']].index.tolist()
+
+
+def test_mark_zigzag2():
+    test_data_expect = [
+        0, 2, 5, 6, 9, 11, 14, 15, 17, 18, 22,
+        24, 25, 30, 33, 42, 50, 58, 62, 66, 67,
+        83, 89, 95, 97, 103, 105, 106, 111, 115,
+        116, 123, 125, 131, 133, 136, 138, 140,
+        142, 143, 155, 157, 159, 162, 171, 174,
+        179, 180, 185, 189, 190, 192, 194, 198,
+        200, 201, 203, 207, 208, 215, 220, 221,
+        224, 228, 229, 231, 232
+    ]
+    df = mark_zigzag2(load_candles(test_data_path))
+    marked = df[df['zigzag']]
+    assert isinstance(df['zigzag-kind'].dtype, pd.CategoricalDtype)
+    assert test_data_expect == marked.index.tolist()
+    # ピークとボトムが交互にマーク付けされていること
+    assert ["bottom", "peak"] * 33 + ["bottom"] == marked['zigzag-kind'].tolist()
+    # 直前のジグザグを起点としていること
+    assert [0] + test_data_expect[:-1] == marked['zigzag-from'].astype(int).tolist()
+    assert [0.0, 3.792, -0.427, 1.554] == marked['zigzag-delta'].head(4).round(3).tolist()
+    assert [144.622, 145.749] == marked['zigzag-peak-price'].dropna().head(2).tolist()
+    assert [140.83, 144.195] == marked['zigzag-bottom-price'].dropna().head(2).tolist()
+
+
+def test_calc_zigzag2_resume():
+    df = load_candles(test_data_path)
+    expect, _ = calc_zigzag2(ZigzagEngine.from_dataframe(df))
+
+    # 途中までのローソク足で探索した再開位置から探索を再開しても同じ結果になること
+    _, resume = calc_zigzag2(ZigzagEngine.from_dataframe(df.iloc[:150]))
+    resumed, _ = calc_zigzag2(ZigzagEngine.from_dataframe(df), resume)
+    assert expect.index[-len(resumed):] == resumed.index
+    assert expect.price[-len(resumed):] == resumed.price
+    assert all(index < resume['row_index'] for index in expect.index[:-len(resumed)])
+
+
+def test_streaming_zigzag():
+    df = load_candles(test_data_path)
+    expect, resume = calc_zigzag2(ZigzagEngine.from_dataframe(df))
+
+    zigzag = StreamingZigzag()
+    pivots = []
+    for bar in df.to_dict('records'):
+        pivots.extend(zigzag.update(bar))
+
+    # 確定したジグザグだけがmark_zigzag2と同じ順序で返されること
+    assert [pivot['index'] for pivot in pivots] == expect.index[:len(pivots)].tolist()
+    assert [pivot['price'] for pivot in pivots] == expect.price[:len(pivots)].tolist()
+    # 再開位置より前のジグザグは全て確定していること
+    assert sum(1 for index in expect.index if index < resume['row_index']) <= len(pivots)
+
+
+def test_find_peak_bottom():
+    df = load_candles(test_data_path)
+    engine = ZigzagEngine.from_dataframe(df)
+    # 互換関数はZigzagEngineと同じ結果になり、同じデータフレームではジグザグ探索クラスを使い回すこと
+    for start in [0, 10, 100]:
+        assert find_peak(df, start) == engine.find_peak(start)
+        assert find_bottom(df, start) == engine.find_bottom(start)
+    assert engine_of(df) is engine_of(df)
+
+    # 列を置き換えた場合は生成し直すこと
+    cached = engine_of(df)
+    df['open'] = df['open'] + 1.0
+    assert engine_of(df) is not cached
+    assert find_peak(df, 0) == ZigzagEngine.from_dataframe(df).find_peak(0)
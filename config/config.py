@@ -5,11 +5,6 @@ from pathlib import Path
 import sys
 from typing import Any
 
-if sys.version_info >= (3, 11):
-    import tomllib
-else:
-    import tomlkit
-
 
 def load_config(config_path: Path) -> dict[str, Any]:
     """設定情報の読み込み
@@ -24,9 +19,12 @@ def load_config(config_path: Path) -> dict[str, Any]:
     """
     config = {}
     if config_path.is_file():
+        # MEMO: 設定ファイルがある場合だけtomlのライブラリを読み込む
         with config_path.open() as f:
-            if "tomlkit" in sys.modules:
-                config = tomlkit.parse(f.read())
-            elif "tomllib" in sys.modules:
+            if sys.version_info >= (3, 11):
+                import tomllib
                 config = tomllib.loads(f.read())
+            else:
+                import tomlkit
+                config = tomlkit.parse(f.read())
     return config
@@ -16,9 +16,20 @@ def main():
 
     FXTester-cliのエントリーポイントとなる関数
     """
+    # 出力ファイルの拡張子の候補
+    output_ext_choices = ["json", "jsonl", "csv", "parquet", "feather", "arrow"]
+    # 段階ごとの計測に対応したサブコマンド
+    profile_modes = ["analyze", "detect", "pipeline"]
+    # 時間足の候補
+    timeframe_choices = ["M1", "M5", "M15", "M30", "H1", "H4", "D1", "W1", "MN1"]
+
     # 共通パーサーの初期化
     common_parser = argparse.ArgumentParser(add_help=False)
     common_parser.add_argument("-c", "--config", default="config/config.toml", help="設定ファイルのパスを指定する")
+    common_parser.add_argument("--profile", action="store_true", help="段階ごとの処理時間と最大RSSの増加量を計測して表示する (analyze,detect,pipelineのみ、それ以外のサブコマンドでは警告して無視する)")
+    common_parser.add_argument("--profile-output", type=str, help="段階ごとの計測結果を出力するjsonファイルのパス")
+    common_parser.add_argument("--profile-stats", type=str, help="最も時間のかかった段階をもう1度実行してcProfileの結果(pstats)を出力するフォルダのパス")
+    common_parser.add_argument("--profile-memory", action="store_true", help="段階ごとのPythonとNumPyの確保量もtracemallocで計測する (処理時間は遅くなる)")
 
     # サブコマンドパーサーの初期化
     parser = argparse.ArgumentParser(description="", add_help=False)
@@ -28,24 +39,88 @@ def main():
     analyzer_parser = sub_parser.add_parser("analyze", help="インジケータを計算する", parents=[common_parser])
     analyzer_parser.add_argument("-i", "--input", type=str, help="入力ファイルのパス (csvまたはcsvが格納されたフォルダ)")
     analyzer_parser.add_argument("-o", "--output", type=str, help="出力ファイルのパス")
-    analyzer_parser.add_argument("-e", "--ext", choices=["json", "csv"], help="出力ファイルの拡張子")
+    analyzer_parser.add_argument("--cache", type=str, help="読み込んだCSVをキャッシュするフォルダのパス")
+    analyzer_parser.add_argument("-e", "--ext", choices=output_ext_choices, help="出力ファイルの拡張子")
+    analyzer_parser.add_argument("--gzip", action="store_true", help="出力ファイルをgzip圧縮する (json,jsonl,csvのみ)")
     analyzer_parser.add_argument("-g", "--show-graph", action='store_true', help="検出した特徴をグラフに重畳して表示する")
     analyzer_parser.add_argument("-s", "--sma", type=int, nargs='*', help="単純移動平均線の平均値を指定する")
     analyzer_parser.add_argument("-k", "--ichimoku", action="store_true", help="一目均衡表を計算する")
     analyzer_parser.add_argument("-z", "--zigzag", action="store_true", help="ジグザグを検出する")
+    analyzer_parser.add_argument("-b", "--base-timeframe", choices=timeframe_choices, help="入力ファイルの時間足")
+    analyzer_parser.add_argument("-T", "--timeframes", choices=timeframe_choices, nargs='+', help="変換して出力する時間足 (時間足ごとにファイルを出力する)")
+    analyzer_parser.add_argument("--incremental", action="store_true", help="前回の計算結果に追加されたローソク足だけを計算する")
+    analyzer_parser.add_argument("--compact", action="store_true", help="インジケータをfloat32、ジグザグをピボット表(出力ファイル名.pivots)として出力する")
+    analyzer_parser.add_argument("--chunk-rows", type=int, help="指定した本数ずつ読み込んで計算・出力する (ファイル全体をメモリに読み込まない、0の場合は一括で計算する)")
+    analyzer_parser.add_argument("--pivot-index", action="store_true", help="ジグザグの点ごとのピボットインデックス(出力ファイル名.pivotindex.arrow)を出力する")
+    analyzer_parser.add_argument("-j", "--jobs", type=int, help="並列に処理するプロセス数 (フォルダ指定時)")
 
     # detectorパーサーの初期化
     detector_parser = sub_parser.add_parser("detect", help="抵抗帯の情報を検出する", parents=[common_parser])
-    detector_parser.add_argument("-i", "--input", type=str, help="入力ファイルのパス (csvまたはcsvが格納されたフォルダ)")
+    detector_parser.add_argument("-i", "--input", type=str, help="入力ファイルのパス (json,jsonl,csv,parquet,feather,arrowまたはそれらが格納されたフォルダ)")
     detector_parser.add_argument("-o", "--output", type=str, help="出力ファイルのパス")
-    detector_parser.add_argument("-e", "--ext", choices=["json", "csv"], help="出力ファイルの拡張子", default="json")
+    detector_parser.add_argument("-e", "--ext", choices=output_ext_choices, help="出力ファイルの拡張子", default="json")
+    detector_parser.add_argument("--gzip", action="store_true", help="出力ファイルをgzip圧縮する (json,jsonl,csvのみ)")
     detector_parser.add_argument("-g", "--show-graph", action='store_true', help="検出した特徴をグラフに重畳して表示する")
     detector_parser.add_argument("-w", "--window", type=int, help="抵抗帯判定に使用するウインドウの幅")
     detector_parser.add_argument("-t", "--threshold", type=float, help="抵抗帯面積率の閾値")
+    detector_parser.add_argument("--confluence", choices=timeframe_choices, nargs='+', help="抵抗帯を結合する上位足の時間足 (入力ファイル名は銘柄名_時間足)")
+    detector_parser.add_argument("-j", "--jobs", type=int, help="並列に処理するプロセス数 (フォルダ指定時)")
+    detector_parser.add_argument("--start", type=str, help="検出する範囲の開始日時 (例: 2024-01-01、arrow形式は範囲だけを読み込む)")
+    detector_parser.add_argument("--end", type=str, help="検出する範囲の終了日時 (例: 2024-06-30 23:59)")
+    detector_parser.add_argument("--pivot-index", action="store_true", help="ピボットインデックスを使用してジグザグの前後だけをストア(arrow)から読み込み、ジグザグの点ごとの検出結果を出力する")
+
+    # pipelineパーサーの初期化
+    pipeline_parser = sub_parser.add_parser("pipeline", help="インジケータの計算と抵抗帯の検出を連続して実行する", parents=[common_parser])
+    pipeline_parser.add_argument("-i", "--input", type=str, help="入力ファイルのパス (csvまたはcsvが格納されたフォルダ)")
+    pipeline_parser.add_argument("-o", "--output", type=str, help="出力ファイルのパス")
+    pipeline_parser.add_argument("--cache", type=str, help="読み込んだCSVをキャッシュするフォルダのパス")
+    pipeline_parser.add_argument("-e", "--ext", choices=output_ext_choices, help="出力ファイルの拡張子")
+    pipeline_parser.add_argument("--gzip", action="store_true", help="出力ファイルをgzip圧縮する (json,jsonl,csvのみ)")
+    pipeline_parser.add_argument("-g", "--show-graph", action='store_true', help="検出した特徴をグラフに重畳して表示する")
+    pipeline_parser.add_argument("-s", "--sma", type=int, nargs='*', help="単純移動平均線の平均値を指定する")
+    pipeline_parser.add_argument("-k", "--ichimoku", action="store_true", help="一目均衡表を計算する")
+    pipeline_parser.add_argument("-z", "--zigzag", action="store_true", help="ジグザグを検出する")
+    pipeline_parser.add_argument("-w", "--window", type=int, help="抵抗帯判定に使用するウインドウの幅")
+    pipeline_parser.add_argument("-t", "--threshold", type=float, help="抵抗帯面積率の閾値")
+    pipeline_parser.add_argument("-j", "--jobs", type=int, help="並列に処理するプロセス数 (フォルダ指定時)")
+
+    # sweepパーサーの初期化
+    sweep_parser = sub_parser.add_parser("sweep", help="抵抗帯判定のパラメータの組み合わせごとの反発数を集計する", parents=[common_parser])
+    sweep_parser.add_argument("-i", "--input", type=str, help="入力ファイルのパス (json,jsonl,csv,parquet,feather,arrowまたはそれらが格納されたフォルダ)")
+    sweep_parser.add_argument("-o", "--output", type=str, help="出力ファイルのパス (未指定の場合は標準出力)")
+    sweep_parser.add_argument("-e", "--ext", choices=output_ext_choices, help="出力ファイルの拡張子")
+    sweep_parser.add_argument("-w", "--window", type=str, nargs='+', help="抵抗帯判定に使用するウインドウの幅の候補 (開始:終了[:間隔]で範囲指定)")
+    sweep_parser.add_argument("-t", "--threshold", type=str, nargs='+', help="抵抗帯面積率の閾値の候補 (開始:終了[:間隔]で範囲指定)")
+    sweep_parser.add_argument("-j", "--jobs", type=int, help="並列に処理するプロセス数 (フォルダ指定時)")
+
+    # streamパーサーの初期化
+    stream_parser = sub_parser.add_parser("stream", help="1本ずつ受け取ったローソク足のインジケータを計算する", parents=[common_parser])
+    stream_parser.add_argument("-i", "--input", type=str, help="入力ファイルのパス (名前付きパイプ可、-の場合は標準入力)")
+    stream_parser.add_argument("-p", "--port", type=int, help="ローソク足を受け取るローカルのポート番号")
+    stream_parser.add_argument("-o", "--output", type=str, help="出力ファイルのパス (未指定の場合は標準出力)")
+    stream_parser.add_argument("-s", "--sma", type=int, nargs='*', help="単純移動平均線の平均値を指定する")
+    stream_parser.add_argument("-k", "--ichimoku", action="store_true", help="一目均衡表を計算する")
+    stream_parser.add_argument("-z", "--zigzag", action="store_true", help="ジグザグを検出する")
+
+    # renderパーサーの初期化
+    render_parser = sub_parser.add_parser("render", help="抽出・検出結果のグラフを画像ファイルに出力する", parents=[common_parser])
+    render_parser.add_argument("-i", "--input", type=str, help="入力ファイルのパス (json,jsonl,csv,parquet,feather,arrowまたはそれらが格納されたフォルダ)")
+    render_parser.add_argument("-o", "--output", type=str, help="出力フォルダのパス")
+    render_parser.add_argument("-f", "--format", choices=["png", "svg"], help="画像の形式")
+    render_parser.add_argument("--chunk", type=int, help="1枚の画像に描画するローソク足の本数 (0の場合は分割しない)")
+    render_parser.add_argument("--dpi", type=int, help="画像の解像度")
+    render_parser.add_argument("--max-bars", type=int, help="1枚の画像に描画するローソク足の最大本数 (超える場合は間引く、0の場合は間引かない)")
+    render_parser.add_argument("--start", type=str, help="描画する範囲の開始日時 (例: 2024-01-01)")
+    render_parser.add_argument("--end", type=str, help="描画する範囲の終了日時 (例: 2024-06-30 23:59)")
+    render_parser.add_argument("-j", "--jobs", type=int, help="並列に処理するプロセス数 (フォルダ指定時)")
 
     # コマンドのパース
     args = parser.parse_args()
 
+    if args.mode not in profile_modes and (args.profile or args.profile_output or args.profile_stats or args.profile_memory):
+        # MEMO: 計測のオプションは共通パーサーで受け付けるため、計測に対応していないサブコマンドでは警告して無視する
+        logger.warning(f"profile options are ignored by {args.mode}")
+
     # 設定読み込み
     config = load_config(Path(args.config))
 
@@ -54,6 +129,14 @@ def main():
             importlib.import_module("cmds.analyze.analyzer").Analyzer(config).main(args)
         case 'detect':
             importlib.import_module("cmds.detect.detector").Detector(config).main(args)
+        case 'pipeline':
+            importlib.import_module("cmds.pipeline.pipeline").Pipeline(config).main(args)
+        case 'sweep':
+            importlib.import_module("cmds.sweep.sweeper").Sweeper(config).main(args)
+        case 'stream':
+            importlib.import_module("cmds.stream.streamer").Streamer(config).main(args)
+        case 'render':
+            importlib.import_module("cmds.render.renderer").Renderer(config).main(args)
         case _:
             print(f"予期しないモードが指定されました: {args.mode}")
             sys.exit()